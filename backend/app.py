@@ -1,8 +1,11 @@
 # backend/app.py
 
+import os
 import sys
+import threading
+import time
 from pathlib import Path
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g, Response
 from flask_cors import CORS
 
 # --- Add backend directory to path ---
@@ -11,33 +14,258 @@ backend_dir = Path(__file__).resolve().parent
 sys.path.append(str(backend_dir))
 # ------------------------------------
 
+# --- Load .env file (API keys for /api/simplify) ---
+from dotenv import load_dotenv
+load_dotenv(dotenv_path=backend_dir / ".env")
+# ------------------------
+
 # Import our quiz engine functions
 from src import (
-    load_quiz_questions,
-    load_manifestos,
-    compute_alignment
+    compute_alignment,
+    get_dataset,
+    alignment_cache_stats
 )
+from src.quiz_engine import get_alignment_kernel, get_registry
+from src.metrics import MetricsRegistry, SIZE_BUCKETS
+from src.prepared_response import PreparedResponse
+from src.rate_limit import RateLimiter, call_with_retries
+from src.simplify_service import SimplifyService
+from src.quiz_session import start_session, answer_session, session_stats
 
 # Initialize the Flask app
 app = Flask(__name__)
 
+# --- Warm the Dataset Cache ---
+# Parse qq.json and manifestos.json (and compile the alignment kernel) once
+# at startup. After this, every endpoint is served from memory and the files
+# are only re-read on change. Under gunicorn (see gunicorn.conf.py) this runs
+# in the master, so all workers share the result. Only the default election
+# is warmed; the others load on their first request.
+get_alignment_kernel(get_dataset())
+
 # --- Configure CORS ---
 # This is CRITICAL for your frontend
 # It allows your React app (on a different "origin")
 # to make requests to this backend.
 CORS(app, resources={r"/api/*": {"origins": "*"}}) # Allow all origins for /api/ routes
 
+# --- Request Metrics ---
+# Per-endpoint request counts, latency, payload sizes and errors, scraped
+# from /api/metrics (Prometheus text format). Recording a request costs a
+# few microseconds. Metrics are per process (per worker).
+metrics = MetricsRegistry(prefix="civicsense_")
+REQUESTS = metrics.counter(
+    "http_requests_total", "HTTP requests served.", ("endpoint", "method", "status"))
+ERRORS = metrics.counter(
+    "http_errors_total", "HTTP responses with a 4xx/5xx status.", ("endpoint", "status"))
+EXCEPTIONS = metrics.counter(
+    "http_exceptions_total", "Unhandled exceptions raised by endpoints.", ("endpoint",))
+LATENCY = metrics.histogram(
+    "http_request_duration_seconds", "Time spent handling a request.", ("endpoint",))
+REQUEST_SIZE = metrics.histogram(
+    "http_request_size_bytes", "Request body size.", ("endpoint",), buckets=SIZE_BUCKETS)
+RESPONSE_SIZE = metrics.histogram(
+    "http_response_size_bytes", "Response body size.", ("endpoint",), buckets=SIZE_BUCKETS)
+metrics.gauge(
+    "alignment_cache", "Alignment result cache statistics.", ("stat",),
+    callback=lambda: {
+        (k,): v for k, v in alignment_cache_stats().items() if isinstance(v, (int, float))
+    })
+metrics.gauge(
+    "quiz_sessions", "Adaptive quiz session store and completion statistics.", ("stat",),
+    callback=lambda: {
+        (k,): v for k, v in session_stats().items() if isinstance(v, (int, float))
+    })
+metrics.gauge(
+    "datasets", "Election dataset registry: loads, evictions and memory use.", ("stat",),
+    callback=lambda: {
+        (k,): v for k, v in get_registry().stats().items() if isinstance(v, (int, float))
+    })
+SIMPLIFY_BATCH_UNITS = metrics.histogram(
+    "simplify_batch_units", "Passages per simplification LLM call.", (),
+    buckets=(1, 2, 4, 8, 16, 32))
+SIMPLIFY_BATCH_LATENCY = metrics.histogram(
+    "simplify_batch_duration_seconds", "Time spent in one simplification LLM call.", ("status",))
+metrics.gauge(
+    "simplify", "Simplification cache, coalescing and batching statistics.", ("stat",),
+    callback=lambda: {
+        (k,): v for k, v in _simplify_stats().items() if isinstance(v, (int, float))
+    })
+
+
+def _endpoint_label() -> str:
+    # The route pattern (not the raw path), so label values stay bounded
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get("request_start")
+    if start is None:
+        return response
+    endpoint = _endpoint_label()
+    status = str(response.status_code)
+    LATENCY.observe(time.perf_counter() - start, endpoint)
+    REQUESTS.inc(endpoint, request.method, status)
+    if response.status_code >= 400:
+        ERRORS.inc(endpoint, status)
+    REQUEST_SIZE.observe(request.content_length or 0, endpoint)
+    if not response.is_streamed:
+        RESPONSE_SIZE.observe(response.calculate_content_length() or 0, endpoint)
+    return response
+
+
+@app.teardown_request
+def record_exception(error):
+    if error is not None:
+        EXCEPTIONS.inc(_endpoint_label())
+
+# --- Pre-serialized Responses ---
+# The quiz and manifesto bodies only change with the dataset, so they are
+# serialized and compressed once per dataset version and revalidated with
+# ETags (see src/prepared_response.py).
+STATIC_CACHE_CONTROL = "public, max-age=300"
+
+def _prepared(name: str, snapshot, get_data) -> PreparedResponse:
+    return snapshot.derive(
+        f"response:{name}",
+        lambda d: PreparedResponse(app.json.response(get_data(d)).get_data())
+    )
+
+def _send_prepared(prepared: PreparedResponse):
+    """Serves a PreparedResponse: 304 if the client's ETag matches, else the best encoding."""
+    headers = {"Cache-Control": STATIC_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    client_etags = request.if_none_match
+    if client_etags and prepared.matches(
+        list(client_etags.as_set(include_weak=True)) + (["*"] if client_etags.star_tag else [])
+    ):
+        response = Response(status=304, headers=headers)
+        response.set_etag(prepared.etag(prepared.choose_encoding(request.accept_encodings)))
+        return response
+
+    encoding = prepared.choose_encoding(request.accept_encodings)
+    response = Response(prepared.bodies[encoding], mimetype=prepared.mimetype, headers=headers)
+    response.set_etag(prepared.etag(encoding))
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+# Build them at startup too, so preloaded gunicorn workers share the bytes.
+# (With a compiled manifestos snapshot the JSON isn't parsed at startup, so
+# the manifestos body is left until the first request asks for it.)
+_startup_snapshot = get_dataset()
+_prepared("quiz", _startup_snapshot, lambda d: d.questions)
+if _startup_snapshot.compiled is None:
+    _prepared("manifestos", _startup_snapshot, lambda d: d.manifestos)
+
+# --- Text Simplification ---
+# /api/simplify runs passages through the LLM on demand, via SimplifyService
+# (unit cache, coalescing of in-flight duplicates, windowed batching; see
+# src/simplify_service.py). The LLM client is created on the first request,
+# inside the worker process, so nothing network-bound crosses a fork.
+SIMPLIFY_PROVIDER = os.getenv("CIVICSENSE_LLM_PROVIDER", "google")
+SIMPLIFY_MODEL = os.getenv("CIVICSENSE_LLM_MODEL") or None # None = provider default
+SIMPLIFY_TIMEOUT = 60.0     # Seconds a request waits for its passages
+SIMPLIFY_RETRIES = 2
+MAX_SIMPLIFY_CHARS = 20_000
+
+_simplifier = None
+_simplifier_lock = threading.Lock()
+
+def _observe_simplify_batch(units: int, seconds: float, ok: bool):
+    SIMPLIFY_BATCH_UNITS.observe(units)
+    SIMPLIFY_BATCH_LATENCY.observe(seconds, "ok" if ok else "error")
+
+def get_simplifier() -> SimplifyService:
+    """The process-wide SimplifyService (raises if the LLM provider isn't configured)."""
+    global _simplifier
+    with _simplifier_lock:
+        if _simplifier is None:
+            # Imported here so workers that never simplify don't load the LLM client
+            from src.llm_client import LLMClient, API_KEY_ENV_VARS
+            key_name = API_KEY_ENV_VARS.get(SIMPLIFY_PROVIDER)
+            api_key = os.getenv(key_name) if key_name else None
+            if key_name and not api_key:
+                raise EnvironmentError(f"{key_name} is not set")
+            provider_options = None
+            if SIMPLIFY_PROVIDER == "local":
+                provider_options = {"latency": os.getenv("CIVICSENSE_LOCAL_LATENCY", "fixed:0")}
+            llm = LLMClient(SIMPLIFY_PROVIDER, api_key, model=SIMPLIFY_MODEL,
+                            timeout=SIMPLIFY_TIMEOUT, provider_options=provider_options)
+            limiter = RateLimiter.for_provider(SIMPLIFY_PROVIDER)
+            _simplifier = SimplifyService(
+                lambda prompt: call_with_retries(
+                    llm.generate, prompt, limiter=limiter, retries=SIMPLIFY_RETRIES
+                ),
+                on_batch=_observe_simplify_batch,
+            )
+        return _simplifier
+
+def _simplify_stats() -> dict:
+    if _simplifier is None:
+        return {}
+    stats = _simplifier.stats()
+    cache = stats.pop("cache")
+    stats.update({f"cache_{k}": v for k, v in cache.items()})
+    return stats
+
+# --- Request Parameters ---
+# Every dataset endpoint takes ?election=<id> (POST bodies may send
+# "election" instead); without it the default election is served.
+# The scoring endpoints also take an optional top_k the same way.
+
+def _requested_election(data: dict = None):
+    """
+    Returns (election id or None, error response or None) for this request.
+    """
+    body = data if isinstance(data, dict) else {}
+    election = body.get('election', request.args.get('election')) or None
+    if election is not None and (not isinstance(election, str) or election not in get_registry()):
+        return None, (jsonify({"error": f"Unknown election: {election}"}), 404)
+    return election, None
+
+def _requested_top_k(data: dict):
+    """
+    Returns (top_k or None, error response or None) for this request.
+    Taken from the body, else the query string (/api/align?top_k=3); only
+    whole numbers >= 1 are accepted (not 2.7, true or "3.0").
+    """
+    top_k = data.get('top_k', request.args.get('top_k'))
+    if top_k is None:
+        return None, None
+    if isinstance(top_k, str) and top_k.isascii() and top_k.isdecimal():
+        top_k = int(top_k)
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        return None, (jsonify({"error": "Invalid input. 'top_k' must be a positive integer."}), 400)
+    return top_k, None
+
 # --- API Endpoints ---
 
+@app.route('/api/elections', methods=['GET'])
+def get_elections():
+    """
+    Lists the elections this server can serve, e.g.
+    [{"id": "default", "default": true, "loaded": true}, ...].
+    """
+    return jsonify(get_registry().elections())
+
 @app.route('/api/quiz', methods=['GET'])
 def get_quiz():
     """
     Endpoint to send the quiz questions to the frontend.
     """
-    questions = load_quiz_questions()
-    if not questions:
+    election, error = _requested_election()
+    if error:
+        return error
+    snapshot = get_dataset(election)
+    if not snapshot.questions:
         return jsonify({"error": "Quiz questions not found."}), 404
-    return jsonify(questions)
+    return _send_prepared(_prepared("quiz", snapshot, lambda d: d.questions))
 
 @app.route('/api/manifestos', methods=['GET'])
 def get_manifestos():
@@ -45,10 +273,13 @@ def get_manifestos():
     Endpoint to send all manifesto data to the frontend.
     (You might use this to show a "details" page)
     """
-    manifestos = load_manifestos()
-    if not manifestos:
+    election, error = _requested_election()
+    if error:
+        return error
+    snapshot = get_dataset(election)
+    if not snapshot.has_manifestos:
         return jsonify({"error": "Manifestos not found."}), 404
-    return jsonify(manifestos)
+    return _send_prepared(_prepared("manifestos", snapshot, lambda d: d.manifestos))
 
 @app.route('/api/align', methods=['POST'])
 def get_alignment():
@@ -64,23 +295,119 @@ def get_alignment():
     if not user_answers or not isinstance(user_answers, list):
         return jsonify({"error": "Invalid input. 'answers' must be a list."}), 400
 
+    # Optional: only return the best K matches, e.g. {"answers": [...], "top_k": 3}
+    # (also accepted as a query parameter: /api/align?top_k=3)
+    top_k, error = _requested_top_k(data)
+    if error:
+        return error
+
+    election, error = _requested_election(data)
+    if error:
+        return error
+
     try:
         # Run our existing quiz engine logic!
-        results = compute_alignment(user_answers)
+        results = compute_alignment(user_answers, top_k=top_k, election=election)
         return jsonify(results)
     
     except Exception as e:
         print(f"Error computing alignment: {e}")
+        EXCEPTIONS.inc(_endpoint_label())
         return jsonify({"error": "An internal server error occurred."}), 500
 
+# --- Adaptive Quiz Sessions ---
+# One answer per request instead of the whole list at the end: the server
+# keeps running scores, picks the most informative next question and stops
+# as soon as the top match is settled (see src/quiz_session.py).
+
+@app.route('/api/quiz/session', methods=['POST'])
+def start_quiz_session():
+    """Starts an adaptive quiz session; returns the session id and first question."""
+    election, error = _requested_election(request.get_json(silent=True))
+    if error:
+        return error
+    try:
+        return jsonify(start_session(election))
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+
+@app.route('/api/quiz/session/<session_id>/answer', methods=['POST'])
+def answer_quiz_session(session_id):
+    """
+    Records one answer, e.g. {"question_id": 4, "answer": 5, "state": "..."}.
+    "state" is the token from the previous response (lets any server
+    process resume the session). Returns the next question, or
+    "done": true with the final "results" (same shape as /api/align).
+    """
+    data = request.get_json(silent=True) or {}
+    question_id = data.get('question_id')
+    answer = data.get('answer')
+    state = data.get('state')
+    if not isinstance(question_id, int) or not isinstance(answer, int):
+        return jsonify({"error": "Invalid input. 'question_id' and 'answer' must be integers."}), 400
+    if state is not None and not isinstance(state, str):
+        return jsonify({"error": "Invalid input. 'state' must be a string."}), 400
+
+    top_k, error = _requested_top_k(data)
+    if error:
+        return error
+
+    election, error = _requested_election(data)
+    if error:
+        return error
+
+    try:
+        return jsonify(answer_session(session_id, question_id, answer, state=state,
+                                      top_k=top_k, election=election))
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/simplify', methods=['POST'])
+def simplify_text():
+    """
+    Rewrites a manifesto passage in plain language.
+    Expects {"text": "..."}; returns {"simplified": "...", "units": n,
+    "cached_units": n, "coalesced_units": n}.
+    """
+    data = request.get_json(silent=True) or {}
+    text = data.get('text')
+    if not isinstance(text, str) or not text.strip():
+        return jsonify({"error": "Invalid input. 'text' must be a non-empty string."}), 400
+    if len(text) > MAX_SIMPLIFY_CHARS:
+        return jsonify({"error": f"Text too long (max {MAX_SIMPLIFY_CHARS} characters)."}), 413
+
+    try:
+        simplifier = get_simplifier()
+    except Exception as e:
+        print(f"Error initializing the simplifier: {e}")
+        return jsonify({"error": "Text simplification is not available."}), 503
+
+    try:
+        return jsonify(simplifier.simplify(text, timeout=SIMPLIFY_TIMEOUT))
+    except TimeoutError:
+        return jsonify({"error": "Text simplification timed out."}), 504
+    except Exception as e:
+        print(f"Error simplifying text: {e}")
+        EXCEPTIONS.inc(_endpoint_label())
+        return jsonify({"error": "Text simplification failed."}), 502
+
 # --- Health Check Endpoint ---
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """A simple endpoint to check if the server is running."""
     return jsonify({"status": "ok", "message": "API is running"}), 200
 
+# --- Metrics Endpoint ---
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request and cache metrics in Prometheus text format."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 # This allows us to run the app using "python app.py"
 if __name__ == '__main__':
     # host='0.0.0.0' makes it accessible on your network
     # debug=True automatically reloads the server when you change code
+    # (development only; in production use: gunicorn -c gunicorn.conf.py app:app)
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
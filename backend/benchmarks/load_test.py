@@ -0,0 +1,490 @@
+# backend/benchmarks/load_test.py
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+
+# --- End-to-end Load Test ---
+# Replays quiz takers against a running API and ramps up the number of
+# concurrent users stage by stage. Each simulated user loops over one flow:
+#
+#   GET /api/quiz -> POST /api/align (answers drawn from --answers)
+#                 -> sometimes GET /api/manifestos (--manifestos-rate)
+#
+# Every user is an asyncio task with its own keep-alive connection, so one
+# process can drive hundreds of users. Only the standard library is used.
+# By default the server is started locally (the Flask dev server without
+# the reloader, or gunicorn with --server gunicorn) and stopped afterwards:
+#
+#   python benchmarks/load_test.py --concurrency 1 8 32 --output load.json
+#   python benchmarks/load_test.py --server gunicorn --workers 3
+#   python benchmarks/load_test.py --url http://10.0.0.5:5000   # existing server
+#
+# A stage "passes" while its error rate and p99 latency stay within
+# --max-error-rate / --max-p99-ms; the ramp stops at the first stage that
+# doesn't, and the report names the highest concurrency that passed.
+
+DEFAULT_CONCURRENCY = [1, 2, 4, 8, 16, 32, 64]
+DEFAULT_ANSWERS = "uniform=1,centrist=1,polarized=1,personas=2"
+STAGE_SECONDS = 10.0
+WARMUP_SECONDS = 1.0        # Start of each stage left out of the statistics
+REQUEST_TIMEOUT = 10.0
+MAX_ERROR_RATE = 0.01
+MAX_P99_MS = 500.0
+NUM_PERSONAS = 50
+SERVER_START_TIMEOUT = 60.0
+
+
+# --- Answer Distributions ---
+# Each generator returns one answer vector (values 1-5) for n questions.
+
+def answers_uniform(rng: random.Random, n: int, personas: list) -> list[int]:
+    return [rng.randint(1, 5) for _ in range(n)]
+
+def answers_centrist(rng: random.Random, n: int, personas: list) -> list[int]:
+    """Mostly 2-4: people without strong views."""
+    return [min(5, max(1, round(rng.gauss(3, 0.9)))) for _ in range(n)]
+
+def answers_polarized(rng: random.Random, n: int, personas: list) -> list[int]:
+    """Mostly 1 or 5."""
+    return rng.choices((1, 2, 3, 4, 5), weights=(4, 1, 0.5, 1, 4), k=n)
+
+def answers_personas(rng: random.Random, n: int, personas: list) -> list[int]:
+    """One of a fixed set of answer vectors, so identical submissions repeat (as they do in practice)."""
+    return list(rng.choice(personas)[:n])
+
+DISTRIBUTIONS = {
+    "uniform": answers_uniform,
+    "centrist": answers_centrist,
+    "polarized": answers_polarized,
+    "personas": answers_personas,
+}
+
+
+def parse_mix(spec: str) -> dict:
+    """'uniform=1,personas=2' -> {"uniform": 1.0, "personas": 2.0}. A bare name has weight 1."""
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown answer distribution {name!r} (choose from {', '.join(DISTRIBUTIONS)})")
+        mix[name] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The answer mix needs at least one distribution with a positive weight.")
+    return mix
+
+
+# --- Minimal Async HTTP/1.1 Client ---
+
+class HTTPConnection:
+    """One keep-alive connection, like a browser tab. Not safe for concurrent use."""
+
+    def __init__(self, host: str, port: int, timeout: float = REQUEST_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        """Returns (status, headers, body). Reconnects once if a reused connection was closed."""
+        reused = self._writer is not None
+        try:
+            return await asyncio.wait_for(self._exchange(method, path, body, headers), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+        # The server dropped an idle keep-alive connection: retry on a new one
+        try:
+            return await asyncio.wait_for(self._exchange(method, path, body, headers), self.timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _exchange(self, method, path, body, headers):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the server")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            data = b"".join(chunks)
+        elif "content-length" in response_headers:
+            data = await self._reader.readexactly(int(response_headers["content-length"]))
+        elif status in (204, 304):
+            data = b""
+        else:
+            data = await self._reader.read()
+            self.close()
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, response_headers, data
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+# --- Simulated Users ---
+
+class Recorder:
+    """Collects (endpoint, status, latency) samples for the current stage."""
+
+    def __init__(self):
+        self.recording = False
+        self.samples = []   # (endpoint, status, seconds); status is an int or an error name
+        self.flows = 0
+
+    def add(self, endpoint: str, status, seconds: float):
+        if self.recording:
+            self.samples.append((endpoint, status, seconds))
+
+
+async def timed_request(conn: HTTPConnection, recorder: Recorder, endpoint: str, method: str,
+                        path: str, body: bytes = None, headers: dict = None):
+    """Sends one request and records it. Returns (status, body), or (None, None) on failure."""
+    start = time.perf_counter()
+    try:
+        status, _, data = await conn.request(method, path, body, headers)
+    except asyncio.TimeoutError:
+        recorder.add(endpoint, "timeout", time.perf_counter() - start)
+        conn.close()
+        return None, None
+    except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+        recorder.add(endpoint, type(e).__name__, time.perf_counter() - start)
+        conn.close()
+        return None, None
+    recorder.add(endpoint, status, time.perf_counter() - start)
+    return status, data
+
+
+async def user_loop(user_id: int, args, recorder: Recorder, stop: asyncio.Event, personas: list):
+    rng = random.Random(f"{args.seed}:{user_id}")
+    mix = list(args.answer_mix.items())
+    names, weights = [name for name, _ in mix], [weight for _, weight in mix]
+    query = f"?election={args.election}" if args.election else ""
+    # Like a browser: compressed responses, but no ETag (every flow is a first visit)
+    get_headers = {"Accept-Encoding": "gzip, br"}
+    post_headers = {"Content-Type": "application/json"}
+    conn = HTTPConnection(args.host, args.port, args.timeout)
+    try:
+        while not stop.is_set():
+            status, data = await timed_request(
+                conn, recorder, "GET /api/quiz", "GET", f"/api/quiz{query}",
+                headers={"Accept-Encoding": "identity"} if args.parse_quiz else get_headers)
+            num_questions = args.questions
+            if status == 200 and args.parse_quiz:
+                num_questions = len(json.loads(data))
+
+            distribution = DISTRIBUTIONS[rng.choices(names, weights=weights)[0]]
+            body = json.dumps({"answers": distribution(rng, num_questions, personas)}).encode("utf-8")
+            await timed_request(conn, recorder, "POST /api/align", "POST", f"/api/align{query}",
+                                body=body, headers=post_headers)
+
+            if rng.random() < args.manifestos_rate:
+                await timed_request(conn, recorder, "GET /api/manifestos", "GET",
+                                    f"/api/manifestos{query}", headers=get_headers)
+            if recorder.recording:
+                recorder.flows += 1
+            if args.think_time > 0:
+                await asyncio.sleep(rng.expovariate(1 / args.think_time))
+    finally:
+        conn.close()
+
+
+# --- Statistics ---
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: list, seconds: float) -> dict:
+    latencies = sorted(latency * 1000 for _, _, latency in samples)
+    errors = sum(1 for _, status, _ in samples if not isinstance(status, int) or status >= 400)
+    return {
+        "requests": len(samples),
+        "requests_per_sec": round(len(samples) / seconds, 2) if seconds else 0.0,
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+    }
+
+
+async def run_stage(concurrency: int, args, personas: list) -> dict:
+    recorder = Recorder()
+    stop = asyncio.Event()
+    users = [
+        asyncio.create_task(user_loop(i, args, recorder, stop, personas))
+        for i in range(concurrency)
+    ]
+    await asyncio.sleep(args.warmup)
+    recorder.recording = True
+    start = time.perf_counter()
+    await asyncio.sleep(args.stage_seconds)
+    recorder.recording = False
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*users, return_exceptions=True)
+
+    stage = {"concurrency": concurrency, "seconds": round(elapsed, 2), "flows": recorder.flows,
+             "flows_per_sec": round(recorder.flows / elapsed, 2)}
+    stage.update(summarize(recorder.samples, elapsed))
+    by_endpoint = {}
+    status_codes = {}
+    for sample in recorder.samples:
+        by_endpoint.setdefault(sample[0], []).append(sample)
+        status_codes[str(sample[1])] = status_codes.get(str(sample[1]), 0) + 1
+    stage["endpoints"] = {name: summarize(s, elapsed) for name, s in sorted(by_endpoint.items())}
+    stage["status_codes"] = status_codes
+    stage["within_slo"] = (
+        stage["requests"] > 0
+        and stage["error_rate"] <= args.max_error_rate
+        and stage["latency_ms"]["p99"] <= args.max_p99_ms
+    )
+    return stage
+
+
+def make_personas(seed, count: int, num_questions: int) -> list:
+    rng = random.Random(f"{seed}:personas")
+    return [[rng.randint(1, 5) for _ in range(num_questions)] for _ in range(count)]
+
+
+async def run_load_test(args) -> list[dict]:
+    # The quiz length (for the answer vectors) comes from the server itself
+    conn = HTTPConnection(args.host, args.port, args.timeout)
+    query = f"?election={args.election}" if args.election else ""
+    try:
+        status, _, data = await conn.request("GET", f"/api/quiz{query}")
+    finally:
+        conn.close()
+    if status != 200:
+        raise RuntimeError(f"GET /api/quiz returned {status}: {data[:200]!r}")
+    if args.questions is None:
+        args.questions = len(json.loads(data))
+    personas = make_personas(args.seed, args.personas, args.questions)
+
+    stages = []
+    for concurrency in args.concurrency:
+        stage = await run_stage(concurrency, args, personas)
+        stages.append(stage)
+        latency = stage["latency_ms"]
+        print(f"{concurrency:>5} users: {stage['requests_per_sec']:>8.1f} req/s "
+              f"{stage['flows_per_sec']:>7.1f} flows/s  p50 {latency['p50']:>7.1f} ms  "
+              f"p95 {latency['p95']:>7.1f} ms  p99 {latency['p99']:>7.1f} ms  "
+              f"errors {stage['error_rate']:.2%}", file=sys.stderr)
+        if not stage["within_slo"] and not args.no_stop:
+            print("Stopping the ramp: error rate or p99 latency over the limit.", file=sys.stderr)
+            break
+    return stages
+
+
+# --- Local Server ---
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind: str, port: int, workers: int = None, log_path: Path = None) -> subprocess.Popen:
+    """Starts backend/app.py on 127.0.0.1:port: the Flask server (threaded, no reloader) or gunicorn."""
+    env = dict(os.environ)
+    if kind == "gunicorn":
+        env["CIVICSENSE_BIND"] = f"127.0.0.1:{port}"
+        if workers:
+            env["CIVICSENSE_WORKERS"] = str(workers)
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        command = [sys.executable, "-c",
+                   f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    log = open(log_path, "wb") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(command, cwd=backend_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_until_healthy(host: str, port: int, process: subprocess.Popen = None,
+                       timeout: float = SERVER_START_TIMEOUT) -> None:
+    async def probe():
+        conn = HTTPConnection(host, port, timeout=2.0)
+        try:
+            status, _, _ = await conn.request("GET", "/api/health")
+            return status == 200
+        finally:
+            conn.close()
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"The server exited with code {process.returncode} before it was ready.")
+        try:
+            if asyncio.run(probe()):
+                return
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"The server on {host}:{port} did not become healthy within {timeout:.0f}s.")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def environment_info() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=backend_dir,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent quiz takers against the CivicSense API.")
+    parser.add_argument("--url", default=None,
+                        help="Test an already running server (e.g. http://127.0.0.1:5000) instead of starting one.")
+    parser.add_argument("--server", choices=("dev", "gunicorn"), default="dev",
+                        help="Which server to start locally when --url isn't given.")
+    parser.add_argument("--workers", type=int, default=None, help="gunicorn worker processes.")
+    parser.add_argument("--server-log", type=Path, default=None, help="Write the started server's output here.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY,
+                        help="Concurrent users per stage, in order.")
+    parser.add_argument("--stage-seconds", type=float, default=STAGE_SECONDS, help="Measured seconds per stage.")
+    parser.add_argument("--warmup", type=float, default=WARMUP_SECONDS,
+                        help="Seconds at the start of each stage that are not measured.")
+    parser.add_argument("--answers", default=DEFAULT_ANSWERS,
+                        help=f"Weighted mix of answer distributions ({', '.join(DISTRIBUTIONS)}).")
+    parser.add_argument("--personas", type=int, default=NUM_PERSONAS,
+                        help="Distinct answer vectors used by the 'personas' distribution.")
+    parser.add_argument("--questions", type=int, default=None,
+                        help="Answers per submission (default: the number of quiz questions).")
+    parser.add_argument("--parse-quiz", action="store_true",
+                        help="Parse every /api/quiz response and answer exactly its questions.")
+    parser.add_argument("--manifestos-rate", type=float, default=0.1,
+                        help="Share of flows that also fetch /api/manifestos.")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Mean seconds a user pauses between flows (0 = as fast as possible).")
+    parser.add_argument("--election", default=None, help="Send ?election= with every request.")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="Per-request timeout in seconds.")
+    parser.add_argument("--max-error-rate", type=float, default=MAX_ERROR_RATE,
+                        help="Highest error rate a stage may have to pass.")
+    parser.add_argument("--max-p99-ms", type=float, default=MAX_P99_MS,
+                        help="Highest p99 latency a stage may have to pass.")
+    parser.add_argument("--no-stop", action="store_true", help="Run every stage even after one fails.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here (default: stdout).")
+    args = parser.parse_args()
+
+    try:
+        args.answer_mix = parse_mix(args.answers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    process = None
+    if args.url:
+        target = args.url.split("://", 1)[-1].rstrip("/")
+        args.host, _, port = target.partition(":")
+        args.port = int(port or 80)
+    else:
+        args.host, args.port = "127.0.0.1", free_port()
+        print(f"Starting the {args.server} server on port {args.port}...", file=sys.stderr)
+        process = start_server(args.server, args.port, args.workers, args.server_log)
+
+    try:
+        wait_until_healthy(args.host, args.port, process)
+        stages = asyncio.run(run_load_test(args))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    passed = [stage["concurrency"] for stage in stages if stage["within_slo"]]
+    report = {
+        "environment": environment_info(),
+        "config": {
+            "target": args.url or f"local {args.server} server",
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "stage_seconds": args.stage_seconds,
+            "answers": args.answer_mix,
+            "questions": args.questions,
+            "manifestos_rate": args.manifestos_rate,
+            "think_time": args.think_time,
+            "election": args.election,
+            "max_error_rate": args.max_error_rate,
+            "max_p99_ms": args.max_p99_ms,
+        },
+        "stages": stages,
+        "max_concurrency_within_slo": max(passed) if passed else None,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
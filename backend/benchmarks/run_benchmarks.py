@@ -0,0 +1,371 @@
+# backend/benchmarks/run_benchmarks.py
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+import sys
+
+# --- Add backend directory to path ---
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+sys.path.append(str(Path(__file__).resolve().parent))
+# ------------------------------------
+
+import numpy as np
+
+from src import quiz_engine, quiz_session
+from src.dataset import QuizDataset
+from src.compiled_snapshot import compile_json_file
+from src.storage import atomic_write_bytes
+from synthetic_data import write_dataset, generate_answers
+
+# --- Microbenchmarks for the hot paths ---
+# Times JSON loading, dataset compilation (from JSON and from a compiled
+# snapshot), alignment (single, batched and cached) and PDF extraction on
+# synthetic data at several scales, plus the cold start of the API server
+# (import time and resident memory of `import app` in a fresh interpreter).
+# Results are written as JSON so runs on different commits can be compared:
+#
+#   python benchmarks/run_benchmarks.py --output before.json
+#   (change code)
+#   python benchmarks/run_benchmarks.py --output after.json --compare before.json
+
+INPUTS_DIR = backend_dir / "inputs"
+DEFAULT_MANIFESTO_SCALES = [10, 100, 1000, 10000]
+DEFAULT_QUESTION_SCALES = [10, 200]
+QUICK_MANIFESTO_SCALES = [10, 1000]
+QUICK_QUESTION_SCALES = [10]
+BATCH_SIZE = 256
+STARTUP_ROUNDS = 5
+# Modules the API server should never need to import
+HEAVY_MODULES = ("fitz", "pymupdf", "openai", "anthropic", "google.generativeai",
+                 "src.pdf_extractor", "src.llm_client", "src.chunked_analyzer")
+
+# Runs in a fresh interpreter: times `import app` (which also loads the data
+# and compiles the alignment kernel) and reports the process's memory use.
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+seconds = time.perf_counter() - start
+rss = 0
+try:
+    with open("/proc/self/status") as f:
+        rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+except (OSError, StopIteration):
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+heavy = [m for m in json.loads(sys.argv[1]) if m in sys.modules]
+print(json.dumps({"seconds": seconds, "rss_bytes": rss, "modules": len(sys.modules), "heavy_modules": heavy}))
+"""
+
+
+def time_call(func, min_time: float = 0.2, rounds: int = 5) -> float:
+    """
+    Median seconds per call of func(). Each round repeats func until at
+    least min_time / rounds has elapsed, so fast functions are still timed
+    accurately.
+    """
+    func()  # Warm-up
+    per_call = []
+    budget = min_time / rounds
+    for _ in range(rounds):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= budget:
+                break
+        per_call.append(elapsed / calls)
+    return statistics.median(per_call)
+
+
+def measure_memory(func):
+    """Returns (result, peak_bytes, retained_bytes) of func() under tracemalloc."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak - before, current - before
+
+
+def bench_dataset(num_manifestos: int, num_questions: int, work_dir: Path, min_time: float) -> list[dict]:
+    params = {"manifestos": num_manifestos, "questions": num_questions}
+    quiz_path, manifestos_path = write_dataset(work_dir, num_manifestos, num_questions)
+    results = []
+
+    # --- Raw JSON parsing (what every request used to pay) ---
+    def load_json():
+        with open(quiz_path, "r", encoding="utf-8") as f:
+            json.load(f)
+        with open(manifestos_path, "r", encoding="utf-8") as f:
+            json.load(f)
+    results.append({
+        "name": "json_load",
+        "params": params,
+        "metrics": {
+            "seconds": time_call(load_json, min_time),
+            "file_bytes": quiz_path.stat().st_size + manifestos_path.stat().st_size,
+        },
+    })
+
+    # --- Cold start: load + compile the alignment kernel, with memory ---
+    def cold_start():
+        snapshot = QuizDataset(quiz_path, manifestos_path).snapshot()
+        quiz_engine.get_alignment_kernel(snapshot)
+        return snapshot
+    start = time.perf_counter()
+    snapshot, peak, retained = measure_memory(cold_start)
+    cold_seconds = time.perf_counter() - start
+    results.append({
+        "name": "dataset_cold_start",
+        "params": params,
+        "metrics": {
+            "seconds": time_call(cold_start, min_time, rounds=3),
+            "seconds_traced": cold_seconds,
+            "peak_bytes": peak,
+            "retained_bytes": retained,
+        },
+    })
+
+    # --- Cold start from a compiled (memory-mapped) snapshot ---
+    compiled_path = work_dir / "bench.snapshot"
+    atomic_write_bytes(compiled_path, compile_json_file(manifestos_path))
+    def compiled_cold_start():
+        snap = QuizDataset(quiz_path, manifestos_path, compiled_path=compiled_path).snapshot()
+        quiz_engine.get_alignment_kernel(snap)
+        return snap
+    _, peak, retained = measure_memory(compiled_cold_start)
+    results.append({
+        "name": "dataset_cold_start_compiled",
+        "params": params,
+        "metrics": {
+            "seconds": time_call(compiled_cold_start, min_time, rounds=3),
+            "peak_bytes": peak,
+            "retained_bytes": retained,
+            "file_bytes": compiled_path.stat().st_size,
+        },
+    })
+
+    answers = generate_answers(BATCH_SIZE, num_questions, seed=1)
+
+    # --- link_answers_to_tags ---
+    seconds = time_call(lambda: quiz_engine.link_answers_to_tags(answers[0], snapshot.questions), min_time)
+    results.append({
+        "name": "link_answers_to_tags",
+        "params": params,
+        "metrics": {"seconds": seconds, "ops_per_sec": 1 / seconds},
+    })
+
+    # --- Alignment, one uncached vector per call ---
+    seconds = time_call(lambda: quiz_engine.compute_alignment_many([answers[0]], dataset=snapshot), min_time)
+    results.append({
+        "name": "alignment_single",
+        "params": params,
+        "metrics": {"seconds": seconds, "ops_per_sec": 1 / seconds},
+    })
+
+    # --- Alignment, batched ---
+    seconds = time_call(lambda: quiz_engine.compute_alignment_many(answers, dataset=snapshot), min_time)
+    results.append({
+        "name": "alignment_batch",
+        "params": {**params, "batch": BATCH_SIZE},
+        "metrics": {"seconds": seconds, "vectors_per_sec": BATCH_SIZE / seconds},
+    })
+
+    # --- Raw kernel throughput (no result dicts) ---
+    kernel = quiz_engine.get_alignment_kernel(snapshot)
+    answer_matrix = np.asarray(answers, dtype=np.float64)
+    seconds = time_call(lambda: kernel.score(answer_matrix), min_time)
+    results.append({
+        "name": "alignment_kernel",
+        "params": {**params, "batch": BATCH_SIZE},
+        "metrics": {"seconds": seconds, "vectors_per_sec": BATCH_SIZE / seconds},
+    })
+
+    # --- Alignment through the public API with a warm result cache ---
+    quiz_engine.use_data_files(quiz_path, manifestos_path)
+    quiz_engine.compute_alignment(answers[0])
+    seconds = time_call(lambda: quiz_engine.compute_alignment(answers[0]), min_time)
+    results.append({
+        "name": "alignment_cached",
+        "params": params,
+        "metrics": {"seconds": seconds, "ops_per_sec": 1 / seconds},
+    })
+
+    # --- Adaptive quiz session: every answer posted, early stop ---
+    def adaptive_session():
+        state = quiz_session.start_session()
+        while not state["done"]:
+            state = quiz_session.answer_session(state["session_id"], state["question"]["id"], 4)
+        return state["answered"]
+    questions_asked = adaptive_session()
+    seconds = time_call(adaptive_session, min_time)
+    results.append({
+        "name": "quiz_session",
+        "params": params,
+        "metrics": {
+            "seconds": seconds,
+            "sessions_per_sec": 1 / seconds,
+            "questions_asked": questions_asked,
+        },
+    })
+
+    return results
+
+
+def bench_startup(rounds: int = STARTUP_ROUNDS) -> list[dict]:
+    """
+    Cold start of the API entry point: `import app` in a fresh interpreter,
+    `rounds` times. Reports the median import time, the median wall time
+    of the whole process (what spawning a worker costs) and its RSS.
+    """
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE, json.dumps(HEAVY_MODULES)],
+            cwd=backend_dir, capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            print(f"Skipping startup benchmark (import app failed):\n{proc.stderr}", file=sys.stderr)
+            return []
+        sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        sample["process_seconds"] = wall
+        samples.append(sample)
+
+    return [{
+        "name": "api_startup",
+        "params": {"entry_point": "app"},
+        "metrics": {
+            "seconds": statistics.median(s["seconds"] for s in samples),
+            "process_seconds": statistics.median(s["process_seconds"] for s in samples),
+            "rss_bytes": int(statistics.median(s["rss_bytes"] for s in samples)),
+            "modules": samples[-1]["modules"],
+            "heavy_modules": samples[-1]["heavy_modules"],
+        },
+    }]
+
+
+def bench_pdfs(min_time: float) -> list[dict]:
+    try:
+        from src.pdf_extractor import iter_pdf_pages, iter_pdf_pages_parallel, get_pdf_page_count
+    except ImportError as e:
+        print(f"Skipping PDF benchmarks (PyMuPDF not available: {e})")
+        return []
+
+    results = []
+    for pdf_path in sorted(INPUTS_DIR.glob("*.pdf")):
+        pages = get_pdf_page_count(pdf_path)
+        for mode, extract in (
+            ("serial", lambda: sum(1 for _ in iter_pdf_pages(pdf_path))),
+            ("parallel", lambda: sum(1 for _ in iter_pdf_pages_parallel(pdf_path))),
+        ):
+            seconds = time_call(extract, min_time, rounds=3)
+            results.append({
+                "name": "pdf_extract",
+                "params": {"file": pdf_path.name, "mode": mode},
+                "metrics": {
+                    "seconds": seconds,
+                    "pages": pages,
+                    "pages_per_sec": pages / seconds,
+                    "file_bytes": pdf_path.stat().st_size,
+                },
+            })
+    return results
+
+
+def environment_info() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=backend_dir,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def compare(results: list[dict], baseline_path: Path) -> None:
+    """Prints time ratios (current / baseline) for benchmarks present in both runs."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def key(r):
+        return r["name"], json.dumps(r["params"], sort_keys=True)
+
+    old = {key(r): r for r in baseline.get("results", [])}
+    print(f"\n--- Compared with {baseline_path} (commit {baseline.get('environment', {}).get('commit')}) ---")
+    for r in results:
+        before = old.get(key(r))
+        if before is None:
+            continue
+        ratio = r["metrics"]["seconds"] / before["metrics"]["seconds"]
+        verdict = "faster" if ratio < 0.95 else "slower" if ratio > 1.05 else "same"
+        print(f"{r['name']:<22} {json.dumps(r['params']):<55} x{ratio:6.2f}  {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CivicSense microbenchmarks.")
+    parser.add_argument("--manifestos", type=int, nargs="+", help="Manifesto counts to test.")
+    parser.add_argument("--questions", type=int, nargs="+", help="Question counts to test.")
+    parser.add_argument("--quick", action="store_true", help="Small scales only (for a fast check).")
+    parser.add_argument("--min-time", type=float, default=0.3, help="Seconds spent timing each benchmark.")
+    parser.add_argument("--skip-pdf", action="store_true", help="Skip PDF extraction benchmarks.")
+    parser.add_argument("--skip-startup", action="store_true", help="Skip the API cold start benchmark.")
+    parser.add_argument("--output", type=Path, help="Write the JSON results here (default: stdout).")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON results to compare against.")
+    args = parser.parse_args()
+
+    manifesto_scales = args.manifestos or (QUICK_MANIFESTO_SCALES if args.quick else DEFAULT_MANIFESTO_SCALES)
+    question_scales = args.questions or (QUICK_QUESTION_SCALES if args.quick else DEFAULT_QUESTION_SCALES)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_manifestos in manifesto_scales:
+            for num_questions in question_scales:
+                print(f"Benchmarking {num_manifestos} manifestos x {num_questions} questions...", file=sys.stderr)
+                work_dir = Path(tmp) / f"m{num_manifestos}_q{num_questions}"
+                results.extend(bench_dataset(num_manifestos, num_questions, work_dir, args.min_time))
+
+    if not args.skip_startup:
+        print("Benchmarking API startup...", file=sys.stderr)
+        results.extend(bench_startup())
+
+    if not args.skip_pdf:
+        print("Benchmarking PDF extraction...", file=sys.stderr)
+        results.extend(bench_pdfs(args.min_time))
+
+    report = {"environment": environment_info(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# backend/benchmarks/synthetic_data.py
+
+import argparse
+import json
+import random
+from pathlib import Path
+import sys
+
+# --- Add backend directory to path ---
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+# ------------------------------------
+
+from src.manifesto_analyzer import POLICY_TAGS
+
+# --- Synthetic Dataset Generator ---
+# Produces qq.json / manifestos.json files with the same shape as the real
+# ones, at any scale, so benchmarks run offline and reproducibly.
+
+OPTIONS = {
+    "1": "Strongly Disagree",
+    "2": "Disagree",
+    "3": "Neutral",
+    "4": "Agree",
+    "5": "Strongly Agree"
+}
+
+_WORDS = (
+    "government people development national policy support public growth "
+    "farmers women youth rights welfare investment reform security access "
+    "schools health jobs climate energy roads digital justice trade"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def generate_questions(num_questions: int, seed: int = 0) -> list[dict]:
+    """Quiz questions cycling through POLICY_TAGS (like 2_generate_quiz.py)."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i + 1,
+            "question": _sentence(rng, 10).rstrip(".") + "?",
+            "tag": POLICY_TAGS[i % len(POLICY_TAGS)],
+            "options": OPTIONS
+        }
+        for i in range(num_questions)
+    ]
+
+
+def generate_manifestos(num_manifestos: int, seed: int = 0, missing_rate: float = 0.05) -> list[dict]:
+    """
+    Manifestos with random 1-5 scores. A few tags are left out at random
+    (missing_rate) to exercise the Neutral default.
+    """
+    rng = random.Random(seed)
+    manifestos = []
+    for i in range(num_manifestos):
+        policy_scores = {
+            tag: {"score": rng.randint(1, 5), "explanation": _sentence(rng, 16)}
+            for tag in POLICY_TAGS
+            if rng.random() >= missing_rate
+        }
+        manifestos.append({
+            "id": i + 1,
+            "name": f"Synthetic Party {i + 1}",
+            "analysis": {
+                "summary": " ".join(_sentence(rng, 20) for _ in range(3)),
+                "policy_scores": policy_scores
+            }
+        })
+    return manifestos
+
+
+def generate_answers(num_vectors: int, num_questions: int, seed: int = 0) -> list[list[int]]:
+    """Random user answer vectors (integers 1-5)."""
+    rng = random.Random(seed)
+    return [[rng.randint(1, 5) for _ in range(num_questions)] for _ in range(num_vectors)]
+
+
+def write_dataset(out_dir, num_manifestos: int, num_questions: int, seed: int = 0):
+    """Writes qq.json and manifestos.json into out_dir. Returns both paths."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    quiz_path = out_dir / "qq.json"
+    manifestos_path = out_dir / "manifestos.json"
+    with open(quiz_path, "w", encoding="utf-8") as f:
+        json.dump(generate_questions(num_questions, seed), f, ensure_ascii=False, indent=4)
+    with open(manifestos_path, "w", encoding="utf-8") as f:
+        json.dump(generate_manifestos(num_manifestos, seed), f, ensure_ascii=False, indent=4)
+    return quiz_path, manifestos_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic qq.json / manifestos.json pair.")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--manifestos", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    quiz_path, manifestos_path = write_dataset(args.out_dir, args.manifestos, args.questions, args.seed)
+    print(f"Wrote {quiz_path} and {manifestos_path}")
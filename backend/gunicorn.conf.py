@@ -0,0 +1,53 @@
+# backend/gunicorn.conf.py
+
+import gc
+import multiprocessing
+import os
+
+# --- Production Server Configuration ---
+# Run from the backend directory with:
+#
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# The app (and the quiz / manifesto dataset, see app.py) is loaded once in
+# the master process before the workers are forked, so every worker starts
+# instantly and shares the parsed dataset pages copy-on-write.
+#
+# Every setting can be overridden with an environment variable:
+#   CIVICSENSE_BIND      address to listen on       (default 0.0.0.0:5000)
+#   CIVICSENSE_WORKERS   worker processes           (default 2 x CPUs + 1)
+#   CIVICSENSE_THREADS   threads per worker         (default 4)
+#   CIVICSENSE_TIMEOUT   seconds before a stuck worker is restarted (default 30)
+#
+# Graceful restarts:
+#   kill -HUP <master pid>    start new workers, then stop the old ones once
+#                             their in-flight requests finish. Data files are
+#                             picked up without this: the dataset reloads
+#                             itself when qq.json / manifestos.json change.
+#   kill -USR2 <master pid>   start a new master (needed to load new code,
+#                             since the app is preloaded), then send QUIT to
+#                             the old master.
+
+bind = os.getenv("CIVICSENSE_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("CIVICSENSE_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("CIVICSENSE_THREADS", 4))
+worker_class = "gthread"  # threads per worker; endpoints are short and CPU-light
+timeout = int(os.getenv("CIVICSENSE_TIMEOUT", 30))
+graceful_timeout = 30  # seconds old workers get to finish requests on restart
+keepalive = 5
+
+# Load app.py (and warm the dataset) in the master, then fork
+preload_app = True
+
+# Recycle workers now and then to cap memory growth from caches
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = os.getenv("CIVICSENSE_ACCESS_LOG")  # e.g. "-" for stdout; off by default
+errorlog = "-"
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the garbage collector's reach, so
+    # collections in the workers don't touch (and un-share) their pages.
+    gc.freeze()
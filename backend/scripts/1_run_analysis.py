@@ -2,6 +2,11 @@
 
 import os
 import json
+import hashlib
+import time
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 import sys
 
@@ -16,125 +21,593 @@ load_dotenv(dotenv_path=backend_dir / ".env")
 # ------------------------
 
 # Now we can import from our 'src' package
-from src import (
-    extract_text_from_pdf,
-    LLMClient,
-    build_analysis_prompt,
-    parse_llm_output
-)
+from src import LLMClient
+from src.llm_client import API_KEY_ENV_VARS
+from src.text_condenser import CONDENSE_MODES, extract_condensed, score_drift
+from src.chunked_analyzer import analyze_manifesto, MAX_SINGLE_PROMPT_TOKENS, CHUNK_TOKENS
+from src.rate_limit import RateLimiter, call_with_retries
+from src.storage import atomic_write_json, atomic_write_bytes, json_bytes, file_sha256
+from src.compiled_snapshot import CompiledSnapshot, compile_snapshot, compile_json_file, snapshot_path_for
+from src.metrics import RunReport, timed_call
 
 # --- Configuration ---
 INPUTS_DIR = backend_dir / "inputs"
 DATA_DIR = backend_dir / "data"
 OUTPUT_NAME = "manifestos.json" # The name of our final data file
+INPUTS_MANIFEST_NAME = "manifestos.inputs.json" # Hashes + IDs of the analyzed PDFs
 
 # Ensure the data directory exists
 DATA_DIR.mkdir(exist_ok=True)
 output_path = DATA_DIR / OUTPUT_NAME
+inputs_manifest_path = DATA_DIR / INPUTS_MANIFEST_NAME
+snapshot_path = snapshot_path_for(output_path) # Compiled, memory-mappable copy for the API
+# With --election NAME: reads inputs/NAME/ and writes data/elections/NAME/
+ELECTIONS_DIR = DATA_DIR / "elections"
 
 # --- LLM Provider Configuration ---
-# Change this to "google", "openai", or "anthropic"
+# Change this to "google", "openai", or "anthropic" (or pass --provider).
+# "local" runs fully offline (synthetic or replayed responses), for load tests.
 PROVIDER = "google"
-API_KEY_NAME = "GOOGLE_API_KEY" # Must match PROVIDER
+API_KEY_NAMES = API_KEY_ENV_VARS # Provider -> API key variable in .env
+MODEL = None # None = provider default (see DEFAULT_MODELS in src/llm_client.py)
+LLM_TIMEOUT = 300.0 # Seconds per LLM request
+# ------------------------------------
+
+# --- Concurrency Configuration ---
+LLM_WORKERS = 4        # LLM calls in flight at once
+EXTRACT_WORKERS = 2    # Processes used for PDF text extraction
+LLM_RETRIES = 4        # Retries per manifesto for rate limits / transient errors
+REQUESTS_PER_MINUTE = None  # None = provider default (see src/rate_limit.py)
+# ------------------------------------
+
+# --- Long Manifestos ---
+# Prompts larger than this are analyzed in chunks (map-reduce), see src/chunked_analyzer.py
+MAX_PROMPT_TOKENS = MAX_SINGLE_PROMPT_TOKENS
+ANALYSIS_CHUNK_TOKENS = CHUNK_TOKENS
+# ------------------------------------
+
+# --- Text Condensation (see src/text_condenser.py) ---
+# "clean" strips page numbers, running headers/footers, tables of contents
+# and duplicated blocks before the text goes into the prompt; "relevant"
+# also drops passages that match none of the POLICY_TAGS keyword lists;
+# "off" sends the extracted text unchanged. Check that scores don't drift
+# with --drift-check (analyzes the raw text as well and compares).
+CONDENSE_MODE = "clean"
+# ------------------------------------
+
+# --- LLM Response Cache (opt-in with --cache) ---
+LLM_CACHE_DIR = backend_dir / ".cache" / "llm"
+LLM_CACHE_MAX_MB = 512
+# ------------------------------------
+
+# --- Extracted Text Cache (on by default, disable with --no-extract-cache) ---
+EXTRACTION_CACHE_DIR = backend_dir / ".cache" / "extraction"
+# ------------------------------------
+
+# --- Run Report ---
+# Per-manifesto stage timings (extraction, prompt size, LLM latency, parse
+# time) are written here after every run, see src/metrics.py RunReport.
+REPORTS_DIR = backend_dir / "reports"
 # ------------------------------------
 
 
-def run_analysis_for_all_pdfs():
+def clean_manifesto_name(pdf_path: Path) -> str:
+    # e.g., "cong_manifesto_2024.pdf" -> "Cong Manifesto 2024"
+    return pdf_path.stem.replace("_", " ").replace("-", " ").title()
+
+
+def analyze_text(llm: LLMClient, limiter: RateLimiter, pdf_name: str, manifesto_text: str,
+                 max_prompt_tokens: int = MAX_PROMPT_TOKENS,
+                 chunk_tokens: int = ANALYSIS_CHUNK_TOKENS,
+                 report: RunReport = None, llm_slots: threading.Semaphore = None,
+                 llm_workers: int = LLM_WORKERS) -> dict:
+    """
+    Analyzes one manifesto's text with the LLM (rate limited, with retries).
+    Long texts are split into chunks and merged automatically.
+    Runs in a worker thread; raises on failure.
+
+    llm_slots: semaphore shared by every analysis of the run. Each LLM call
+               holds a slot, so chunked analyses fanning out into their own
+               threads still keep at most llm_workers calls in flight.
+    """
+    report = report or RunReport()
+
+    def log(message):
+        print(f"[{pdf_name}] {message}")
+
+    def record(**fields):
+        report.record(pdf_name, **fields)
+
+    def log_retry(attempt, error, delay):
+        record(llm_retries=1)
+        log(f"LLM call failed ({error}); retry {attempt}/{LLM_RETRIES} in {delay:.1f}s")
+
+    def timed_generate(prompt):
+        # Only the call itself; rate limiter waits and retry backoff are excluded
+        if llm_slots is None:
+            llm_output, seconds = timed_call(llm.generate, prompt)
+        else:
+            with llm_slots:
+                llm_output, seconds = timed_call(llm.generate, prompt)
+        record(llm_calls=1, llm_seconds=seconds, response_chars=len(llm_output))
+        return llm_output
+
+    def generate(prompt):
+        llm_output = call_with_retries(
+            timed_generate, prompt,
+            limiter=limiter, retries=LLM_RETRIES, on_retry=log_retry
+        )
+        log("LLM response received.")
+        return llm_output
+
+    log("Calling the LLM. This may take a few moments...")
+    start = time.perf_counter()
+    try:
+        return analyze_manifesto(
+            manifesto_text, generate,
+            max_prompt_tokens=max_prompt_tokens,
+            chunk_tokens=chunk_tokens,
+            workers=llm_workers,
+            log=log,
+            record=record
+        )
+    finally:
+        record(analysis_seconds=time.perf_counter() - start)
+
+
+def load_previous_run():
+    """
+    Returns (inputs_manifest, {id: manifesto}) from the last run.
+    The inputs manifest looks like:
+        {"next_id": 5, "files": {"cong.pdf": {"sha256": "...", "size": 123, "id": 2}}}
+    """
+    manifest = {"next_id": 1, "files": {}}
+    previous = {}
+    try:
+        with open(inputs_manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        pass
+    except json.JSONDecodeError:
+        print(f"Warning: Could not decode {inputs_manifest_path}; re-analyzing everything.")
+    try:
+        with open(output_path, "r", encoding="utf-8") as f:
+            previous = {m["id"]: m for m in json.load(f)}
+    except FileNotFoundError:
+        pass
+    except (json.JSONDecodeError, KeyError, TypeError):
+        print(f"Warning: Could not decode {output_path}; re-analyzing everything.")
+    return manifest, previous
+
+
+def plan_analysis(pdf_files: list, manifest: dict, previous: dict, full: bool = False):
+    """
+    Decides what to do with each PDF, comparing content hashes with the
+    last run. Returns (entries, to_process, removed, next_id) where
+    entries[i] = {"sha256", "size", "id"} for pdf_files[i].
+
+    - unchanged PDFs keep their ID and reuse their existing analysis
+    - new or modified PDFs are (re-)analyzed; modified ones keep their ID
+    - IDs are never reused, so removing a PDF never renumbers the others
+    """
+    files = manifest.get("files", {})
+    next_id = max(
+        [manifest.get("next_id", 1)] + [m_id + 1 for m_id in previous]
+    )
+
+    # First run with an existing manifestos.json but no inputs manifest:
+    # adopt the IDs of entries whose names match our PDFs.
+    ids_by_name = {}
+    if not files:
+        ids_by_name = {m.get("name"): m_id for m_id, m in previous.items()}
+
+    entries, to_process = [], []
+    for i, pdf_path in enumerate(pdf_files):
+        old = files.get(pdf_path.name)
+        entry = {"sha256": file_sha256(pdf_path), "size": pdf_path.stat().st_size}
+
+        if old is not None:
+            entry["id"] = old["id"]
+        elif clean_manifesto_name(pdf_path) in ids_by_name:
+            entry["id"] = ids_by_name[clean_manifesto_name(pdf_path)]
+        else:
+            entry["id"] = next_id
+            next_id += 1
+
+        unchanged = (
+            old is not None
+            and old.get("sha256") == entry["sha256"]
+            and entry["id"] in previous
+        )
+        if full or not unchanged:
+            to_process.append(i)
+        entries.append(entry)
+
+    kept_ids = {entry["id"] for entry in entries}
+    removed = sorted(m_id for m_id in previous if m_id not in kept_ids)
+    return entries, to_process, removed, next_id
+
+
+def save_manifestos(all_manifesto_data: list) -> None:
+    """
+    Writes the compiled snapshot and then manifestos.json, both atomically.
+    The snapshot goes first: it records the JSON's hash, so when the API sees
+    the new JSON, the matching snapshot is already in place.
+    """
+    raw = json_bytes(all_manifesto_data)
+    atomic_write_bytes(snapshot_path, compile_snapshot(all_manifesto_data, hashlib.sha256(raw).hexdigest()))
+    atomic_write_bytes(output_path, raw)
+
+
+def ensure_compiled_snapshot() -> None:
+    """(Re)compiles the snapshot if it is missing or doesn't match manifestos.json."""
+    try:
+        if CompiledSnapshot.read_source_sha256(snapshot_path) == file_sha256(output_path):
+            return
+    except (OSError, ValueError):
+        pass
+    try:
+        atomic_write_bytes(snapshot_path, compile_json_file(output_path))
+        print(f"Compiled snapshot written to: {snapshot_path}")
+    except Exception as e:
+        print(f"Warning: Could not compile snapshot: {e}")
+
+
+def write_run_report(report: RunReport, report_path, run_start: float, summary: dict) -> None:
+    """Writes the run report (default: reports/analysis-<timestamp>.json) and the total time."""
+    if report_path is None:
+        report_path = REPORTS_DIR / time.strftime("analysis-%Y%m%d-%H%M%S.json")
+    try:
+        atomic_write_json(report_path, report.to_dict(**summary), indent=2)
+        print(f"Run report written to: {report_path}")
+    except Exception as e:
+        print(f"Warning: Could not write run report: {e}")
+    print(f"Total time: {time.perf_counter() - run_start:.2f}s")
+
+
+def run_analysis_for_all_pdfs(llm_workers: int = LLM_WORKERS,
+                              extract_workers: int = EXTRACT_WORKERS,
+                              requests_per_minute: float = REQUESTS_PER_MINUTE,
+                              cache_dir=None,
+                              refresh_cache: bool = False,
+                              cache_max_mb: float = LLM_CACHE_MAX_MB,
+                              full: bool = False,
+                              max_prompt_tokens: int = MAX_PROMPT_TOKENS,
+                              chunk_tokens: int = ANALYSIS_CHUNK_TOKENS,
+                              model: str = MODEL,
+                              timeout: float = LLM_TIMEOUT,
+                              extract_cache_dir=EXTRACTION_CACHE_DIR,
+                              provider: str = PROVIDER,
+                              provider_options: dict = None,
+                              report_path=None,
+                              condense_mode: str = CONDENSE_MODE,
+                              drift_check: bool = False):
     """
     Main function to find all PDFs, analyze them, and save as one JSON.
+
+    Runs incrementally: a manifest of input hashes is kept next to the
+    output, and only new or changed PDFs are analyzed (full=True redoes
+    everything). IDs stay stable across runs and the output is replaced
+    atomically, so the running API never reads a half-written file.
+
+    PDFs are extracted in a process pool; as soon as a text is ready its LLM
+    call is started on a thread pool, under a shared rate limiter.
+
+    With cache_dir set, LLM responses are cached on disk: re-running with
+    unchanged prompts makes no API calls (refresh_cache forces new calls).
+
+    A run report with per-manifesto stage timings is written to report_path
+    (default: reports/analysis-<timestamp>.json).
+
+    Extracted text is condensed (condense_mode) before analysis. With
+    drift_check, the raw text is analyzed too and the per-tag score
+    differences are added to the report.
     """
     print("--- Starting Manifesto Analysis Pipeline ---")
-    
+    run_start = time.perf_counter()
+    report = RunReport()
+
     # === Step 1: Get API Key ===
-    api_key = os.getenv(API_KEY_NAME) 
-    if not api_key:
+    api_key_name = API_KEY_NAMES.get(provider)
+    api_key = os.getenv(api_key_name) if api_key_name else None
+    if api_key_name and not api_key:
         raise EnvironmentError(
-            f"Please set your API key in the .env file (e.g., {API_KEY_NAME})"
+            f"Please set your API key in the .env file (e.g., {api_key_name})"
         )
-    
+
     # === Step 2: Initialize LLM client ===
     try:
-        llm = LLMClient(provider=PROVIDER, api_key=api_key)
-        print(f"LLM client initialized (provider: {PROVIDER}).")
+        llm = LLMClient(
+            provider=provider,
+            api_key=api_key,
+            model=model,
+            timeout=timeout,
+            cache_dir=cache_dir,
+            cache_max_bytes=int(cache_max_mb * 1024 * 1024),
+            refresh_cache=refresh_cache,
+            provider_options=provider_options
+        )
+        limiter = RateLimiter.for_provider(provider, requests_per_minute)
+        print(f"LLM client initialized (provider: {provider}, model: {llm.model_name}).")
+        if cache_dir:
+            print(f"LLM response cache: {cache_dir}" + (" (refreshing)" if refresh_cache else ""))
     except Exception as e:
         print(f"Error initializing LLM client: {e}")
         return
 
-    # === Step 3: Find all PDFs in the inputs directory ===
-    pdf_files = list(INPUTS_DIR.glob("*.pdf"))
+    # === Step 3: Find all PDFs and work out what changed since last run ===
+    # Sorted, so the output order doesn't depend on the filesystem
+    pdf_files = sorted(INPUTS_DIR.glob("*.pdf"), key=lambda p: p.name)
     if not pdf_files:
         print(f"Error: No PDF files found in {INPUTS_DIR}")
         return
-        
-    print(f"Found {len(pdf_files)} PDF(s) to analyze.")
 
-    # This list will hold all our final manifesto data
+    manifest, previous = load_previous_run()
+    entries, to_process, removed, next_id = plan_analysis(pdf_files, manifest, previous, full)
+
+    print(f"Found {len(pdf_files)} PDF(s): {len(to_process)} to analyze, "
+          f"{len(pdf_files) - len(to_process)} unchanged, {len(removed)} removed.")
+    if to_process:
+        print(f"Using {extract_workers} extraction process(es), {llm_workers} LLM worker(s), "
+              f"condense mode: {condense_mode}.")
+    drift_check = drift_check and condense_mode != "off"
+
+    analyses = {}   # pdf index -> analysis dict
+    failures = {}   # pdf name -> error message
+    drifts = {}     # pdf name -> score_drift() result (drift_check only)
+
+    # === Step 4: Extract (processes) and analyze (threads) concurrently ===
+    # Chunk calls of long manifestos run in extra threads; this shared
+    # semaphore is what caps the LLM calls in flight at llm_workers.
+    llm_slots = threading.BoundedSemaphore(llm_workers)
+    if to_process:
+        with ProcessPoolExecutor(max_workers=extract_workers) as extract_pool, \
+             ThreadPoolExecutor(max_workers=llm_workers) as llm_pool:
+
+            extract_futures = {
+                extract_pool.submit(
+                    timed_call, extract_condensed, str(pdf_files[i]), extract_cache_dir, 1, condense_mode
+                ): i
+                for i in to_process
+            }
+            llm_futures = {}
+            raw_futures = {}  # drift_check: analyses of the uncondensed text
+            drift_report = RunReport()  # Keeps the extra calls out of the main report
+
+            # 4a. Extract text; hand each text to the LLM pool as soon as it's ready
+            for future in as_completed(extract_futures):
+                i = extract_futures[future]
+                pdf_name = pdf_files[i].name
+                try:
+                    (raw_text, manifesto_text, condense_stats), seconds = future.result()
+                    report.record(
+                        pdf_name, extraction_seconds=seconds, text_chars=len(raw_text),
+                        condensed_chars=condense_stats["chars_after"],
+                        text_tokens=condense_stats["tokens_before"],
+                        condensed_tokens=condense_stats["tokens_after"],
+                        **{f"condense_{rule}": count for rule, count in condense_stats["removed"].items()}
+                    )
+                    print(f"Successfully extracted text from {pdf_name} "
+                          f"(~{condense_stats['tokens_before']} -> ~{condense_stats['tokens_after']} tokens).")
+                except Exception as e:
+                    print(f"Error extracting PDF {pdf_name}: {e}")
+                    failures[pdf_name] = f"extraction: {e}"
+                    continue
+                llm_futures[llm_pool.submit(
+                    analyze_text, llm, limiter, pdf_name, manifesto_text,
+                    max_prompt_tokens, chunk_tokens, report, llm_slots, llm_workers
+                )] = i
+                if drift_check:
+                    raw_futures[i] = llm_pool.submit(
+                        analyze_text, llm, limiter, f"{pdf_name} (raw)", raw_text,
+                        max_prompt_tokens, chunk_tokens, drift_report, llm_slots, llm_workers
+                    )
+
+            # 4b. Collect LLM analyses as they finish
+            for future in as_completed(llm_futures):
+                i = llm_futures[future]
+                pdf_name = pdf_files[i].name
+                try:
+                    analyses[i] = future.result()
+                    report.record(pdf_name, status="ok")
+                    print(f"[{pdf_name}] LLM output parsed successfully.")
+                except Exception as e:
+                    print(f"[{pdf_name}] Error during LLM analysis: {e}")
+                    failures[pdf_name] = f"analysis: {e}"
+
+            # 4c. Drift check: compare against the analysis of the raw text
+            for i, future in raw_futures.items():
+                pdf_name = pdf_files[i].name
+                if i not in analyses:
+                    continue
+                try:
+                    drift = drifts[pdf_name] = score_drift(analyses[i], future.result())
+                except Exception as e:
+                    print(f"[{pdf_name}] Drift check failed: {e}")
+                    continue
+                report.record(pdf_name, drift_max=drift["max_abs"],
+                              drift_tags_changed=len(drift["tags_changed"]),
+                              drift_scores=drift["diffs"])
+
+    for pdf_name, error in failures.items():
+        report.record(pdf_name, status="failed", error=error)
+
+    if failures:
+        print(f"\n--- {len(failures)} manifesto(s) failed ---")
+        for pdf_name, error in sorted(failures.items()):
+            print(f"  {pdf_name}: {error}")
+
+    # === Step 5: Merge new and reused analyses in filename order ===
     all_manifesto_data = []
-    manifesto_id_counter = 1
+    manifest_files = {}
+    for i, pdf_path in enumerate(pdf_files):
+        entry = entries[i]
+        if i in analyses:
+            analysis = analyses[i]
+            manifest_files[pdf_path.name] = entry
+        elif entry["id"] in previous:
+            # Unchanged (or failed this time: keep serving the last good analysis)
+            analysis = previous[entry["id"]]["analysis"]
+            if i not in to_process:
+                manifest_files[pdf_path.name] = entry
+            elif pdf_path.name in manifest.get("files", {}):
+                # Keep the old hash so the next run retries this PDF
+                manifest_files[pdf_path.name] = manifest["files"][pdf_path.name]
+        else:
+            continue  # New PDF that failed; retried next run
 
-    # === Step 4: Loop through each PDF and analyze it ===
-    for pdf_path in pdf_files:
-        print(f"\n--- Analyzing: {pdf_path.name} ---")
-        
-        # 4a. Extract text
-        try:
-            manifesto_text = extract_text_from_pdf(pdf_path)
-            print(f"Successfully extracted text from {pdf_path.name}.")
-        except Exception as e:
-            print(f"Error extracting PDF: {e}")
-            continue # Skip to the next file
-
-        # 4b. Build Prompt and Call LLM
-        print("Building analysis prompt...")
-        prompt = build_analysis_prompt(manifesto_text)
-        
-        print("Calling the LLM. This may take a few moments...")
-        try:
-            llm_output = llm.generate(prompt)
-            print("LLM response received.")
-        except Exception as e:
-            print(f"Error during LLM generation: {e}")
-            continue # Skip to the next file
+        all_manifesto_data.append({
+            "id": entry["id"],
+            "name": clean_manifesto_name(pdf_path),
+            "analysis": analysis
+        })
 
-        # 4c. Parse Output
-        try:
-            analysis_data = parse_llm_output(llm_output)
-            print("LLM output parsed successfully.")
-            
-            # 4d. Create a clean name from the filename
-            # e.g., "cong_manifesto_2024.pdf" -> "Cong Manifesto 2024"
-            clean_name = pdf_path.stem.replace("_", " ").replace("-", " ").title()
-            
-            # 4e. Add to our master list
-            all_manifesto_data.append({
-                "id": manifesto_id_counter,
-                "name": clean_name,
-                "analysis": analysis_data
-            })
-            
-            manifesto_id_counter += 1
-            
-        except Exception as e:
-            print(f"Error parsing or saving JSON: {e}")
-            print(f"--- Raw LLM Output ---\n{llm_output}\n---------------------")
-            continue # Skip to the next file
+    run_summary = dict(
+        provider=provider,
+        model=llm.model_name,
+        pdfs_found=len(pdf_files),
+        analyzed=len(analyses),
+        reused=len(all_manifesto_data) - len(analyses),
+        failed=len(failures),
+        pruned=len(removed),
+        llm_cache=llm.cache.stats() if llm.cache is not None else None,
+        condense_mode=condense_mode,
+        drift_check=drift_check,
+    )
 
-    # === Step 5: Save all data to a single file ===
+    # === Step 6: Save all data atomically ===
     if not all_manifesto_data:
         print("No manifestos were successfully analyzed. Exiting.")
+        # The report is most useful exactly when everything failed
+        write_run_report(report, report_path, run_start, run_summary)
         return
-        
+
     print(f"\n--- Analysis Complete! ---")
-    print(f"Successfully analyzed {len(all_manifesto_data)} manifestos.")
-    
-    try:
-        print(f"Saving all analyses to: {output_path}")
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(all_manifesto_data, f, ensure_ascii=False, indent=4)
-        print("Data saved successfully.")
-    except Exception as e:
-        print(f"Fatal error saving final JSON: {e}")
+    print(f"Analyzed {len(analyses)} manifesto(s), reused {len(all_manifesto_data) - len(analyses)}, "
+          f"pruned {len(removed)}.")
+
+    if not analyses and not removed and manifest.get("files") == manifest_files:
+        print("Nothing changed; output left untouched.")
+        ensure_compiled_snapshot()
+    else:
+        try:
+            print(f"Saving all analyses to: {output_path} (+ {snapshot_path.name})")
+            save_manifestos(all_manifesto_data)
+            # Written after the output: if we crash in between, the next run
+            # just re-analyzes the PDFs whose hashes were not recorded yet.
+            atomic_write_json(inputs_manifest_path, {"next_id": next_id, "files": manifest_files})
+            print("Data saved successfully.")
+        except Exception as e:
+            print(f"Fatal error saving final JSON: {e}")
 
+    if llm.cache is not None:
+        stats = llm.cache.stats()
+        print(f"LLM cache: {stats['hits']} hit(s), {stats['misses']} miss(es).")
+    if provider == "local":
+        print(f"Local provider: {llm.client.stats}")
+    repairs = [fields for fields in report.items().values() if fields.get("repairs")]
+    if repairs:
+        print(f"Output repairs: {sum(f['repairs'] for f in repairs)} small prompt(s) for "
+              f"{sum(f['repaired_fields'] for f in repairs)} field(s) in {len(repairs)} manifesto(s), "
+              f"~{sum(f['tokens_saved'] for f in repairs)} tokens saved vs. full re-runs.")
+
+    if drifts:
+        print("\n--- Score drift (condensed vs. raw text) ---")
+        for pdf_name, drift in sorted(drifts.items()):
+            changed = ", ".join(f"{tag} {drift['diffs'][tag]:+g}" for tag in drift["tags_changed"]) or "none"
+            print(f"  {pdf_name}: max |diff| {drift['max_abs']}, changed: {changed}")
+
+    # === Step 7: Write the run report ===
+    write_run_report(report, report_path, run_start, run_summary)
 
 if __name__ == "__main__":
-    run_analysis_for_all_pdfs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Analyze all manifesto PDFs in backend/inputs.")
+    parser.add_argument("--workers", type=int, default=LLM_WORKERS,
+                        help="Number of concurrent LLM calls.")
+    parser.add_argument("--extract-workers", type=int, default=EXTRACT_WORKERS,
+                        help="Number of PDF extraction processes.")
+    parser.add_argument("--rpm", type=float, default=REQUESTS_PER_MINUTE,
+                        help="LLM requests per minute (default: provider limit).")
+    parser.add_argument("--cache", action="store_true",
+                        help=f"Cache LLM responses on disk (in {LLM_CACHE_DIR}).")
+    parser.add_argument("--cache-dir", type=Path, default=None,
+                        help="Cache LLM responses in this directory (implies --cache).")
+    parser.add_argument("--refresh-cache", action="store_true",
+                        help="Ignore cached LLM responses and overwrite them.")
+    parser.add_argument("--cache-max-mb", type=float, default=LLM_CACHE_MAX_MB,
+                        help="Evict least recently used responses beyond this size.")
+    parser.add_argument("--provider", default=PROVIDER, choices=sorted(API_KEY_NAMES),
+                        help="LLM provider ('local' = offline, no API key).")
+    parser.add_argument("--local-replay-dir", type=Path, default=None,
+                        help="[local] Replay responses recorded in this LLM cache directory.")
+    parser.add_argument("--local-latency", default="lognormal:2.0:0.5",
+                        help="[local] Latency distribution, e.g. 'fixed:1', 'uniform:0.5:3', 'lognormal:2:0.5'.")
+    parser.add_argument("--local-error-rate", type=float, default=0.0,
+                        help="[local] Fraction of calls failing with a simulated 5xx.")
+    parser.add_argument("--local-rate-limit-rate", type=float, default=0.0,
+                        help="[local] Fraction of calls failing with a simulated 429.")
+    parser.add_argument("--local-rpm-limit", type=float, default=None,
+                        help="[local] Simulated server quota in requests per minute.")
+    parser.add_argument("--local-malformed-rate", type=float, default=0.0,
+                        help="[local] Fraction of responses cut short (exercises output repair).")
+    parser.add_argument("--local-seed", type=int, default=None,
+                        help="[local] Random seed for reproducible runs.")
+    parser.add_argument("--model", default=MODEL,
+                        help="LLM model name (default: provider default).")
+    parser.add_argument("--timeout", type=float, default=LLM_TIMEOUT,
+                        help="Timeout in seconds for each LLM request.")
+    parser.add_argument("--no-extract-cache", action="store_true",
+                        help=f"Always re-extract PDF text instead of using {EXTRACTION_CACHE_DIR}.")
+    parser.add_argument("--report", type=Path, default=None,
+                        help="Where to write the run report (default: reports/analysis-<timestamp>.json).")
+    parser.add_argument("--condense", default=CONDENSE_MODE, choices=CONDENSE_MODES,
+                        help="Condense extracted text before analysis (default: %(default)s)")
+    parser.add_argument("--drift-check", action="store_true",
+                        help="Also analyze the uncondensed text and report per-tag score differences")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-analyze every PDF, even unchanged ones.")
+    parser.add_argument("--max-prompt-tokens", type=int, default=MAX_PROMPT_TOKENS,
+                        help="Analyze manifestos in chunks when the prompt is estimated above this.")
+    parser.add_argument("--chunk-tokens", type=int, default=ANALYSIS_CHUNK_TOKENS,
+                        help="Approximate size of each chunk in chunked mode.")
+    parser.add_argument("--election", default=None,
+                        help="Analyze inputs/ELECTION/ into data/elections/ELECTION/ instead of the default election.")
+    args = parser.parse_args()
+
+    if args.election:
+        INPUTS_DIR = INPUTS_DIR / args.election
+        election_dir = ELECTIONS_DIR / args.election
+        election_dir.mkdir(parents=True, exist_ok=True)
+        output_path = election_dir / OUTPUT_NAME
+        inputs_manifest_path = election_dir / INPUTS_MANIFEST_NAME
+        snapshot_path = snapshot_path_for(output_path)
+
+    cache_dir = args.cache_dir or (LLM_CACHE_DIR if args.cache or args.refresh_cache else None)
+
+    run_analysis_for_all_pdfs(
+        llm_workers=args.workers,
+        extract_workers=args.extract_workers,
+        requests_per_minute=args.rpm,
+        cache_dir=cache_dir,
+        refresh_cache=args.refresh_cache,
+        cache_max_mb=args.cache_max_mb,
+        full=args.full,
+        max_prompt_tokens=args.max_prompt_tokens,
+        chunk_tokens=args.chunk_tokens,
+        model=args.model,
+        timeout=args.timeout,
+        extract_cache_dir=None if args.no_extract_cache else EXTRACTION_CACHE_DIR,
+        provider=args.provider,
+        provider_options={
+            "replay_dir": args.local_replay_dir,
+            "latency": args.local_latency,
+            "error_rate": args.local_error_rate,
+            "rate_limit_rate": args.local_rate_limit_rate,
+            "rpm_limit": args.local_rpm_limit,
+            "malformed_rate": args.local_malformed_rate,
+            "seed": args.local_seed,
+        } if args.provider == "local" else None,
+        report_path=args.report,
+        condense_mode=args.condense,
+        drift_check=args.drift_check
+    )
@@ -0,0 +1,207 @@
+# backend/scripts/score_responses.py
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# --- Add backend directory to path ---
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+# ------------------------------------
+
+from src.bulk_scoring import (
+    DEFAULT_TOP_K,
+    HISTOGRAM_BIN_WIDTH,
+    ScoreAggregate,
+    ScoringContext,
+    csv_header,
+    init_worker,
+    score_chunk,
+)
+
+# --- Bulk Scoring CLI ---
+# Scores offline questionnaire responses (e.g. from pollsters) against the
+# current manifestos, without going through the API:
+#
+#   python scripts/score_responses.py responses.csv --output matches.csv --summary summary.json
+#
+# Input is CSV (with a header row) or JSONL, optionally gzipped, one
+# response per line; see src/bulk_scoring.py for the accepted layouts. The
+# file is read in chunks of --chunk-size lines and the chunks are scored in
+# a pool of worker processes. At most --max-inflight chunks are in the pool
+# at once and results are written in input order as soon as they come back,
+# so memory stays flat no matter how large the input is.
+
+CHUNK_SIZE = 20_000
+PROGRESS_INTERVAL = 5.0  # Seconds between progress lines
+
+
+def open_text(path: Path, mode: str = "r"):
+    # utf-8-sig on input: Excel CSV exports start with a BOM, which would
+    # otherwise end up in the first header name ("\ufeffid")
+    encoding = "utf-8-sig" if mode == "r" else "utf-8"
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding=encoding, newline="")
+    return open(path, mode, encoding=encoding, newline="")
+
+
+def detect_format(path: Path) -> str:
+    suffixes = [s for s in path.suffixes if s != ".gz"]
+    return "csv" if suffixes and suffixes[-1] == ".csv" else "jsonl"
+
+
+def read_chunks(f, chunk_size: int):
+    """Yields (lines, index of the first row) for every chunk of non-blank lines."""
+    chunk, first_row = [], 0
+    for line in f:
+        if not line.strip():
+            continue
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk, first_row
+            first_row += len(chunk)
+            chunk = []
+    if chunk:
+        yield chunk, first_row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score questionnaire response files against the manifestos.")
+    parser.add_argument("input", type=Path, help="CSV or JSONL file of responses (.gz is fine).")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Per-row top matches (.csv or .jsonl, optionally .gz). Omit for aggregates only.")
+    parser.add_argument("--summary", type=Path, default=None,
+                        help="Write the aggregate distributions here as JSON (default: stdout).")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), default=None,
+                        help="Override the format detected from the input file name.")
+    parser.add_argument("--output-format", choices=("csv", "jsonl"), default=None,
+                        help="Override the format detected from the output file name.")
+    parser.add_argument("--id-field", default="id", help="Column / key holding the response id.")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Matches written per row.")
+    parser.add_argument("--bin-width", type=int, default=HISTOGRAM_BIN_WIDTH,
+                        help="Width of the alignment histogram bins, in percentage points.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Scoring processes (1 = score in this process).")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per chunk.")
+    parser.add_argument("--max-inflight", type=int, default=None,
+                        help="Chunks queued or being scored at once (default: 2 x workers).")
+    parser.add_argument("--election", default=None, help="Score against this election instead of the default.")
+    parser.add_argument("--quiz", type=Path, default=None, help="Use this qq.json (with --manifestos).")
+    parser.add_argument("--manifestos", type=Path, default=None, help="Use this manifestos.json (with --quiz).")
+    args = parser.parse_args()
+
+    if args.top_k < 1 or args.chunk_size < 1 or args.workers < 1 or not 1 <= args.bin_width <= 100:
+        parser.error("--top-k, --chunk-size and --workers must be positive, --bin-width 1-100.")
+    if (args.quiz is None) != (args.manifestos is None):
+        parser.error("--quiz and --manifestos must be given together.")
+    if not args.input.exists():
+        parser.error(f"Input file not found: {args.input}")
+
+    # The parent loads the dataset too: for the output header, the summary,
+    # and (with fork) so workers start with the kernel already compiled
+    data_args = (args.election, args.quiz, args.manifestos)
+    try:
+        context = ScoringContext.load(*data_args)
+    except KeyError as e:
+        print(f"Error: {e.args[0]}")
+        sys.exit(1)
+    if context.kernel.num_manifestos == 0:
+        print("Error: No manifestos loaded.")
+        sys.exit(1)
+
+    in_fmt = args.input_format or detect_format(args.input)
+    out_fmt = args.output_format or (detect_format(args.output) if args.output else None)
+    top_k = min(args.top_k, context.kernel.num_manifestos)
+    max_inflight = args.max_inflight or 2 * args.workers
+    total = ScoreAggregate(context.kernel.num_manifestos, len(context.tags), args.bin_width)
+    versions = {context.version}
+
+    print(f"Scoring {args.input} ({in_fmt}) against {context.kernel.num_manifestos} manifestos "
+          f"with {args.workers} worker(s)...", file=sys.stderr)
+    start = last_progress = time.perf_counter()
+
+    with open_text(args.input) as f:
+        header = None
+        if in_fmt == "csv":
+            header = next(csv.reader([f.readline()]), [])
+            if not header:
+                print("Error: The CSV file has no header row.")
+                sys.exit(1)
+            if args.id_field not in header and "answers" not in header:
+                # Every column would be scored as an answer, including the ids
+                print(f"Error: The CSV header has no '{args.id_field}' column (set --id-field) "
+                      f"and no 'answers' column.")
+                sys.exit(1)
+
+        out = open_text(args.output, "w") if args.output else None
+        if out is not None and out_fmt == "csv":
+            out.write(",".join(csv_header(top_k)) + "\n")
+
+        def collect(result):
+            text, aggregate, version = result
+            if out is not None:
+                out.write(text)
+            total.merge(aggregate)
+            versions.add(version)
+
+        def submit_args(chunk, first_row):
+            return (chunk, in_fmt, header, out_fmt, top_k, args.id_field, first_row, args.bin_width)
+
+        pool = None
+        try:
+            if args.workers == 1:
+                init_worker(*data_args)
+            else:
+                pool = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=data_args)
+            pending = deque()
+            for chunk, first_row in read_chunks(f, args.chunk_size):
+                if pool is None:
+                    collect(score_chunk(*submit_args(chunk, first_row)))
+                else:
+                    pending.append(pool.submit(score_chunk, *submit_args(chunk, first_row)))
+                    # Bounded: wait for the oldest chunk before reading further
+                    while len(pending) >= max_inflight:
+                        collect(pending.popleft().result())
+                now = time.perf_counter()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = now
+                    print(f"  {total.rows:,} rows scored ({total.rows / (now - start):,.0f} rows/s)",
+                          file=sys.stderr)
+            while pending:
+                collect(pending.popleft().result())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if out is not None:
+                out.close()
+
+    elapsed = time.perf_counter() - start
+    summary = total.to_dict(context)
+    summary["seconds"] = round(elapsed, 2)
+    summary["rows_per_sec"] = round(total.rows / elapsed, 1) if elapsed else 0.0
+    if len(versions) > 1:
+        print("Warning: The data files changed during the run; rows were scored against different versions.",
+              file=sys.stderr)
+        summary["dataset_versions"] = sorted(versions)
+
+    print(f"Scored {total.scored:,} of {total.rows:,} rows ({total.errors:,} errors) in {elapsed:.1f}s "
+          f"({summary['rows_per_sec']:,.0f} rows/s).", file=sys.stderr)
+    if args.output:
+        print(f"Per-row matches written to: {args.output}", file=sys.stderr)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"Summary written to: {args.summary}", file=sys.stderr)
+    else:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,46 @@
 # backend/src/__init__.py
 
-# This file can be left empty.
-# Its presence alone tells Python that 'src' is a package.
-
-# --- Optional ---
-# For convenience, we can make our main functions and classes
-# available for easier import. This is a common practice.
-
-from .llm_client import LLMClient
-from .pdf_extractor import extract_text_from_pdf
-from .manifesto_analyzer import (
-    build_analysis_prompt, 
-    parse_llm_output, 
-    POLICY_TAGS
-)
-from .text_simplifier import build_simplify_prompt
-from .quiz_engine import (
-    load_quiz_questions,
-    load_manifestos,
-    compute_alignment
-)
-
-print("Package 'src' initialized.")
\ No newline at end of file
+import importlib
+
+# --- Public Names (resolved lazily) ---
+# For convenience, the main functions and classes can be imported straight
+# from the package (`from src import compute_alignment`). They are only
+# imported on first access, so the API server - which only needs the quiz
+# engine - never loads PyMuPDF or the LLM client just by importing `src`.
+
+_EXPORTS = {
+    "LLMClient": ".llm_client",
+    "extract_text_from_pdf": ".pdf_extractor",
+    "iter_pdf_pages": ".pdf_extractor",
+    "iter_pdf_pages_parallel": ".pdf_extractor",
+    "build_analysis_prompt": ".manifesto_analyzer",
+    "parse_llm_output": ".manifesto_analyzer",
+    "validate_analysis": ".manifesto_analyzer",
+    "POLICY_TAGS": ".manifesto_analyzer",
+    "analyze_manifesto": ".chunked_analyzer",
+    "estimate_tokens": ".chunked_analyzer",
+    "split_into_chunks": ".chunked_analyzer",
+    "build_simplify_prompt": ".text_simplifier",
+    "load_quiz_questions": ".quiz_engine",
+    "load_manifestos": ".quiz_engine",
+    "compute_alignment": ".quiz_engine",
+    "compute_alignment_many": ".quiz_engine",
+    "get_dataset": ".quiz_engine",
+    "alignment_cache_stats": ".quiz_engine",
+    "configure_alignment_cache": ".quiz_engine",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
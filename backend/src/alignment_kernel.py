@@ -0,0 +1,201 @@
+# backend/src/alignment_kernel.py
+
+import numpy as np
+
+from .manifesto_analyzer import POLICY_TAGS
+
+# --- Scoring Constants ---
+NEUTRAL_SCORE = 3   # Used when a manifesto has no score for a tag
+MAX_DISTANCE = 4    # Max distance between two answers (1 vs 5)
+
+
+def _score_value(score_data) -> float:
+    """Reads one manifesto score, falling back to Neutral like the original loop."""
+    if not isinstance(score_data, dict):
+        return NEUTRAL_SCORE
+    score = score_data.get("score", NEUTRAL_SCORE)
+    try:
+        return float(score)
+    except (TypeError, ValueError):
+        return NEUTRAL_SCORE
+
+
+def round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Vectorized equivalent of Python's round(x, ndigits) for float arrays.
+    np.round can disagree with round() on values sitting (almost) exactly on
+    a half, so those few entries are re-rounded with the builtin.
+    """
+    rounded = np.round(values, ndigits)
+    scaled = values * (10 ** ndigits)
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        flat_values = values.reshape(-1)
+        flat_rounded = rounded.reshape(-1)
+        for idx in np.flatnonzero(near_half.reshape(-1)):
+            flat_rounded[idx] = round(float(flat_values[idx]), ndigits)
+    return rounded
+
+
+class AlignmentKernel:
+    """
+    Manifestos and quiz questions compiled into NumPy arrays.
+
+    - scores: dense (manifestos x tags) matrix, columns start with POLICY_TAGS,
+      missing scores are pre-filled with NEUTRAL_SCORE.
+    - question_cols: the score column of every quiz question (-1 = no tag).
+    - answer_order: question indices in the order the original per-tag loop
+      visited them, so sums (and therefore percentages) match it bit for bit.
+
+    Build once per dataset snapshot; it is read-only afterwards.
+    """
+
+    def __init__(self, manifestos: list, questions: list):
+        # Only manifestos with policy scores take part (same as before)
+        scored = [
+            m for m in manifestos
+            if m.get("analysis", {}).get("policy_scores", {})
+        ]
+
+        # --- Columns: POLICY_TAGS first, then any extra tag we encounter ---
+        self.tags = list(POLICY_TAGS)
+        self.tag_index = {tag: i for i, tag in enumerate(self.tags)}
+        extra_tags = [q.get("tag") for q in questions]
+        for m in scored:
+            extra_tags.extend(m["analysis"]["policy_scores"].keys())
+        for tag in extra_tags:
+            if tag and tag not in self.tag_index:
+                self.tag_index[tag] = len(self.tags)
+                self.tags.append(tag)
+
+        # --- Manifesto score matrix ---
+        self.scores = np.full((len(scored), len(self.tags)), NEUTRAL_SCORE, dtype=np.float64)
+        for row, m in enumerate(scored):
+            for tag, score_data in m["analysis"]["policy_scores"].items():
+                if tag in self.tag_index:
+                    self.scores[row, self.tag_index[tag]] = _score_value(score_data)
+        # (tags x manifestos) copy so each per-question column is contiguous
+        self.scores_by_tag = np.ascontiguousarray(self.scores.T)
+
+        self.ids = [m["id"] for m in scored]
+        self.names = [m.get("name", f"Manifesto {m['id']}") for m in scored]
+        self.summaries = [
+            m.get("analysis", {}).get("summary", "No summary available.")
+            for m in scored
+        ]
+        self._set_questions(questions)
+
+    @classmethod
+    def from_compiled(cls, compiled, questions: list) -> "AlignmentKernel":
+        """
+        Builds the kernel from a CompiledSnapshot (see compiled_snapshot.py)
+        without touching manifestos.json. The score matrix stays a view into
+        the memory-mapped file unless the quiz uses a tag it doesn't have.
+        """
+        kernel = cls.__new__(cls)
+        kernel.tags = list(compiled.tags)
+        kernel.tag_index = {tag: i for i, tag in enumerate(kernel.tags)}
+        scores_by_tag = compiled.scores_by_tag
+        extra_tags = [
+            tag for tag in dict.fromkeys(q.get("tag") for q in questions)
+            if tag and tag not in kernel.tag_index
+        ]
+        if extra_tags:
+            # Tags only the quiz knows about score Neutral for everyone
+            neutral = np.full((len(extra_tags), compiled.num_rows), NEUTRAL_SCORE, dtype=np.float64)
+            scores_by_tag = np.vstack([scores_by_tag, neutral])
+            for tag in extra_tags:
+                kernel.tag_index[tag] = len(kernel.tags)
+                kernel.tags.append(tag)
+        kernel.scores_by_tag = scores_by_tag
+        kernel.scores = scores_by_tag.T
+        kernel.ids = compiled.ids.tolist()
+        kernel.names = compiled.names
+        kernel.summaries = compiled.summaries
+        kernel._set_questions(questions)
+        return kernel
+
+    def _set_questions(self, questions: list):
+        # --- Question layout ---
+        self.question_tags = [q.get("tag") for q in questions]
+        self.question_cols = np.array(
+            [self.tag_index[t] if t else -1 for t in self.question_tags],
+            dtype=np.int64,
+        )
+        # Group question indices by tag, tags in first-seen order
+        groups = {}
+        for i, tag in enumerate(self.question_tags):
+            if tag:
+                groups.setdefault(tag, []).append(i)
+        self.answer_order = np.array(
+            [i for idxs in groups.values() for i in idxs], dtype=np.int64
+        )
+
+    @property
+    def num_manifestos(self) -> int:
+        return self.scores.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the kernel's own arrays (views into a mapped snapshot are free)."""
+        arrays = (self.scores, self.scores_by_tag, self.question_cols, self.answer_order)
+        return sum(a.nbytes for a in arrays if a.flags.owndata)
+
+    @property
+    def num_questions(self) -> int:
+        return len(self.question_tags)
+
+    def answered_questions(self, num_answers: int) -> np.ndarray:
+        """Tagged question indices covered by the first `num_answers` answers, in summation order."""
+        return self.answer_order[self.answer_order < num_answers]
+
+    def score(self, answers) -> np.ndarray:
+        """
+        Scores a batch of answer vectors against every manifesto.
+
+        answers: (batch x n) array-like, one row per user, n <= num_questions.
+        Returns a (batch x manifestos) float array of alignment percentages
+        (unrounded). Rows with no tagged answers come back as all zeros.
+        """
+        answers = np.asarray(answers, dtype=np.float64)
+        if answers.ndim == 1:
+            answers = answers[np.newaxis, :]
+        num_answers = min(answers.shape[1], self.num_questions)
+        answered = self.answered_questions(num_answers)
+
+        score_sum = np.zeros((answers.shape[0], self.num_manifestos), dtype=np.float64)
+        if len(answered) == 0:
+            return score_sum
+
+        # One vectorized step per question (not per manifesto): the per-element
+        # accumulation order is the same as the original nested loops.
+        for q in answered:
+            manifesto_scores = self.scores_by_tag[self.question_cols[q]]
+            distance = np.abs(answers[:, q, np.newaxis] - manifesto_scores)
+            similarity = 1 - (distance / MAX_DISTANCE)
+            score_sum += np.maximum(similarity, 0)
+
+        return (score_sum / len(answered)) * 100
+
+    def rank(self, alignment: np.ndarray, top_k: int = None) -> np.ndarray:
+        """
+        Returns manifesto indices sorted by rounded alignment, descending.
+        Ties keep manifesto order, exactly like list.sort(reverse=True).
+
+        With top_k, only the best k indices are returned. They are picked
+        with argpartition (O(manifestos)) and only those k are sorted; the
+        order is identical to the first k rows of the full sort.
+        """
+        if top_k is None or top_k >= len(alignment):
+            return np.argsort(-alignment, kind="stable")
+        if top_k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Value of the k-th best row; everything strictly above it is in.
+        kth_value = -np.partition(-alignment, top_k - 1)[top_k - 1]
+        above = np.flatnonzero(alignment > kth_value)
+        # Fill the remaining slots with the earliest rows tied at the cut-off,
+        # which is exactly who a stable full sort would place there.
+        ties = np.flatnonzero(alignment == kth_value)[:top_k - len(above)]
+        selected = np.concatenate([above, ties])
+        return selected[np.argsort(-alignment[selected], kind="stable")]
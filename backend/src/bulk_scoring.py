@@ -0,0 +1,348 @@
+# backend/src/bulk_scoring.py
+
+import csv
+import io
+import json
+import math
+
+import numpy as np
+
+from .alignment_kernel import round_like_python
+from .quiz_engine import get_dataset, get_alignment_kernel, use_data_files
+
+# --- Bulk Scoring of Offline Responses ---
+# Scores answer files (CSV / JSONL, one response per line) chunk by chunk.
+# A chunk is parsed, grouped by answer count and scored with one kernel call
+# per group, exactly like compute_alignment_many, so every row gets the
+# same matches and percentages /api/align would return. Each chunk yields
+# its output lines plus a ScoreAggregate; aggregates have a fixed size and
+# merge by addition, so the totals take constant memory for any input size.
+#
+# The functions at module level run inside worker processes (see
+# scripts/score_responses.py): init_worker() loads the dataset once per
+# process, score_chunk() does the rest.
+
+DEFAULT_TOP_K = 3
+HISTOGRAM_BIN_WIDTH = 10  # Alignment percentage points per histogram bin
+ANSWER_SEPARATORS = (";", "|", " ")
+
+
+class ScoringContext:
+    """The kernel of one dataset snapshot plus what bulk scoring needs around it."""
+
+    def __init__(self, dataset):
+        self.version = dataset.version
+        self.kernel = get_alignment_kernel(dataset)
+        # Tags in quiz order, with the question indices that ask about each
+        self.tags = []
+        self.tag_questions = {}
+        for i, q in enumerate(dataset.questions):
+            tag = q.get("tag")
+            if tag:
+                if tag not in self.tag_questions:
+                    self.tags.append(tag)
+                    self.tag_questions[tag] = []
+                self.tag_questions[tag].append(i)
+
+    @classmethod
+    def load(cls, election: str = None, quiz_path=None, manifestos_path=None) -> "ScoringContext":
+        if quiz_path is not None and manifestos_path is not None:
+            use_data_files(quiz_path, manifestos_path)
+        return cls(get_dataset(election))
+
+    @property
+    def num_questions(self) -> int:
+        return self.kernel.num_questions
+
+
+class ScoreAggregate:
+    """
+    Running totals over scored rows: how often each manifesto is the best
+    match, its mean alignment and a histogram of its alignments, and the
+    respondents' mean answer per tag. Fixed size; merge() adds another one.
+    """
+
+    def __init__(self, num_manifestos: int, num_tags: int, bin_width: int = HISTOGRAM_BIN_WIDTH):
+        self.bin_width = bin_width
+        self.num_bins = -(-100 // bin_width)
+        self.rows = 0
+        self.scored = 0
+        self.errors = 0
+        self.top_match_counts = np.zeros(num_manifestos, dtype=np.int64)
+        self.alignment_sum = np.zeros(num_manifestos, dtype=np.float64)
+        self.histogram = np.zeros((num_manifestos, self.num_bins), dtype=np.int64)
+        self.tag_sum = np.zeros(num_tags, dtype=np.float64)
+        self.tag_count = np.zeros(num_tags, dtype=np.int64)
+
+    def add_alignments(self, rounded: np.ndarray, best: np.ndarray) -> None:
+        """rounded: (rows x manifestos) alignments rounded to 0.1; best: each row's top match."""
+        num_manifestos = rounded.shape[1]
+        self.scored += rounded.shape[0]
+        self.top_match_counts += np.bincount(best, minlength=num_manifestos)
+        self.alignment_sum += rounded.sum(axis=0)
+        bins = np.minimum((rounded // self.bin_width).astype(np.int64), self.num_bins - 1)
+        flat = np.arange(num_manifestos) * self.num_bins + bins
+        self.histogram += np.bincount(
+            flat.ravel(), minlength=num_manifestos * self.num_bins
+        ).reshape(num_manifestos, self.num_bins)
+
+    def merge(self, other: "ScoreAggregate") -> None:
+        self.rows += other.rows
+        self.scored += other.scored
+        self.errors += other.errors
+        self.top_match_counts += other.top_match_counts
+        self.alignment_sum += other.alignment_sum
+        self.histogram += other.histogram
+        self.tag_sum += other.tag_sum
+        self.tag_count += other.tag_count
+
+    def to_dict(self, context: ScoringContext) -> dict:
+        kernel = context.kernel
+        bins = [
+            f"{low}-{min(low + self.bin_width, 100)}"
+            for low in range(0, self.num_bins * self.bin_width, self.bin_width)
+        ]
+        manifestos = [
+            {
+                "manifesto_id": kernel.ids[i],
+                "name": kernel.names[i],
+                "top_match_count": int(self.top_match_counts[i]),
+                "top_match_share": round(float(self.top_match_counts[i]) / self.scored, 4) if self.scored else 0.0,
+                "mean_alignment": round(float(self.alignment_sum[i]) / self.scored, 2) if self.scored else 0.0,
+                "histogram": dict(zip(bins, (int(c) for c in self.histogram[i]))),
+            }
+            for i in range(kernel.num_manifestos)
+        ]
+        manifestos.sort(key=lambda m: m["top_match_count"], reverse=True)
+        return {
+            "dataset_version": context.version,
+            "rows": self.rows,
+            "scored": self.scored,
+            "errors": self.errors,
+            "manifestos": manifestos,
+            "tag_preferences": {
+                tag: {
+                    "mean": round(float(self.tag_sum[i] / self.tag_count[i]), 3) if self.tag_count[i] else None,
+                    "respondents": int(self.tag_count[i]),
+                }
+                for i, tag in enumerate(context.tags)
+            },
+        }
+
+
+# --- Parsing ---
+
+def _parse_answer(value) -> float:
+    if type(value) is int:
+        return value
+    if isinstance(value, bool):
+        raise ValueError(f"Answers must be numbers, got {value!r}")
+    if isinstance(value, str):
+        try:
+            return int(value)  # The common case ("5"), and much faster than float()
+        except ValueError:
+            pass
+    if not isinstance(value, float):
+        value = str(value).strip()
+        if not value:
+            raise ValueError("Missing answer")
+        value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Answers must be finite numbers, got {value!r}")
+    return int(value) if value.is_integer() else value
+
+
+def _split_answers(text: str) -> list:
+    """'5;4;3', '5 4 3' or '[5, 4, 3]' -> a list of answers."""
+    text = text.strip()
+    if text.startswith("["):
+        return json.loads(text)
+    for sep in ANSWER_SEPARATORS:
+        if sep in text:
+            return [part for part in text.split(sep) if part.strip()]
+    return [text] if text else []
+
+
+def parse_lines(lines: list, fmt: str, header: list = None, id_field: str = "id",
+                first_row: int = 0) -> list:
+    """
+    Parses one chunk of input lines into (row id, answers or None, error or
+    None) tuples. Rows without an id are numbered from first_row (1-based).
+
+    - jsonl: {"id": ..., "answers": [...]} or just [...] per line.
+    - csv:   `header` is the file's header row. Answers come from an
+             "answers" column ("5;4;3", "5 4 3" or a JSON list) if there
+             is one, otherwise from every column except `id_field`, in order
+             (trailing empty cells are unanswered questions).
+    """
+    rows = []
+    if fmt == "csv":
+        id_col = header.index(id_field) if id_field in header else None
+        if "answers" in header:
+            answers_col = header.index("answers")
+            answer_cols = None
+        else:
+            answers_col = None
+            answer_cols = [i for i in range(len(header)) if i != id_col]
+        records = csv.reader(lines)
+    else:
+        records = lines
+
+    for offset, record in enumerate(records):
+        row_id = first_row + offset + 1
+        try:
+            if fmt == "csv":
+                if id_col is not None and id_col < len(record):
+                    row_id = record[id_col]
+                if answers_col is not None:
+                    values = _split_answers(record[answers_col]) if answers_col < len(record) else []
+                else:
+                    values = [record[i] if i < len(record) else "" for i in answer_cols]
+                    # Trailing blanks are unanswered questions, like a shorter list to /api/align
+                    while values and not values[-1].strip():
+                        values.pop()
+            else:
+                data = json.loads(record)
+                if isinstance(data, dict):
+                    row_id = data.get(id_field, row_id)
+                    values = data.get("answers")
+                else:
+                    values = data
+                if isinstance(values, str):
+                    values = _split_answers(values)
+                if not isinstance(values, list):
+                    raise ValueError("'answers' must be a list.")
+            rows.append((row_id, [_parse_answer(v) for v in values], None))
+        except (ValueError, IndexError, TypeError) as e:
+            rows.append((row_id, None, f"Invalid row: {e}"))
+    return rows
+
+
+# --- Scoring ---
+
+def top_matches(rounded: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Row-wise kernel.rank(): the top_k manifesto indices of every row of
+    (rows x manifestos) alignments rounded to 0.1, best first, ties in
+    manifesto order. Each value and its index are packed into one integer
+    key so a single argpartition + sort per batch gives the exact order.
+    """
+    num_manifestos = rounded.shape[1]
+    top_k = min(top_k, num_manifestos)
+    keys = np.rint(rounded * 10).astype(np.int64) * num_manifestos + (num_manifestos - 1 - np.arange(num_manifestos))
+    if top_k < num_manifestos:
+        candidates = np.argpartition(-keys, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.broadcast_to(np.arange(num_manifestos), keys.shape)
+    order = np.argsort(-np.take_along_axis(keys, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def score_rows(context: ScoringContext, rows: list, top_k: int = DEFAULT_TOP_K,
+               aggregate: ScoreAggregate = None):
+    """
+    Scores parsed rows. Returns a list of (row id, matches or None, error or
+    None) in input order, where matches is [(manifesto index, alignment)],
+    and adds the scored rows to `aggregate` if given.
+    """
+    kernel = context.kernel
+    results = [None] * len(rows)
+    batches = {}  # effective answer count -> row indices
+    has_tagged = {}  # effective answer count -> whether any of those questions is tagged
+    for i, (row_id, answers, error) in enumerate(rows):
+        if error is None:
+            num_answers = min(len(answers), kernel.num_questions)
+            if num_answers not in has_tagged:
+                has_tagged[num_answers] = len(kernel.answered_questions(num_answers)) > 0
+            if not has_tagged[num_answers]:
+                error = "No valid answers or quiz questions."
+        if error is not None:
+            results[i] = (row_id, None, error)
+            continue
+        batches.setdefault(num_answers, []).append(i)
+
+    if aggregate is not None:
+        aggregate.rows += len(rows)
+    for num_answers, indices in batches.items():
+        answers = np.array([rows[i][1][:num_answers] for i in indices], dtype=np.float64)
+        rounded = round_like_python(kernel.score(answers), 1)
+        best = top_matches(rounded, top_k)
+        for batch_row, i in enumerate(indices):
+            matches = [(int(m), float(rounded[batch_row, m])) for m in best[batch_row]]
+            results[i] = (rows[i][0], matches, None)
+        if aggregate is not None:
+            aggregate.add_alignments(rounded, best[:, 0])
+            # Per-tag preference: each respondent's mean answer on the tag
+            for t, tag in enumerate(context.tags):
+                questions = [q for q in context.tag_questions[tag] if q < num_answers]
+                if questions:
+                    aggregate.tag_sum[t] += answers[:, questions].mean(axis=1).sum()
+                    aggregate.tag_count[t] += len(indices)
+
+    if aggregate is not None:
+        aggregate.errors += sum(1 for _, matches, _ in results if matches is None)
+    return results
+
+
+# --- Output ---
+
+def csv_header(top_k: int) -> list:
+    header = ["id"]
+    for rank in range(1, top_k + 1):
+        header += [f"match{rank}_id", f"match{rank}_name", f"match{rank}_alignment"]
+    return header + ["error"]
+
+
+def format_results(context: ScoringContext, results: list, fmt: str, top_k: int) -> str:
+    """Output lines (JSONL or CSV, matching csv_header) for scored rows."""
+    kernel = context.kernel
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        for row_id, matches, error in results:
+            cells = [row_id]
+            for rank in range(top_k):
+                if matches is not None and rank < len(matches):
+                    m, alignment = matches[rank]
+                    cells += [kernel.ids[m], kernel.names[m], alignment]
+                else:
+                    cells += ["", "", ""]
+            writer.writerow(cells + [error or ""])
+        return buffer.getvalue()
+
+    lines = []
+    for row_id, matches, error in results:
+        if matches is None:
+            record = {"id": row_id, "error": error}
+        else:
+            record = {"id": row_id, "matches": [
+                {"manifesto_id": kernel.ids[m], "name": kernel.names[m], "alignment": alignment}
+                for m, alignment in matches
+            ]}
+        lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+    return "".join(lines)
+
+
+# --- Worker Processes ---
+
+_context = None
+
+
+def init_worker(election: str = None, quiz_path=None, manifestos_path=None) -> None:
+    """Pool initializer: loads the dataset (and compiles the kernel) once per process."""
+    global _context
+    _context = ScoringContext.load(election, quiz_path, manifestos_path)
+
+
+def score_chunk(lines: list, in_fmt: str, header: list, out_fmt: str, top_k: int,
+                id_field: str, first_row: int, bin_width: int = HISTOGRAM_BIN_WIDTH):
+    """
+    Parses, scores and formats one chunk in a worker. Returns (output text,
+    ScoreAggregate of the chunk, dataset version). With out_fmt None only
+    the aggregate is computed and the text is empty.
+    """
+    rows = parse_lines(lines, in_fmt, header, id_field, first_row)
+    aggregate = ScoreAggregate(_context.kernel.num_manifestos, len(_context.tags), bin_width)
+    results = score_rows(_context, rows, top_k, aggregate)
+    text = format_results(_context, results, out_fmt, top_k) if out_fmt else ""
+    return text, aggregate, _context.version
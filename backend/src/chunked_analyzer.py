@@ -0,0 +1,259 @@
+# backend/src/chunked_analyzer.py
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .manifesto_analyzer import (
+    POLICY_TAGS,
+    NOT_MENTIONED,
+    build_analysis_prompt,
+    build_chunk_prompt,
+    build_repair_prompt,
+    parse_llm_output,
+    validate_analysis
+)
+from .policy_lexicon import relevant_passages
+
+# --- Token Budget Configuration ---
+# Prompts estimated above MAX_SINGLE_PROMPT_TOKENS are analyzed in chunks
+# of roughly CHUNK_TOKENS each (map), then merged (reduce).
+MAX_SINGLE_PROMPT_TOKENS = 100_000
+CHUNK_TOKENS = 20_000
+CHARS_PER_TOKEN = 4  # Rough average for English text across providers
+
+# --- Output Repair Configuration ---
+# Missing / invalid tags in an LLM answer are re-asked with a small prompt
+# (only those tags, only the passages about them) instead of a full re-run.
+REPAIR_ROUNDS = 2
+REPAIR_CONTEXT_TOKENS_PER_TAG = 600   # Passages sent per tag being repaired
+REPAIR_CONTEXT_TOKENS = 6_000         # ... but never more than this in total
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (no tokenizer dependency): ~4 characters per token
+    for English prose, but never fewer than ~1.3 tokens per word.
+    """
+    if not text:
+        return 0
+    return max(len(text) // CHARS_PER_TOKEN, int(len(text.split()) * 1.3))
+
+
+def split_into_chunks(text: str, max_tokens: int = CHUNK_TOKENS) -> list[str]:
+    """
+    Splits text into chunks of at most ~max_tokens, breaking on paragraph
+    boundaries where possible, then on lines, then hard on characters.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        # Oversized paragraph: fall back to lines, then to fixed slices
+        for line in paragraph.splitlines():
+            for start in range(0, len(line), max_chars):
+                pieces.append(line[start:start + max_chars])
+
+    chunks, current, current_len = [], [], 0
+    for piece in pieces:
+        if current and current_len + len(piece) + 2 > max_chars:
+            chunks.append("\n\n".join(current))
+            current, current_len = [], 0
+        current.append(piece)
+        current_len += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _is_mentioned(score_data: dict) -> bool:
+    mentioned = score_data.get("mentioned")
+    if isinstance(mentioned, bool):
+        return mentioned
+    # Older-style answer without the flag: treat the "not mentioned" default as absent
+    return not (score_data.get("score") == 3 and score_data.get("explanation") == NOT_MENTIONED)
+
+
+def reduce_chunk_analyses(chunk_results: list[dict], chunk_weights: list[int]) -> dict:
+    """
+    Deterministically merges per-chunk analyses into the normal
+    {"summary", "policy_scores"} schema.
+
+    Per policy tag:
+    - only chunks that mention the tag count; each is weighted by its size
+    - score = weighted mean, rounded half up, clamped to 1-5
+    - explanation = from the mentioning chunk whose score is closest to the
+      final score (ties: larger chunk, then earlier chunk)
+    - no chunk mentions it -> 3 / "This policy was not clearly mentioned."
+
+    Summary: the first sentence of the summaries of the (up to) three chunks
+    that mention the most policies, kept in document order.
+    """
+    policy_scores = {}
+    for tag in POLICY_TAGS:
+        votes = []  # (score, weight, chunk index, explanation)
+        for i, (result, weight) in enumerate(zip(chunk_results, chunk_weights)):
+            score_data = result.get("policy_scores", {}).get(tag)
+            if not isinstance(score_data, dict) or not _is_mentioned(score_data):
+                continue
+            try:
+                score = float(score_data.get("score"))
+            except (TypeError, ValueError):
+                continue
+            votes.append((min(5.0, max(1.0, score)), weight, i, score_data.get("explanation", "")))
+
+        if not votes:
+            policy_scores[tag] = {"score": 3, "explanation": NOT_MENTIONED}
+            continue
+
+        total_weight = sum(w for _, w, _, _ in votes)
+        mean = sum(s * w for s, w, _, _ in votes) / total_weight
+        final = min(5, max(1, int(mean + 0.5)))
+        best = min(votes, key=lambda v: (abs(v[0] - final), -v[1], v[2]))
+        policy_scores[tag] = {"score": final, "explanation": best[3]}
+
+    def mentioned_count(i):
+        scores = chunk_results[i].get("policy_scores", {})
+        return sum(1 for d in scores.values() if isinstance(d, dict) and _is_mentioned(d))
+
+    ranked = sorted(range(len(chunk_results)), key=lambda i: (-mentioned_count(i), i))[:3]
+    sentences = []
+    for i in sorted(ranked):
+        summary = (chunk_results[i].get("summary") or "").strip()
+        if summary:
+            first = re.split(r"(?<=[.!?])\s+", summary, maxsplit=1)[0]
+            if first not in sentences:
+                sentences.append(first)
+
+    return {
+        "summary": " ".join(sentences) or "No summary available.",
+        "policy_scores": policy_scores
+    }
+
+
+def parse_and_repair(llm_output: str, source_text: str, generate, full_prompt_tokens: int,
+                     chunk_mode: bool = False, rounds: int = REPAIR_ROUNDS,
+                     log=print, record=None) -> dict:
+    """
+    Parses and validates an analysis answer (see validate_analysis). Salvaged
+    but incomplete answers are completed with small repair prompts covering
+    only the missing or invalid tags, built from the passages of source_text
+    about those tags. Raises ValueError if nothing can be parsed from
+    llm_output, or if fields are still invalid after `rounds` repairs - the
+    caller then keeps the previous analysis and retries on the next run,
+    instead of publishing made-up Neutral scores.
+
+    full_prompt_tokens is the size of the original prompt; the difference to
+    each repair prompt is recorded as tokens saved versus a full re-run.
+    """
+    record = record or (lambda **fields: None)
+
+    def parse(text, tags=None):
+        start = time.perf_counter()
+        try:
+            return validate_analysis(parse_llm_output(text), tags, require_mentioned=chunk_mode)
+        finally:
+            record(parse_seconds=time.perf_counter() - start)
+
+    clean, problems = parse(llm_output)
+    for _ in range(rounds):
+        if not problems:
+            break
+        tags = [tag for tag in POLICY_TAGS if tag in problems]
+        log(f"Repairing {len(problems)} invalid field(s): " +
+            ", ".join(f"{field} ({reason})" for field, reason in problems.items()))
+        context_tokens = min(REPAIR_CONTEXT_TOKENS, REPAIR_CONTEXT_TOKENS_PER_TAG * max(1, len(tags)))
+        context = relevant_passages(source_text, tags or POLICY_TAGS, context_tokens * CHARS_PER_TOKEN)
+        prompt = build_repair_prompt(context, tags, "summary" in problems, with_mentioned=chunk_mode)
+        repair_tokens = estimate_tokens(prompt)
+        record(repairs=1, repaired_fields=len(problems), repair_prompt_tokens=repair_tokens,
+               tokens_saved=max(0, full_prompt_tokens - repair_tokens))
+
+        try:
+            fixed, _ = parse(generate(prompt), tags)
+        except ValueError as e:
+            log(f"Repair answer could not be parsed: {e}")
+            continue
+        clean["policy_scores"].update(fixed["policy_scores"])
+        if "summary" in problems and "summary" in fixed:
+            clean["summary"] = fixed["summary"]
+        problems = {
+            field: reason for field, reason in problems.items()
+            if not (field in fixed["policy_scores"] or (field == "summary" and "summary" in fixed))
+        }
+
+    if problems:
+        record(unrepaired_fields=len(problems))
+        raise ValueError(f"Could not repair {len(problems)} field(s): {', '.join(problems)}")
+    return {
+        "summary": clean["summary"],
+        "policy_scores": {tag: clean["policy_scores"][tag] for tag in POLICY_TAGS}
+    }
+
+
+def analyze_manifesto(manifesto_text: str, generate, max_prompt_tokens: int = MAX_SINGLE_PROMPT_TOKENS,
+                      chunk_tokens: int = CHUNK_TOKENS, workers: int = 4, log=print,
+                      record=None) -> dict:
+    """
+    Analyzes a manifesto, picking single-shot or chunked mode automatically.
+
+    generate: callable(prompt) -> raw LLM text, e.g. llm.generate (wrap it
+              with rate limiting / retries as needed; it is called from
+              several threads in chunked mode).
+
+    If the full prompt fits in max_prompt_tokens, this is the usual single
+    call. Otherwise the text is split into ~chunk_tokens chunks that are
+    scored concurrently and merged with reduce_chunk_analyses. If any chunk
+    fails, the chunks not started yet are cancelled and ValueError is
+    raised: a merge without it would score the tags only that chunk covers
+    as Neutral and be stored as a complete analysis.
+
+    Every answer is validated and, if needed, repaired (parse_and_repair).
+
+    record: optional callable(**fields) receiving prompt sizes, parse times
+            and repair counts for run reports (see metrics.RunReport.record;
+            it may be called from several threads).
+    """
+    record = record or (lambda **fields: None)
+
+    prompt = build_analysis_prompt(manifesto_text)
+    prompt_tokens = estimate_tokens(prompt)
+    if prompt_tokens <= max_prompt_tokens:
+        record(mode="single", prompt_chars=len(prompt), prompt_tokens=prompt_tokens)
+        return parse_and_repair(generate(prompt), manifesto_text, generate, prompt_tokens,
+                                log=log, record=record)
+
+    chunks = split_into_chunks(manifesto_text, chunk_tokens)
+    if not chunks:
+        raise ValueError("Manifesto text is empty.")
+    log(f"Prompt is ~{prompt_tokens} tokens; analyzing in {len(chunks)} chunks of ~{chunk_tokens} tokens.")
+    record(mode="chunked", chunks=len(chunks))
+
+    def analyze_chunk(i):
+        chunk_prompt = build_chunk_prompt(chunks[i], i, len(chunks))
+        chunk_prompt_tokens = estimate_tokens(chunk_prompt)
+        record(prompt_chars=len(chunk_prompt), prompt_tokens=chunk_prompt_tokens)
+        return parse_and_repair(generate(chunk_prompt), chunks[i], generate, chunk_prompt_tokens,
+                                chunk_mode=True, log=log, record=record)
+
+    results, weights = [], []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        # Collected in chunk order, so the reduce step is deterministic
+        futures = [pool.submit(analyze_chunk, i) for i in range(len(chunks))]
+        for i, future in enumerate(futures):
+            try:
+                results.append(future.result())
+                weights.append(estimate_tokens(chunks[i]))
+            except Exception as e:
+                log(f"Chunk {i + 1}/{len(chunks)} failed: {e}")
+                record(failed_chunks=1)
+                for pending in futures[i + 1:]:
+                    pending.cancel()
+                raise ValueError(f"Chunk {i + 1}/{len(chunks)} failed: {e}") from e
+
+    return reduce_chunk_analyses(results, weights)
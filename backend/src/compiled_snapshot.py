@@ -0,0 +1,229 @@
+# backend/src/compiled_snapshot.py
+
+import hashlib
+import json
+import mmap
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from .manifesto_analyzer import POLICY_TAGS
+from .alignment_kernel import NEUTRAL_SCORE, _score_value
+
+# --- Compiled Manifesto Snapshot ---
+# manifestos.json stays the human-readable source of truth. Next to it, the
+# analysis pipeline writes manifestos.snapshot: the data the API needs for
+# alignment, packed so it can be memory-mapped instead of parsed. Startup is
+# then near-instant and worker processes share the pages via the OS cache.
+#
+# File layout (little-endian, every section 8-byte aligned):
+#   header   magic "CSNP", format: u16, tags: u32, rows: u32, total: u32,
+#            strings: u32, source sha256 (32 bytes), 8 x section offset: u64
+#   tag_ids      tags x u32          string ids of the tag names (POLICY_TAGS first)
+#   ids          rows x i64          manifesto ids
+#   name_ids     rows x u32          string ids of the names
+#   summary_ids  rows x u32          string ids of the summaries
+#   scores       tags x rows f64     tag-major, missing scores = NEUTRAL_SCORE
+#   explanations tags x rows u32     string ids, NO_STRING if missing
+#   str_offsets  (strings + 1) x u64 offsets into the blob
+#   str_blob     UTF-8 bytes of every distinct string, back to back
+#
+# Rows are the manifestos that have policy scores (the ones alignment uses);
+# `total` counts every manifesto in the source file.
+
+MAGIC = b"CSNP"
+FORMAT_VERSION = 1
+NO_STRING = 0xFFFFFFFF
+SNAPSHOT_SUFFIX = ".snapshot"
+_HEADER = struct.Struct("<4sHIIII32s8Q")
+_SECTIONS = (
+    "tag_ids", "ids", "name_ids", "summary_ids",
+    "scores", "explanations", "str_offsets", "str_blob",
+)
+
+
+def snapshot_path_for(json_path) -> Path:
+    """data/manifestos.json -> data/manifestos.snapshot"""
+    return Path(json_path).with_suffix(SNAPSHOT_SUFFIX)
+
+
+class _StringTable:
+    """Interns strings while compiling: each distinct string is stored once."""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, value) -> int:
+        if not isinstance(value, str):
+            return NO_STRING
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def compile_snapshot(manifestos: list, source_sha256: str) -> bytes:
+    """
+    Packs manifestos (the parsed manifestos.json) into snapshot bytes.
+    source_sha256 is the hex digest of the JSON file's bytes; readers use it
+    to check that the snapshot matches the JSON next to it.
+    """
+    scored = [m for m in manifestos if m.get("analysis", {}).get("policy_scores", {})]
+
+    # Tags: POLICY_TAGS first, then extra tags in first-seen order (like AlignmentKernel)
+    tags = list(POLICY_TAGS)
+    tag_index = {tag: i for i, tag in enumerate(tags)}
+    for m in scored:
+        for tag in m["analysis"]["policy_scores"]:
+            if tag not in tag_index:
+                tag_index[tag] = len(tags)
+                tags.append(tag)
+
+    strings = _StringTable()
+    tag_ids = np.array([strings.add(tag) for tag in tags], dtype="<u4")
+    ids = np.array([m["id"] for m in scored], dtype="<i8")
+    name_ids = np.array(
+        [strings.add(m.get("name", f"Manifesto {m['id']}")) for m in scored], dtype="<u4"
+    )
+    summary_ids = np.array(
+        [strings.add(m.get("analysis", {}).get("summary", "No summary available.")) for m in scored],
+        dtype="<u4",
+    )
+    scores = np.full((len(tags), len(scored)), NEUTRAL_SCORE, dtype="<f8")
+    explanations = np.full((len(tags), len(scored)), NO_STRING, dtype="<u4")
+    for row, m in enumerate(scored):
+        for tag, score_data in m["analysis"]["policy_scores"].items():
+            col = tag_index[tag]
+            scores[col, row] = _score_value(score_data)
+            if isinstance(score_data, dict):
+                explanations[col, row] = strings.add(score_data.get("explanation"))
+
+    encoded = [s.encode("utf-8") for s in strings.strings]
+    str_offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(b) for b in encoded], out=str_offsets[1:])
+    sections = {
+        "tag_ids": tag_ids.tobytes(),
+        "ids": ids.tobytes(),
+        "name_ids": name_ids.tobytes(),
+        "summary_ids": summary_ids.tobytes(),
+        "scores": scores.tobytes(),
+        "explanations": explanations.tobytes(),
+        "str_offsets": str_offsets.tobytes(),
+        "str_blob": b"".join(encoded),
+    }
+
+    offsets, position = [], _align8(_HEADER.size)
+    for name in _SECTIONS:
+        offsets.append(position)
+        position = _align8(position + len(sections[name]))
+
+    out = bytearray(position)
+    _HEADER.pack_into(
+        out, 0, MAGIC, FORMAT_VERSION, len(tags), len(scored), len(manifestos),
+        len(encoded), bytes.fromhex(source_sha256), *offsets
+    )
+    for name, offset in zip(_SECTIONS, offsets):
+        out[offset:offset + len(sections[name])] = sections[name]
+    return bytes(out)
+
+
+def compile_json_file(json_path) -> bytes:
+    """compile_snapshot for a manifestos.json file on disk."""
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    return compile_snapshot(json.loads(raw.decode("utf-8")), hashlib.sha256(raw).hexdigest())
+
+
+class _StringColumn:
+    """Read-only sequence of strings decoded from the table on access."""
+
+    def __init__(self, snapshot, string_ids):
+        self._snapshot = snapshot
+        self._ids = string_ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._snapshot.string(int(s)) for s in self._ids[i]]
+        return self._snapshot.string(int(self._ids[i]))
+
+    def __iter__(self):
+        return (self._snapshot.string(int(s)) for s in self._ids)
+
+
+class CompiledSnapshot:
+    """
+    A memory-mapped manifestos.snapshot. Arrays are zero-copy views into the
+    mapping; strings are decoded on access.
+
+        snap = CompiledSnapshot.open("data/manifestos.snapshot")
+        snap.scores_by_tag   # (tags x rows) float64
+        snap.names[0]
+    """
+
+    def __init__(self, buffer, path=None):
+        self.path = path
+        self._buffer = buffer
+        (magic, fmt, num_tags, num_rows, total, num_strings,
+         source, *offsets) = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"Not a compiled snapshot (or an old format): {path}")
+        self.source_sha256 = source.hex()
+        self.num_manifestos = total
+        section = dict(zip(_SECTIONS, offsets))
+
+        def array(name, dtype, count):
+            return np.frombuffer(buffer, dtype=dtype, count=count, offset=section[name])
+
+        self._str_offsets = array("str_offsets", "<u8", num_strings + 1)
+        self._str_base = section["str_blob"]
+        self.tags = [self.string(int(s)) for s in array("tag_ids", "<u4", num_tags)]
+        self.ids = array("ids", "<i8", num_rows)
+        self.scores_by_tag = array("scores", "<f8", num_tags * num_rows).reshape(num_tags, num_rows)
+        self._explanations = array("explanations", "<u4", num_tags * num_rows).reshape(num_tags, num_rows)
+        self.names = _StringColumn(self, array("name_ids", "<u4", num_rows))
+        self.summaries = _StringColumn(self, array("summary_ids", "<u4", num_rows))
+
+    @classmethod
+    def open(cls, path) -> "CompiledSnapshot":
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
+
+    @staticmethod
+    def read_source_sha256(path) -> str:
+        """The source JSON digest recorded in a snapshot file (reads only the header)."""
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+        magic, fmt, *_, source = _HEADER.unpack(header)[:7]
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"Not a compiled snapshot (or an old format): {path}")
+        return source.hex()
+
+    def string(self, string_id: int):
+        if string_id == NO_STRING:
+            return None
+        start = self._str_base + int(self._str_offsets[string_id])
+        end = self._str_base + int(self._str_offsets[string_id + 1])
+        return bytes(self._buffer[start:end]).decode("utf-8")
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.ids)
+
+    def explanation(self, row: int, tag: str):
+        """The explanation for one manifesto row and tag, or None."""
+        try:
+            col = self.tags.index(tag)
+        except ValueError:
+            return None
+        return self.string(int(self._explanations[col, row]))
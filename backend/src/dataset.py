@@ -0,0 +1,282 @@
+# backend/src/dataset.py
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .compiled_snapshot import CompiledSnapshot
+
+# --- In-memory Dataset Cache ---
+# The API used to open and json.load qq.json / manifestos.json on every
+# request. QuizDataset loads both files once, keeps the parsed data in memory
+# and only re-reads a file when its (mtime, size) signature changes - and
+# only re-parses it when the content hash changed as well.
+#
+# If a compiled snapshot of manifestos.json is available and was built from
+# exactly the current file (see compiled_snapshot.py), it is memory-mapped
+# instead and the JSON is only parsed when something asks for the full
+# manifesto data (e.g. /api/manifestos).
+
+
+PARSED_JSON_OVERHEAD = 4  # Parsed JSON takes roughly this many times its file size in memory
+
+
+class _DeferredJSON:
+    """
+    A JSON file that is parsed (once, thread-safely) on first use. Until
+    then it is only memory-mapped, so the bytes live in the shared page
+    cache rather than on every worker's heap. Our writers replace files
+    atomically, so the mapping keeps seeing the version it was opened on.
+    """
+
+    def __init__(self, path, digest: str):
+        self.path = path
+        self.digest = digest
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._buffer is not None:
+                raw = self._buffer[:]
+                self._buffer.close()
+                self._buffer = None
+                if hashlib.sha256(raw).hexdigest() != self.digest:
+                    print(f"Warning: {self.path} was modified in place; it will be reloaded.")
+                self._data = json.loads(raw.decode("utf-8"))
+            return self._data
+
+
+class _FileState:
+    """Tracks the last seen signature, content hash and parsed data of one JSON file."""
+
+    def __init__(self, path, can_defer=None):
+        self.path = path
+        # can_defer(digest) -> True if parsing may wait until the data is used
+        self.can_defer = can_defer
+        self.signature = None  # (mtime_ns, size), or None if missing
+        self.digest = None     # sha256 hex digest of the raw bytes
+        self.data = []
+        self.nbytes = 0
+        self.missing = False
+
+    def refresh(self, label: str) -> bool:
+        """
+        Re-checks the file on disk. Returns True if the parsed data changed.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self.missing:
+                return False
+            print(f"Error: {label} file not found at {self.path}")
+            changed = self.digest is not None
+            self.missing = True
+            self.signature, self.digest, self.data, self.nbytes = None, None, [], 0
+            return changed
+
+        self.missing = False
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self.signature:
+            return False
+
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            print(f"Error: Could not read {label} file at {self.path}: {e}")
+            return False
+
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == self.digest:
+            # Touched but not modified (e.g. copied over with the same content)
+            self.signature = signature
+            return False
+
+        if self.can_defer is not None and self.can_defer(digest):
+            self.signature = signature
+            self.digest = digest
+            self.data = _DeferredJSON(self.path, digest)
+            self.nbytes = len(raw)
+            return True
+
+        try:
+            data = json.loads(raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            # Keep serving the last good data; we retry on the next check
+            # because the signature is left untouched.
+            print(f"Error: Could not decode {label} file at {self.path}")
+            return False
+
+        self.signature = signature
+        self.digest = digest
+        self.data = data
+        self.nbytes = len(raw)
+        return True
+
+
+class DatasetSnapshot:
+    """
+    An immutable view of the quiz questions and manifestos at one point in time.
+    Everything hanging off a snapshot is shared between requests and threads,
+    so callers must treat it as read-only.
+    """
+
+    def __init__(self, questions: list, manifestos: list, version: str, nbytes: int = 0,
+                 compiled=None, manifestos_nbytes: int = 0):
+        self.questions = questions
+        self._manifestos = manifestos
+        self.version = version
+        self.nbytes = nbytes
+        self.manifestos_nbytes = manifestos_nbytes
+        # CompiledSnapshot of the manifestos, if one matched the JSON file
+        self.compiled = compiled
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    @property
+    def manifestos(self) -> list:
+        """The parsed manifestos.json (parsed on first access if a compiled snapshot was used)."""
+        if isinstance(self._manifestos, _DeferredJSON):
+            self._manifestos = self._manifestos.load()
+        return self._manifestos
+
+    @property
+    def has_manifestos(self) -> bool:
+        """Whether any manifestos are loaded, without forcing a JSON parse."""
+        if self.compiled is not None:
+            return self.compiled.num_manifestos > 0
+        return bool(self.manifestos)
+
+    def memory_bytes(self) -> int:
+        """
+        Rough heap footprint: the parsed JSON (PARSED_JSON_OVERHEAD x file
+        size) plus every derived value that reports `nbytes`. A memory-mapped
+        compiled snapshot lives in the shared page cache and isn't counted
+        until the manifestos JSON is actually parsed.
+        """
+        parsed = self.nbytes
+        if isinstance(self._manifestos, _DeferredJSON):
+            parsed -= self.manifestos_nbytes
+        derived = sum(getattr(value, "nbytes", 0) for value in list(self._derived.values()))
+        return parsed * PARSED_JSON_OVERHEAD + derived
+
+    def derive(self, key: str, factory):
+        """
+        Returns a value computed from this snapshot, building it with
+        factory(snapshot) on first use. Derived values (compiled matrices,
+        pre-serialized responses, ...) live exactly as long as the snapshot,
+        so they are dropped automatically when the data files change.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = factory(self)
+            return self._derived[key]
+
+
+class QuizDataset:
+    """
+    Thread-safe, change-aware cache for qq.json and manifestos.json.
+
+    snapshot() returns the current DatasetSnapshot. At most once every
+    `check_interval` seconds it stats both files and, if either changed,
+    builds a new snapshot. A snapshot is swapped in atomically, so readers
+    on Flask's threaded server never see a half-updated dataset.
+    """
+
+    def __init__(self, quiz_path, manifestos_path, check_interval: float = 1.0,
+                 compiled_path=None):
+        self.quiz_path = quiz_path
+        self.manifestos_path = manifestos_path
+        self.compiled_path = compiled_path
+        self.check_interval = check_interval
+
+        self._compiled = None
+        self._quiz = _FileState(quiz_path)
+        self._manifestos = _FileState(
+            manifestos_path, can_defer=self._open_compiled if compiled_path else None
+        )
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._last_check = 0.0
+
+    def snapshot(self) -> DatasetSnapshot:
+        """Returns the current snapshot, reloading the files if they changed."""
+        snap = self._snapshot
+        if snap is not None and time.monotonic() - self._last_check < self.check_interval:
+            return snap
+
+        if snap is None:
+            # First load: everybody waits for it.
+            with self._lock:
+                if self._snapshot is None:
+                    self._refresh()
+                return self._snapshot
+
+        # Only one thread re-checks the files; the others keep serving
+        # the current snapshot instead of queueing behind the lock.
+        if not self._lock.acquire(blocking=False):
+            return snap
+        try:
+            if time.monotonic() - self._last_check >= self.check_interval:
+                self._refresh()
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def reload(self) -> DatasetSnapshot:
+        """Forces a re-check of both files, ignoring check_interval."""
+        with self._lock:
+            self._refresh()
+            return self._snapshot
+
+    def _open_compiled(self, manifestos_digest: str) -> bool:
+        """
+        Memory-maps the compiled snapshot if it was built from the manifestos
+        file with this digest. Otherwise the JSON is parsed as usual.
+        """
+        self._compiled = None
+        try:
+            if CompiledSnapshot.read_source_sha256(self.compiled_path) != manifestos_digest:
+                return False  # Stale: built from another version of the JSON
+            self._compiled = CompiledSnapshot.open(self.compiled_path)
+            return True
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Warning: Ignoring compiled snapshot at {self.compiled_path}: {e}")
+            return False
+
+    def _refresh(self):
+        # Must be called with self._lock held.
+        quiz_changed = self._quiz.refresh("Quiz")
+        manifestos_changed = self._manifestos.refresh("Manifestos")
+        self._last_check = time.monotonic()
+
+        if self._snapshot is not None and not (quiz_changed or manifestos_changed):
+            return
+
+        version = hashlib.sha256(
+            f"{self._quiz.digest}:{self._manifestos.digest}".encode("utf-8")
+        ).hexdigest()[:16]
+        compiled = self._compiled
+        if compiled is not None and compiled.source_sha256 != self._manifestos.digest:
+            compiled = None
+        self._snapshot = DatasetSnapshot(
+            questions=self._quiz.data,
+            manifestos=self._manifestos.data,
+            version=version,
+            nbytes=self._quiz.nbytes + self._manifestos.nbytes,
+            compiled=compiled,
+            manifestos_nbytes=self._manifestos.nbytes,
+        )
@@ -0,0 +1,191 @@
+# backend/src/dataset_registry.py
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from .dataset import QuizDataset
+from .compiled_snapshot import snapshot_path_for
+
+# --- Multi-election Datasets ---
+# One deployment can serve several elections (national, per state, ...).
+# Each election is a qq.json / manifestos.json pair registered under an id;
+# its QuizDataset is created on first use and dropped again, least recently
+# used first, when the loaded elections go over the memory budget.
+#
+# The hot path (an election that is already loaded) is one dict lookup on
+# top of QuizDataset.snapshot(); the lock is only taken to load or evict.
+
+DEFAULT_ELECTION = "default"
+DEFAULT_MEMORY_BUDGET_MB = 512
+BUDGET_CHECK_INTERVAL = 5.0  # Seconds between re-measuring the loaded elections
+
+
+class DatasetRegistry:
+    """
+    Election id -> QuizDataset, loaded lazily and evicted LRU.
+
+        registry = DatasetRegistry(memory_budget_bytes=512 * 1024 * 1024)
+        registry.register("national", quiz_path, manifestos_path)
+        snapshot = registry.snapshot("national")
+
+    snapshot(None) returns the default election. Unknown ids raise KeyError.
+    """
+
+    def __init__(self, memory_budget_bytes: int, default: str = DEFAULT_ELECTION,
+                 check_interval: float = 1.0, on_evict=None):
+        """
+        on_evict: optional callback(election_id, snapshot) after an election
+                  is unloaded, e.g. to drop its cached results.
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.default = default
+        self.check_interval = check_interval
+        self.on_evict = on_evict
+
+        self._sources = {}     # election id -> (quiz_path, manifestos_path, compiled_path)
+        self._loaded = {}      # election id -> QuizDataset
+        self._last_used = {}   # election id -> monotonic time of the last snapshot()
+        self._versions = {}    # election id -> dataset version seen by the last budget check
+        self._lock = threading.Lock()
+        self._last_budget_check = 0.0
+        self._counts = {"loads": 0, "evictions": 0}
+
+    # --- Registration ---
+
+    def register(self, election_id: str, quiz_path, manifestos_path, compiled_path=None) -> None:
+        """Adds (or re-points) an election. Its files are only read on first use."""
+        with self._lock:
+            self._sources[election_id] = (Path(quiz_path), Path(manifestos_path), compiled_path)
+            self._unload(election_id)
+
+    def discover(self, root, fallback_quiz_path=None) -> list:
+        """
+        Registers every <root>/<election>/ directory that has a
+        manifestos.json. Its qq.json is used if present, otherwise
+        fallback_quiz_path (the questions are usually shared).
+        Returns the election ids found.
+        """
+        found = []
+        root = Path(root)
+        if not root.is_dir():
+            return found
+        for directory in sorted(p for p in root.iterdir() if p.is_dir()):
+            manifestos_path = directory / "manifestos.json"
+            if not manifestos_path.exists():
+                continue
+            quiz_path = directory / "qq.json"
+            if not quiz_path.exists() and fallback_quiz_path is not None:
+                quiz_path = Path(fallback_quiz_path)
+            self.register(directory.name, quiz_path, manifestos_path,
+                          compiled_path=snapshot_path_for(manifestos_path))
+            found.append(directory.name)
+        return found
+
+    def elections(self) -> list:
+        """Registered election ids, with whether each one is loaded right now."""
+        with self._lock:
+            return [
+                {"id": election_id, "default": election_id == self.default,
+                 "loaded": election_id in self._loaded}
+                for election_id in sorted(self._sources)
+            ]
+
+    def __contains__(self, election_id) -> bool:
+        return election_id in self._sources
+
+    # --- Lookup ---
+
+    def snapshot(self, election_id: str = None):
+        """The current DatasetSnapshot of an election (the default one if None)."""
+        if election_id is None:
+            election_id = self.default
+        dataset = self._loaded.get(election_id)
+        if dataset is None:
+            dataset = self._load(election_id)
+        self._last_used[election_id] = time.monotonic()
+        snapshot = dataset.snapshot()
+        if (self._versions.get(election_id) != snapshot.version
+                or time.monotonic() - self._last_budget_check >= BUDGET_CHECK_INTERVAL):
+            self._enforce_budget(keep=election_id)
+        return snapshot
+
+    def _load(self, election_id: str) -> QuizDataset:
+        with self._lock:
+            dataset = self._loaded.get(election_id)
+            if dataset is not None:
+                return dataset
+            try:
+                quiz_path, manifestos_path, compiled_path = self._sources[election_id]
+            except KeyError:
+                raise KeyError(f"Unknown election: {election_id}") from None
+            dataset = QuizDataset(quiz_path, manifestos_path,
+                                  check_interval=self.check_interval, compiled_path=compiled_path)
+            self._loaded[election_id] = dataset
+            self._last_used[election_id] = time.monotonic()
+            self._counts["loads"] += 1
+            return dataset
+
+    # --- Memory Budget ---
+
+    def memory_bytes(self) -> dict:
+        """Estimated heap use per loaded election (see DatasetSnapshot.memory_bytes)."""
+        with self._lock:
+            loaded = list(self._loaded.items())
+        return {election_id: dataset.snapshot().memory_bytes() for election_id, dataset in loaded}
+
+    def _enforce_budget(self, keep: str) -> None:
+        """
+        Unloads least recently used elections until the rest fit the budget.
+        Only one thread checks at a time; the others carry on. `keep` (the
+        election being served) and the default election (preloaded and
+        shared by the gunicorn workers) are never unloaded.
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        evicted = []
+        try:
+            self._last_budget_check = time.monotonic()
+            usage = {}
+            for election_id, dataset in self._loaded.items():
+                snapshot = dataset.snapshot()
+                self._versions[election_id] = snapshot.version
+                usage[election_id] = snapshot.memory_bytes()
+            total = sum(usage.values())
+            by_age = sorted(usage, key=lambda e: self._last_used.get(e, 0.0))
+            for election_id in by_age:
+                if total <= self.memory_budget_bytes:
+                    break
+                if election_id in (keep, self.default):
+                    continue
+                total -= usage[election_id]
+                evicted.append((election_id, self._unload(election_id)))
+                self._counts["evictions"] += 1
+        finally:
+            self._lock.release()
+        for election_id, snapshot in evicted:
+            print(f"Unloaded election '{election_id}' to stay within the dataset memory budget.")
+            if self.on_evict is not None and snapshot is not None:
+                self.on_evict(election_id, snapshot)
+
+    def _unload(self, election_id: str):
+        # Called with the lock held. Requests still holding the snapshot keep
+        # using it; it is freed once they finish.
+        dataset = self._loaded.pop(election_id, None)
+        self._versions.pop(election_id, None)
+        return dataset._snapshot if dataset is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            counts["registered"] = len(self._sources)
+            counts["loaded"] = len(self._loaded)
+        counts["memory_bytes"] = sum(self.memory_bytes().values())
+        counts["memory_budget_bytes"] = self.memory_budget_bytes
+        return counts
+
+
+def memory_budget_from_env() -> int:
+    """CIVICSENSE_DATASET_MEMORY_MB in bytes (default DEFAULT_MEMORY_BUDGET_MB)."""
+    return int(float(os.getenv("CIVICSENSE_DATASET_MEMORY_MB", DEFAULT_MEMORY_BUDGET_MB)) * 1024 * 1024)
@@ -0,0 +1,185 @@
+# backend/src/extraction_cache.py
+
+import os
+import re
+import struct
+import tempfile
+import unicodedata
+import zlib
+from pathlib import Path
+from typing import Iterator
+
+from .storage import file_sha256
+
+# --- Extracted Text Cache ---
+# PDFs in backend/inputs almost never change, so their extracted text is
+# cached on disk, keyed by the PDF's content hash and the extractor version.
+#
+# File layout (one file per PDF version, "<sha256>-<version>.pages"):
+#   [page 1 zlib][page 2 zlib]...[index][footer]
+#   index  = page_count x (offset: u64, compressed_len: u32, text_len: u32)
+#   footer = magic "CSPG" + format: u16 + page_count: u32 + index_offset: u64
+# The footer at the end lets us stream pages in while extracting, and lets
+# readers fetch any page range without decompressing the whole document.
+
+MAGIC = b"CSPG"
+FORMAT_VERSION = 1
+NORMALIZATION_VERSION = 1  # Bump when normalize_page_text changes
+_INDEX_ENTRY = struct.Struct("<QII")
+_FOOTER = struct.Struct("<4sHIQ")
+
+
+def extractor_version() -> str:
+    """Identifies the extractor + normalization, so upgrades invalidate the cache."""
+    try:
+        from importlib.metadata import version
+        pymupdf_version = version("PyMuPDF")
+    except Exception:
+        pymupdf_version = "unknown"
+    return f"pymupdf{pymupdf_version}-n{NORMALIZATION_VERSION}"
+
+
+def normalize_page_text(text: str) -> str:
+    """
+    Normalizes one page of extracted text: Unicode NFC, Unix newlines,
+    no NUL characters, no trailing whitespace and at most one blank line
+    in a row.
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", text)
+
+
+class CachedDocument:
+    """
+    Read-only view of one cached document. Only the footer and index are
+    read up front; page text is decompressed on demand.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            f.seek(-_FOOTER.size, os.SEEK_END)
+            magic, fmt, page_count, index_offset = _FOOTER.unpack(f.read(_FOOTER.size))
+            if magic != MAGIC or fmt != FORMAT_VERSION:
+                raise ValueError(f"Not a page cache file: {self.path}")
+            f.seek(index_offset)
+            raw_index = f.read(page_count * _INDEX_ENTRY.size)
+        self.page_count = page_count
+        self._index = [
+            _INDEX_ENTRY.unpack_from(raw_index, i * _INDEX_ENTRY.size)
+            for i in range(page_count)
+        ]
+
+    def iter_pages(self, start: int = 0, stop: int = None) -> Iterator[tuple[int, str]]:
+        """
+        Yields (page_number, text) for 0-based pages [start, stop), page
+        numbers starting at 1 - same shape as pdf_extractor.iter_pdf_pages.
+        """
+        stop = self.page_count if stop is None else min(stop, self.page_count)
+        with open(self.path, "rb") as f:
+            for i in range(start, stop):
+                offset, compressed_len, _ = self._index[i]
+                f.seek(offset)
+                yield i + 1, zlib.decompress(f.read(compressed_len)).decode("utf-8")
+
+    def read_page(self, page_number: int) -> str:
+        """Text of one page (1-based)."""
+        for _, text in self.iter_pages(page_number - 1, page_number):
+            return text
+        raise IndexError(f"Page {page_number} out of range (1-{self.page_count})")
+
+    def text(self) -> str:
+        """The whole document, joined like extract_text_from_pdf."""
+        return "".join(text + "\n" for _, text in self.iter_pages()).strip()
+
+    @property
+    def char_count(self) -> int:
+        return sum(text_len for _, _, text_len in self._index)
+
+
+def write_pages(path, pages) -> int:
+    """
+    Streams (page_number, text) pairs into a cache file, atomically.
+    Returns the number of pages written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        index = []
+        with os.fdopen(fd, "wb") as f:
+            for _, text in pages:
+                data = zlib.compress(text.encode("utf-8"), 6)
+                index.append((f.tell(), len(data), len(text)))
+                f.write(data)
+            index_offset = f.tell()
+            for entry in index:
+                f.write(_INDEX_ENTRY.pack(*entry))
+            f.write(_FOOTER.pack(MAGIC, FORMAT_VERSION, len(index), index_offset))
+        os.replace(tmp_path, path)
+        return len(index)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ExtractionCache:
+    """
+    On-disk cache of normalized per-page PDF text.
+
+        cache = ExtractionCache(".cache/extraction")
+        doc = cache.get_or_extract("inputs/cong.pdf")
+        first_pages = list(doc.iter_pages(0, 5))
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.version = extractor_version()
+
+    def path_for(self, sha256: str) -> Path:
+        return self.cache_dir / sha256[:2] / f"{sha256}-{self.version}.pages"
+
+    def get(self, pdf_path, sha256: str = None):
+        """Returns the CachedDocument for this PDF, or None if not cached yet."""
+        path = self.path_for(sha256 or file_sha256(pdf_path))
+        if not path.exists():
+            return None
+        try:
+            return CachedDocument(path)
+        except (ValueError, OSError, struct.error):
+            return None  # Corrupt / old format: treat as a miss
+
+    def get_or_extract(self, pdf_path, workers: int = 1) -> CachedDocument:
+        """
+        Returns the cached document, extracting (and caching) it first if
+        needed. Pages are normalized and written as they are extracted.
+        """
+        sha256 = file_sha256(pdf_path)
+        doc = self.get(pdf_path, sha256)
+        if doc is not None:
+            return doc
+
+        # Imported here so reading the cache never needs PyMuPDF
+        from .pdf_extractor import iter_pdf_pages, iter_pdf_pages_parallel
+        if workers and workers > 1:
+            pages = iter_pdf_pages_parallel(pdf_path, workers)
+        else:
+            pages = iter_pdf_pages(pdf_path)
+
+        path = self.path_for(sha256)
+        write_pages(path, ((n, normalize_page_text(text)) for n, text in pages))
+        return CachedDocument(path)
+
+
+def extract_text_cached(pdf_path, cache_dir=None, workers: int = 1) -> str:
+    """
+    Drop-in for extract_text_from_pdf that goes through the page cache when
+    cache_dir is given. Module-level so it can run in a process pool.
+    """
+    if cache_dir is None:
+        from .pdf_extractor import extract_text_from_pdf
+        return extract_text_from_pdf(pdf_path, workers)
+    return ExtractionCache(cache_dir).get_or_extract(pdf_path, workers).text()
@@ -0,0 +1,132 @@
+# backend/src/llm_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .storage import atomic_write_bytes
+
+# --- Persistent LLM Response Cache ---
+# Responses are stored on disk under a hash of everything that determines
+# the output: provider, model, generation config and the exact prompt.
+# Re-running the pipeline with the same prompts costs no API calls.
+
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+
+
+def make_cache_key(provider: str, model: str, config: dict, prompt: str) -> str:
+    """sha256 over a canonical JSON encoding of the request."""
+    payload = json.dumps(
+        {"provider": provider, "model": model, "config": config or {}, "prompt": prompt},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed store of raw LLM responses, one small JSON file per
+    entry (<cache_dir>/<key[:2]>/<key>.json). Each entry keeps metadata
+    (latency, timestamp, sizes). When the directory grows past `max_bytes`,
+    the least recently used entries are deleted.
+    """
+
+    def __init__(self, cache_dir, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # computed lazily on first write
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        """Returns the cached entry dict (with 'response' and metadata) or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        # Bump the mtime so eviction is least-recently-used, not oldest-written
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, response: str, **metadata) -> None:
+        """Stores a response plus metadata, then evicts if over budget."""
+        entry = {
+            "response": response,
+            "created_at": time.time(),
+            "response_chars": len(response),
+            **metadata,
+        }
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        old_size = path.stat().st_size if path.exists() else 0
+        # Temp file + rename, so a crash never leaves half an entry
+        atomic_write_bytes(path, data)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(data) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        return [p for p in self.cache_dir.glob("*/*.json") if p.is_file()]
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self._entries())
+
+    def _evict(self) -> None:
+        # Must be called with self._lock held. Frees down to 90% of the budget.
+        target = self.max_bytes * 0.9
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
+
+    def clear(self) -> None:
+        """Deletes every cached response."""
+        with self._lock:
+            for p in self._entries():
+                p.unlink(missing_ok=True)
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes": self._total_bytes if self._total_bytes is not None else self._scan_size(),
+                "max_bytes": self.max_bytes,
+            }
@@ -1,69 +1,289 @@
 # backend/src/llm_client.py
 
+import asyncio
+import hashlib
 import importlib
+import time
+
+from .llm_cache import ResponseCache, make_cache_key, DEFAULT_CACHE_MAX_BYTES
+
+# Default model per provider
+DEFAULT_MODELS = {
+    "google": "gemini-2.5-pro", # Note: You may want to update this model name
+    "openai": "gpt-4o-mini", # Using 4o-mini for speed and cost
+    "anthropic": "claude-3-5-sonnet-latest", # Using latest Sonnet
+    "local": "local-synthetic", # Offline provider, see local_provider.py
+}
+
+# Environment variable holding the API key, per provider
+API_KEY_ENV_VARS = {
+    "google": "GOOGLE_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "local": None, # No key needed
+}
+
+# --- Connection / Concurrency Defaults ---
+DEFAULT_TIMEOUT = 120.0       # seconds per request (manifesto prompts are long)
+DEFAULT_MAX_CONNECTIONS = 20  # size of the shared HTTP connection pool
+DEFAULT_MAX_CONCURRENCY = 8   # async requests in flight per client
 
 class LLMClient:
-    def __init__(self, provider: str, api_key: str):
+    def __init__(self, provider: str, api_key: str, model: str = None,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 cache_dir=None,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, refresh_cache: bool = False,
+                 provider_options: dict = None):
         """
         Initialize a general-purpose LLM client.
-        provider: 'google', 'openai', or 'anthropic'
+        provider: 'google', 'openai', 'anthropic', or 'local' (offline replay /
+                  synthetic responses for testing; no API key needed)
+        model: overrides the provider's default model (see DEFAULT_MODELS)
+        timeout: per-request timeout in seconds
+        max_connections: size of the pooled HTTP connections shared by all calls
+        max_concurrency: max in-flight agenerate() calls for this client
+        cache_dir: opt-in on-disk response cache. Identical requests
+                   (provider + model + config + prompt) are answered from disk.
+        refresh_cache: ignore cached responses, call the API and overwrite them.
+        provider_options: extra provider settings (for 'local': the LocalProvider
+                          arguments, e.g. {"latency": "lognormal:2:0.5", "error_rate": 0.05})
         """
         self.provider = provider.lower()
         self.api_key = api_key
         self.model = None
+        self.model_name = model or DEFAULT_MODELS.get(self.provider)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.generation_config = {}
+        self.cache = ResponseCache(cache_dir, cache_max_bytes) if cache_dir else None
+        self.refresh_cache = refresh_cache
+        self.provider_options = provider_options or {}
+
+        # Async state is bound to one event loop; built lazily in _async_setup
+        self._async_loop = None
+        self._async_client = None
+        self._async_http = None
+        self._semaphore = None
+
         self._setup_provider()
 
+    def _http_limits(self):
+        httpx = importlib.import_module("httpx")
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+
     def _setup_provider(self):
         if self.provider == "google":
             self.genai = importlib.import_module("google.generativeai")
             self.genai.configure(api_key=self.api_key)
-            self.model = self.genai.GenerativeModel("gemini-2.5-pro") # Note: You may want to update this model name
+            self.model = self.genai.GenerativeModel(self.model_name)
+            # Tell Gemini we want JSON output
+            self.generation_config = {"response_mime_type": "application/json"}
             self._generate_func = self._generate_gemini
 
         elif self.provider == "openai":
             # We need the 'openai' library
             openai = importlib.import_module("openai")
-            # Create a client instance
-            self.client = openai.OpenAI(api_key=self.api_key)
+            httpx = importlib.import_module("httpx")
+            # Create a client instance with a bounded, reusable connection pool
+            self.client = openai.OpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout,
+                http_client=httpx.Client(limits=self._http_limits(), timeout=self.timeout),
+            )
             self._generate_func = self._generate_openai
 
         elif self.provider == "anthropic":
             # We need the 'anthropic' library
             anthropic = importlib.import_module("anthropic")
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            httpx = importlib.import_module("httpx")
+            self.client = anthropic.Anthropic(
+                api_key=self.api_key,
+                timeout=self.timeout,
+                http_client=httpx.Client(limits=self._http_limits(), timeout=self.timeout),
+            )
+            self.generation_config = {"max_tokens": 4096} # Increased max_tokens
             self._generate_func = self._generate_anthropic
 
+        elif self.provider == "local":
+            from .local_provider import LocalProvider
+            self.client = LocalProvider(**self.provider_options)
+            self._generate_func = self.client.generate
+
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
 
-    def generate(self, prompt: str) -> str:
-        """Generate text using the configured model."""
-        return self._generate_func(prompt)
+    def cache_key(self, prompt: str) -> str:
+        """The response cache key for a prompt with this client's settings."""
+        return make_cache_key(self.provider, self.model_name, self.generation_config, prompt)
 
-    def _generate_gemini(self, prompt: str) -> str:
-        # Tell Gemini we want JSON output
-        generation_config = self.genai.GenerationConfig(
-            response_mime_type="application/json"
+    def generate(self, prompt: str, use_cache: bool = True) -> str:
+        """
+        Generate text using the configured model.
+        If a cache is configured, identical requests are served from disk.
+        """
+        if self.cache is None or not use_cache:
+            return self._generate_func(prompt)
+
+        key = self.cache_key(prompt)
+        if not self.refresh_cache:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry["response"]
+
+        start = time.perf_counter()
+        response = self._generate_func(prompt)
+        self._store(key, prompt, response, time.perf_counter() - start)
+        return response
+
+    def _store(self, key: str, prompt: str, response: str, latency: float):
+        self.cache.put(
+            key, response,
+            provider=self.provider,
+            model=self.model_name,
+            latency_s=round(latency, 3),
+            prompt_chars=len(prompt),
+            # Lets the local provider replay recorded responses by prompt
+            prompt_sha256=hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
         )
-        
+
+    def _generate_gemini(self, prompt: str) -> str:
+        generation_config = self.genai.GenerationConfig(**self.generation_config)
+
         response = self.model.generate_content(
             prompt,
-            generation_config=generation_config
+            generation_config=generation_config,
+            request_options={"timeout": self.timeout}
         )
         return response.text
 
     def _generate_openai(self, prompt: str) -> str:
         # Note: Updated to use the new OpenAI client (v1.0+)
         response = self.client.chat.completions.create(
-            model="gpt-4o-mini", # Using 4o-mini for speed and cost
+            model=self.model_name,
             messages=[{"role": "user", "content": prompt}],
         )
         return response.choices[0].message.content
 
     def _generate_anthropic(self, prompt: str) -> str:
         response = self.client.messages.create(
-            model="claude-3-5-sonnet-latest", # Using latest Sonnet
-            max_tokens=4096, # Increased max_tokens
+            model=self.model_name,
             messages=[{"role": "user", "content": prompt}],
+            **self.generation_config,
+        )
+        return response.content[0].text
+
+    # --- Async API ---
+    # One event loop can fan out many calls: they share one pooled HTTP
+    # client and are capped by a per-client semaphore (max_concurrency).
+
+    async def _async_setup(self):
+        loop = asyncio.get_running_loop()
+        if self._async_loop is loop:
+            return
+        if self._async_loop is not None and self._async_loop.is_running():
+            raise RuntimeError("LLMClient is already in use by another event loop; call aclose() there first.")
+        # (Re)build the loop-bound pieces for this loop with no await in
+        # between, so concurrent first calls on it all see one setup; only
+        # then close the pool left over from the previous loop
+        old_http, self._async_http, self._async_client = self._async_http, None, None
+        self._async_loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self.provider == "openai":
+            openai = importlib.import_module("openai")
+            httpx = importlib.import_module("httpx")
+            self._async_http = httpx.AsyncClient(limits=self._http_limits(), timeout=self.timeout)
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key, timeout=self.timeout, http_client=self._async_http
+            )
+        elif self.provider == "anthropic":
+            anthropic = importlib.import_module("anthropic")
+            httpx = importlib.import_module("httpx")
+            self._async_http = httpx.AsyncClient(limits=self._http_limits(), timeout=self.timeout)
+            self._async_client = anthropic.AsyncAnthropic(
+                api_key=self.api_key, timeout=self.timeout, http_client=self._async_http
+            )
+        # Gemini: GenerativeModel has generate_content_async on its own gRPC channel
+
+        if old_http is not None:
+            try:
+                await old_http.aclose()
+            except Exception as e:
+                print(f"Warning: Could not close the previous async HTTP client: {e}")
+
+    async def agenerate(self, prompt: str, use_cache: bool = True) -> str:
+        """Async version of generate(), limited to max_concurrency calls in flight."""
+        await self._async_setup()
+
+        key = None
+        if self.cache is not None and use_cache:
+            key = self.cache_key(prompt)
+            if not self.refresh_cache:
+                entry = await asyncio.to_thread(self.cache.get, key)
+                if entry is not None:
+                    return entry["response"]
+
+        async with self._semaphore:
+            start = time.perf_counter()
+            response = await self._agenerate_func(prompt)
+            latency = time.perf_counter() - start
+
+        if key is not None:
+            await asyncio.to_thread(self._store, key, prompt, response, latency)
+        return response
+
+    async def agenerate_many(self, prompts: list[str], return_exceptions: bool = False) -> list:
+        """
+        Runs agenerate() for every prompt concurrently (bounded by
+        max_concurrency) and returns the results in prompt order.
+        With return_exceptions=True, failed prompts yield their exception.
+        """
+        return await asyncio.gather(
+            *(self.agenerate(p) for p in prompts),
+            return_exceptions=return_exceptions
         )
-        return response.content[0].text
\ No newline at end of file
+
+    async def aclose(self):
+        """Closes the pooled async HTTP connections."""
+        if self._async_http is not None:
+            await self._async_http.aclose()
+        self._async_http = None
+        self._async_client = None
+        self._async_loop = None
+
+    async def _agenerate_func(self, prompt: str) -> str:
+        if self.provider == "google":
+            generation_config = self.genai.GenerationConfig(**self.generation_config)
+            response = await self.model.generate_content_async(
+                prompt,
+                generation_config=generation_config,
+                request_options={"timeout": self.timeout}
+            )
+            return response.text
+
+        if self.provider == "openai":
+            response = await self._async_client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            return response.choices[0].message.content
+
+        if self.provider == "anthropic":
+            response = await self._async_client.messages.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                **self.generation_config,
+            )
+            return response.content[0].text
+
+        if self.provider == "local":
+            return await self.client.agenerate(prompt)
+
+        # Providers without a native async client: run the blocking call in a thread
+        return await asyncio.to_thread(self._generate_func, prompt)
@@ -0,0 +1,213 @@
+# backend/src/local_provider.py
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from .manifesto_analyzer import POLICY_TAGS
+
+# --- Local (offline) LLM Provider ---
+# Stands in for a real provider so the analysis pipeline can be run and
+# load-tested without network access or API keys. It either replays
+# responses recorded by the LLM response cache (see llm_cache.py) or
+# synthesizes schema-valid answers, with configurable latency, error rate
+# and rate limiting.
+
+
+class LocalServerError(Exception):
+    """Simulated transient provider failure (retryable, like a 5xx)."""
+    status_code = 500
+
+
+class LocalRateLimitError(Exception):
+    """Simulated 429 response."""
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_latency(spec) -> tuple:
+    """
+    Parses a latency distribution spec (all values in seconds):
+        "0.5" or "fixed:0.5"        always 0.5s
+        "uniform:0.2:2.0"           uniform between 0.2s and 2.0s
+        "normal:1.0:0.3"            mean 1.0s, std 0.3s (clipped at 0)
+        "lognormal:1.5:0.5"         median 1.5s, log-space sigma 0.5
+    """
+    if isinstance(spec, (int, float)):
+        return ("fixed", float(spec))
+    kind, *values = str(spec).split(":")
+    if not values:
+        return ("fixed", float(kind))
+    values = tuple(float(v) for v in values)
+    expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+    if kind not in expected or len(values) != expected[kind]:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+    return (kind, *values)
+
+
+class LocalProvider:
+    """
+    Offline LLM provider.
+
+    replay_dir:      a response cache directory recorded by LLMClient(cache_dir=...);
+                     prompts found there are answered with the recorded response
+    latency:         latency distribution spec, see parse_latency()
+    latency_per_1k_tokens: extra seconds per ~1000 prompt tokens
+    error_rate:      probability of raising LocalServerError
+    rate_limit_rate: probability of raising LocalRateLimitError
+    rpm_limit:       simulated server-side quota; calls above it get a 429
+    malformed_rate:  probability of cutting a response short (like a model
+                     hitting its output limit), to exercise output repair
+    seed:            makes latencies/errors reproducible
+    """
+
+    def __init__(self, replay_dir=None, latency="fixed:0", latency_per_1k_tokens: float = 0.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 rpm_limit: float = None, malformed_rate: float = 0.0, seed: int = None):
+        self.latency = parse_latency(latency)
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm_limit = rpm_limit
+        self.malformed_rate = malformed_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = []  # call timestamps in the last 60s (for rpm_limit)
+        self._replay = self._load_replay(replay_dir) if replay_dir else {}
+        self.stats = {
+            "calls": 0, "replayed": 0, "synthesized": 0,
+            "errors": 0, "rate_limited": 0, "malformed": 0, "simulated_seconds": 0.0,
+        }
+
+    @staticmethod
+    def _load_replay(replay_dir) -> dict:
+        # Index recorded responses by the sha256 of their prompt
+        replay = {}
+        for path in Path(replay_dir).glob("*/*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if "prompt_sha256" in entry and "response" in entry:
+                replay[entry["prompt_sha256"]] = entry["response"]
+        return replay
+
+    # --- Simulation ---
+
+    def _sample_latency(self, prompt: str) -> float:
+        kind, *values = self.latency
+        if kind == "fixed":
+            latency = values[0]
+        elif kind == "uniform":
+            latency = self._rng.uniform(values[0], values[1])
+        elif kind == "normal":
+            latency = max(0.0, self._rng.gauss(values[0], values[1]))
+        else:  # lognormal: values = (median, sigma)
+            latency = self._rng.lognormvariate(math.log(max(values[0], 1e-9)), values[1])
+        return latency + self.latency_per_1k_tokens * (len(prompt) / 4000)
+
+    def _admit(self, prompt: str) -> float:
+        """Decides the fate of one call: raises a simulated error or returns its latency."""
+        with self._lock:
+            self.stats["calls"] += 1
+            now = time.monotonic()
+            if self.rpm_limit:
+                self._window = [t for t in self._window if now - t < 60]
+                if len(self._window) >= self.rpm_limit:
+                    self.stats["rate_limited"] += 1
+                    raise LocalRateLimitError(
+                        "Simulated quota exceeded", retry_after=60 - (now - self._window[0])
+                    )
+                self._window.append(now)
+            roll = self._rng.random()
+            if roll < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                raise LocalRateLimitError("Simulated rate limit", retry_after=1.0)
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.stats["errors"] += 1
+                raise LocalServerError("Simulated server error")
+            latency = self._sample_latency(prompt)
+            self.stats["simulated_seconds"] += latency
+            return latency
+
+    def respond(self, prompt: str) -> str:
+        """The response text for a prompt: recorded if available, else synthesized."""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            truncate_at = self._rng.random() if self._rng.random() < self.malformed_rate else None
+            if truncate_at is not None:
+                self.stats["malformed"] += 1
+            if prompt_hash in self._replay:
+                self.stats["replayed"] += 1
+                response = self._replay[prompt_hash]
+            else:
+                self.stats["synthesized"] += 1
+                response = None
+        if response is None:
+            response = synthesize_response(prompt, prompt_hash)
+        if truncate_at is not None:
+            response = response[:int(len(response) * truncate_at)]
+        return response
+
+    def generate(self, prompt: str) -> str:
+        time.sleep(self._admit(prompt))
+        return self.respond(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        await asyncio.sleep(self._admit(prompt))
+        return self.respond(prompt)
+
+
+def synthesize_response(prompt: str, prompt_hash: str = None) -> str:
+    """
+    Builds a plausible response for our prompt types. Scores are derived
+    from the prompt hash, so the same prompt always gets the same answer.
+    - analysis / chunk prompts -> JSON in the policy_scores schema
+    - batched simplification prompts -> JSON echoing every passage
+    - anything else (e.g. simplification) -> the input text, lightly wrapped
+    """
+    prompt_hash = prompt_hash or hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    rng = random.Random(prompt_hash)
+
+    if '"policy_scores"' in prompt:
+        chunked = '"mentioned"' in prompt
+        policy_scores = {}
+        for tag in POLICY_TAGS:
+            mentioned = rng.random() < 0.7
+            score = rng.randint(1, 5) if mentioned else 3
+            entry = {
+                "score": score,
+                "explanation": (
+                    f"Synthetic stance on {tag} (score {score})."
+                    if mentioned else "This policy was not clearly mentioned."
+                ),
+            }
+            if chunked:
+                entry = {"mentioned": mentioned, **entry}
+            policy_scores[tag] = entry
+        return json.dumps({
+            "summary": "Synthetic summary generated by the local provider. It is only meant for offline testing.",
+            "policy_scores": policy_scores,
+        }, indent=2)
+
+    if '"simplified"' in prompt and "Passages:" in prompt:
+        # Batched simplification: echo every numbered passage back
+        passages = re.findall(r"^\[(\d+)\]\n(.*?)(?=\n\n\[\d+\]\n|\Z)",
+                              prompt.split("Passages:", 1)[1].strip(), re.MULTILINE | re.DOTALL)
+        return json.dumps({
+            "simplified": [{"id": int(i), "text": text.strip()} for i, text in passages]
+        }, indent=2)
+
+    marker = "Text to simplify:"
+    text = prompt.split(marker, 1)[1].strip() if marker in prompt else prompt[-500:].strip()
+    return f"Simplified Policy Text\n\n{text}"
@@ -1,7 +1,6 @@
 # backend/src/manifesto_analyzer.py
 
 import json
-import re
 
 # These are the 10 policy tags from your original quiz generator.
 # We MUST get a score and explanation for *every single one* from the LLM.
@@ -104,23 +103,260 @@ You must output *only* the JSON object in the exact schema below. Do not include
 ---
 """
 
+def build_chunk_prompt(chunk_text: str, chunk_index: int, chunk_count: int) -> str:
+    """
+    Prompt for one chunk of a long manifesto (map step of chunked analysis).
+    Same scoring scale as build_analysis_prompt, but the LLM also says
+    whether each policy is actually discussed in this excerpt, so chunks that
+    don't mention a policy don't drag its score towards Neutral.
+    """
+    policy_list = "\n".join([f"- {tag}" for tag in POLICY_TAGS])
+
+    # Same schema as the full analysis, plus a "mentioned" flag per policy
+    policy_schema = ",\n".join(
+        f'    "{tag}": {{\n'
+        f'      "mentioned": <true|false>,\n'
+        f'      "score": <1-5>,\n'
+        f'      "explanation": "<Simple 1-sentence explanation of the stance on {tag}>"\n'
+        f'    }}'
+        for tag in POLICY_TAGS
+    )
+    json_schema = (
+        "{\n"
+        '  "summary": "A 1-2 sentence, simple-language overview of this excerpt.",\n'
+        '  "policy_scores": {\n'
+        f"{policy_schema}\n"
+        "  }\n"
+        "}"
+    )
+
+    return f"""
+You are a precise, non-partisan political analyst. You are reading part {chunk_index + 1} of {chunk_count} of a political manifesto. Analyze ONLY this excerpt and output a structured JSON.
+
+**Instructions:**
+1.  For **each** of the 10 policy areas listed below, set "mentioned" to true only if this excerpt clearly discusses it.
+2.  If it is mentioned, assign a score from 1 to 5:
+    * **1 = Strong Left/Progressive:** (e.g., high government spending, strong regulation, social programs)
+    * **2 = Moderate Left/Progressive**
+    * **3 = Neutral / Centrist:** (e.g., mixed policies, no strong stance)
+    * **4 = Moderate Right/Conservative**
+    * **5 = Strong Right/Conservative:** (e.g., tax cuts, free market, privatization)
+3.  If a policy is **not mentioned** in this excerpt, set "mentioned" to false, the score to **3** and the explanation to "This policy was not clearly mentioned."
+4.  For **each** policy, you MUST also provide a simple, one-sentence "explanation" of that stance, written in plain language a layman can understand.
+5.  You MUST provide a 1-2 sentence "summary" of this excerpt.
+
+**Policy Areas to Score:**
+{policy_list}
+
+**Output Format:**
+You must output *only* the JSON object in the exact schema below. Do not include "```json", "```", or any other text.
+
+**Schema:**
+{json_schema}
+
+**Manifesto Excerpt (part {chunk_index + 1} of {chunk_count}):**
+---
+{chunk_text}
+---
+"""
+
+# --- Parsing and Validation ---
+
+SCORE_MIN, SCORE_MAX = 1, 5
+NOT_MENTIONED = "This policy was not clearly mentioned."
+_MAX_SALVAGE_ATTEMPTS = 200
+
+
+def _close_truncated_json(text: str):
+    """
+    Best-effort fix for JSON cut off mid-way (e.g. the LLM hit its output
+    token limit): cuts back to the last complete value and closes every
+    open object/array. Returns the parsed value or None.
+    """
+    stack, cut_points = [], []  # cut_points: (end index, open brackets at that point)
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                cut_points.append((i + 1, tuple(stack)))
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            cut_points.append((i + 1, tuple(stack)))
+            if not stack:
+                break
+        elif ch == ",":
+            cut_points.append((i, tuple(stack)))
+        elif ch.isdigit() or ch in "el":  # end of a number / true / false / null
+            cut_points.append((i + 1, tuple(stack)))
+
+    for end, open_brackets in reversed(cut_points[-_MAX_SALVAGE_ATTEMPTS:]):
+        closing = "".join("}" if b == "{" else "]" for b in reversed(open_brackets))
+        try:
+            return json.loads(text[:end] + closing)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def salvage_json(output_text: str):
+    """
+    Extracts the first JSON object from LLM output. Text around the object
+    (e.g. "```json" fences or chatter) is ignored; a truncated object is
+    closed and whatever was complete is kept. Returns a dict or None.
+    """
+    decoder = json.JSONDecoder()
+    start = output_text.find("{")
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(output_text, start)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            value = _close_truncated_json(output_text[start:])
+            if isinstance(value, dict):
+                return value
+        start = output_text.find("{", start + 1)
+    return None
+
+
 def parse_llm_output(output_text: str) -> dict:
     """
     Cleans and parses the LLM's string output into a Python dictionary.
+    Surrounding text is ignored and truncated JSON is salvaged where
+    possible (see salvage_json); use validate_analysis to check the schema.
     """
-    # The LLM might still add "```json" or "```"
-    # We use regex to find the first '{' and the last '}'
-    match = re.search(r'\{.*\}', output_text, re.DOTALL)
-    
-    if not match:
+    data = salvage_json(output_text)
+    if data is None:
         print("LLM output did not contain a valid JSON object.")
-        print(f"--- Raw LLam Output ---\n{output_text}\n-------------------")
+        print(f"--- Raw LLM Output ---\n{output_text}\n-------------------")
         raise ValueError("No JSON object found in LLM output.")
-        
-    json_string = match.group(0)
-    
-    try:
-        return json.loads(json_string)
-    except json.JSONDecodeError as e:
-        print(f"JSON Decode Error. LLM output was:\n{json_string}")
-        raise e
\ No newline at end of file
+    return data
+
+
+def _coerce_score(value):
+    """An integer score in SCORE_MIN..SCORE_MAX, or None. Accepts 4, 4.0 and "4"."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)) and float(value).is_integer():
+        score = int(value)
+        if SCORE_MIN <= score <= SCORE_MAX:
+            return score
+    return None
+
+
+def validate_analysis(data: dict, tags: list = None, require_mentioned: bool = False):
+    """
+    Checks a parsed analysis against the POLICY_TAGS schema.
+
+    Returns (clean, problems):
+    - clean: {"summary", "policy_scores"} with only the valid entries, scores
+      normalized to ints; extra fields (like "mentioned") are kept
+    - problems: {tag or "summary": reason} for everything missing or invalid
+    Tag names are matched case- and whitespace-insensitively.
+    """
+    tags = POLICY_TAGS if tags is None else tags
+    problems = {}
+    clean = {"policy_scores": {}}
+
+    summary = data.get("summary") if isinstance(data, dict) else None
+    if isinstance(summary, str) and summary.strip():
+        clean["summary"] = summary.strip()
+    else:
+        problems["summary"] = "missing"
+
+    raw_scores = data.get("policy_scores") if isinstance(data, dict) else None
+    if not isinstance(raw_scores, dict):
+        raw_scores = {}
+    by_key = {str(k).strip().lower(): v for k, v in raw_scores.items()}
+
+    for tag in tags:
+        entry = raw_scores.get(tag, by_key.get(tag.lower()))
+        if entry is None:
+            problems[tag] = "missing"
+            continue
+        if not isinstance(entry, dict):
+            problems[tag] = "not an object"
+            continue
+        score = _coerce_score(entry.get("score"))
+        if score is None:
+            problems[tag] = f"invalid score {entry.get('score')!r}"
+            continue
+        explanation = entry.get("explanation")
+        if not isinstance(explanation, str) or not explanation.strip():
+            problems[tag] = "missing explanation"
+            continue
+        if require_mentioned and not isinstance(entry.get("mentioned"), bool):
+            problems[tag] = "missing 'mentioned' flag"
+            continue
+        clean["policy_scores"][tag] = {**entry, "score": score, "explanation": explanation.strip()}
+
+    return clean, problems
+
+
+def build_repair_prompt(context_text: str, tags: list, need_summary: bool = False,
+                        with_mentioned: bool = False) -> str:
+    """
+    A small follow-up prompt asking only for the policy tags (and summary)
+    that were missing or invalid in an earlier answer. context_text should
+    be the passages relevant to those tags, not the whole manifesto.
+    """
+    mentioned = '      "mentioned": <true|false>,\n' if with_mentioned else ""
+    policy_schema = ",\n".join(
+        f'    "{tag}": {{\n'
+        f"{mentioned}"
+        f'      "score": <1-5>,\n'
+        f'      "explanation": "<Simple 1-sentence explanation of the stance on {tag}>"\n'
+        f'    }}'
+        for tag in tags
+    )
+    summary_line = (
+        '  "summary": "A 2-3 sentence, simple-language overview of the manifesto\'s main focus and tone.",\n'
+        if need_summary else ""
+    )
+    json_schema = "{\n" + summary_line + '  "policy_scores": {\n' + policy_schema + "\n  }\n}"
+    policy_list = "\n".join(f"- {tag}" for tag in tags)
+
+    return f"""
+You are a precise, non-partisan political analyst. Using the manifesto passages below, score ONLY the policy areas listed and output a structured JSON.
+
+**Instructions:**
+1.  For **each** policy area listed, assign a score from 1 to 5:
+    * **1 = Strong Left/Progressive:** (e.g., high government spending, strong regulation, social programs)
+    * **2 = Moderate Left/Progressive**
+    * **3 = Neutral / Centrist:** (e.g., mixed policies, no strong stance, or not mentioned)
+    * **4 = Moderate Right/Conservative**
+    * **5 = Strong Right/Conservative:** (e.g., tax cuts, free market, privatization)
+2.  If a policy is **not mentioned** or the stance is unclear, assign a score of **3 (Neutral)** and set the explanation to "{NOT_MENTIONED}"
+3.  For **each** policy, provide a simple, one-sentence "explanation" in plain language.
+
+**Policy Areas to Score:**
+{policy_list}
+
+**Output Format:**
+You must output *only* the JSON object in the exact schema below. Do not include "```json", "```", or any other text.
+
+**Schema:**
+{json_schema}
+
+**Relevant Manifesto Passages:**
+---
+{context_text}
+---
+"""
@@ -0,0 +1,247 @@
+# backend/src/metrics.py
+
+import bisect
+import threading
+import time
+
+# --- Lightweight Metrics ---
+# Counters, gauges and histograms rendered in the Prometheus text format
+# (version 0.0.4), without pulling in prometheus_client. Each observation
+# is a dict lookup, a bisect and a few additions under a lock, so it is
+# cheap enough for the /api/align hot path.
+#
+# Metrics live in this process only: with several server workers, each
+# worker reports its own numbers.
+
+# Seconds: 1ms .. 10s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes: 100B .. 10MB
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A monotonically increasing count, e.g. requests served."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        super().__init__(name, help_text, labels)
+        self._values = {}  # label values -> count
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, count in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_format_value(count)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    A value that can go up and down. With `callback`, the value is read
+    when metrics are rendered: callback() -> {label values tuple: value}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), callback=None):
+        super().__init__(name, help_text, labels)
+        self._values = {}
+        self.callback = callback
+
+    def set(self, value: float, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        if self.callback is not None:
+            items = sorted(self.callback().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        for values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets, plus their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self, *label_values) -> dict:
+        """{"count", "sum", "buckets": {upper bound: cumulative count}} for one series."""
+        with self._lock:
+            series = list(self._series.get(label_values, [0] * (len(self.buckets) + 1) + [0.0]))
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {"count": cumulative, "sum": series[-1], "buckets": buckets}
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            keys = sorted(self._series)
+        for values in keys:
+            snap = self.snapshot(*values)
+            for bound, count in snap["buckets"].items():
+                labels = _format_labels(self.label_names, values, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(snap['sum'])}")
+            lines.append(f"{self.name}_count{labels} {snap['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """A named set of metrics that renders to Prometheus text."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        full_name = self.prefix + name
+        with self._lock:
+            if full_name not in self._metrics:
+                self._metrics[full_name] = cls(full_name, *args, **kwargs)
+            return self._metrics[full_name]
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: tuple = (), callback=None) -> Gauge:
+        return self._register(Gauge, name, help_text, labels, callback=callback)
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# --- Pipeline Run Report ---
+
+class RunReport:
+    """
+    Collects per-item stage timings and sizes for a batch run (e.g. one
+    1_run_analysis.py run) and summarizes them as a JSON-ready dict.
+
+        report = RunReport()
+        report.record("cong.pdf", extraction_seconds=1.2, prompt_tokens=30500)
+        report.to_dict()
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def record(self, item: str, **fields) -> None:
+        """Adds fields to an item. Numeric fields recorded more than once add up."""
+        with self._lock:
+            entry = self._items.setdefault(item, {})
+            for key, value in fields.items():
+                if key in entry and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    entry[key] += value
+                else:
+                    entry[key] = value
+
+    def items(self) -> dict:
+        with self._lock:
+            return {name: dict(fields) for name, fields in self._items.items()}
+
+    def to_dict(self, **extra) -> dict:
+        """Per-item fields plus min/mean/max/total of every numeric field."""
+        items = self.items()
+        totals = {}
+        for fields in items.values():
+            for key, value in fields.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals.setdefault(key, []).append(value)
+        summary = {
+            key: {
+                "min": round(min(values), 4),
+                "mean": round(sum(values) / len(values), 4),
+                "max": round(max(values), 4),
+                "total": round(sum(values), 4),
+            }
+            for key, values in sorted(totals.items())
+        }
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started_at)),
+            "wall_seconds": round(time.perf_counter() - self._start, 3),
+            **extra,
+            "summary": summary,
+            "items": items,
+        }
+
+
+def timed_call(func, *args, **kwargs):
+    """Returns (func(*args, **kwargs), seconds). Module-level so it can run in a process pool."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
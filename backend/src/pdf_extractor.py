@@ -1,18 +1,110 @@
 # backend/src/pdf_extractor.py
 
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator
+
 import fitz  # PyMuPDF
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract clean text from a PDF using PyMuPDF."""
-    try:
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text("text") + "\n"
-        doc.close()
-        return text.strip()
+# Below this many pages, starting worker processes costs more than it saves.
+PARALLEL_MIN_PAGES = 64
 
+
+def _open_pdf(pdf_path: str):
+    try:
+        return fitz.open(pdf_path)
     except FileNotFoundError:
         raise FileNotFoundError(f"Error: The file '{pdf_path}' was not found.")
     except Exception as e:
-        raise RuntimeError(f"An error occurred while reading the PDF: {e}")
\ No newline at end of file
+        raise RuntimeError(f"An error occurred while reading the PDF: {e}")
+
+
+def get_pdf_page_count(pdf_path: str) -> int:
+    """Returns the number of pages in a PDF."""
+    doc = _open_pdf(pdf_path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def iter_pdf_pages(pdf_path: str, start: int = 0, stop: int = None) -> Iterator[tuple[int, str]]:
+    """
+    Lazily yields (page_number, text) for each page, page numbers starting at 1.
+    Only one page's text is held at a time, so memory stays flat for big PDFs.
+    start/stop are 0-based page indices (stop is exclusive), like range().
+    """
+    doc = _open_pdf(pdf_path)
+    try:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        for index in range(start, stop):
+            try:
+                text = doc.load_page(index).get_text("text")
+            except Exception as e:
+                raise RuntimeError(f"An error occurred while reading the PDF: {e}")
+            yield index + 1, text
+    finally:
+        doc.close()
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> list[str]:
+    # Runs inside a worker process: each worker opens its own document.
+    return [text for _, text in iter_pdf_pages(pdf_path, start, stop)]
+
+
+def iter_pdf_pages_parallel(pdf_path: str, workers: int = None, pages_per_task: int = None) -> Iterator[tuple[int, str]]:
+    """
+    Like iter_pdf_pages, but splits the document into page ranges that are
+    extracted by a pool of worker processes. Pages are still yielded in order.
+    """
+    workers = workers or os.cpu_count() or 1
+    page_count = get_pdf_page_count(pdf_path)
+    if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        yield from iter_pdf_pages(pdf_path)
+        return
+
+    # A few ranges per worker keeps them busy even if some pages are heavier.
+    if pages_per_task is None:
+        pages_per_task = max(1, -(-page_count // (workers * 4)))
+    ranges = [
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+
+    # Only a bounded window of ranges is in flight, so finished ranges the
+    # consumer hasn't reached yet don't pile up in memory
+    window = 2 * workers
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        pending = deque()
+        next_range = iter(ranges)
+
+        def top_up():
+            for start, stop in islice(next_range, window - len(pending)):
+                pending.append((start, pool.submit(_extract_page_range, str(pdf_path), start, stop)))
+
+        top_up()
+        # Reassemble in document order, dropping each range once yielded
+        while pending:
+            start, future = pending.popleft()
+            texts = future.result()
+            del future
+            top_up()
+            for offset, text in enumerate(texts):
+                yield start + offset + 1, text
+            del texts
+
+
+def extract_text_from_pdf(pdf_path: str, workers: int = 1) -> str:
+    """
+    Extract clean text from a PDF using PyMuPDF.
+    Set workers > 1 to extract large PDFs with multiple processes.
+    """
+    if workers and workers > 1:
+        pages = iter_pdf_pages_parallel(pdf_path, workers)
+    else:
+        pages = iter_pdf_pages(pdf_path)
+
+    # Join once at the end instead of growing a string page by page
+    return "".join(text + "\n" for _, text in pages).strip()
@@ -0,0 +1,104 @@
+# backend/src/policy_lexicon.py
+
+import re
+
+from .manifesto_analyzer import POLICY_TAGS
+
+# --- Policy Keyword Lexicons ---
+# A few stems per policy tag, used to find the passages of a manifesto that
+# talk about a given policy (e.g. for small repair prompts). Matching is
+# case-insensitive on word starts, so "farm" matches "farmers" and "farming".
+
+TAG_KEYWORDS = {
+    "Economy": [
+        "econom", "gdp", "tax", "gst", "inflation", "price", "employment", "unemploy",
+        "jobs", "wage", "industr", "msme", "business", "investment", "fiscal", "budget",
+        "privati", "market", "trade", "manufactur", "income", "poverty",
+    ],
+    "Education": [
+        "educat", "school", "universit", "college", "student", "teacher", "literacy",
+        "scholarship", "curricul", "skill", "learning", "exam",
+    ],
+    "Technology": [
+        "technolog", "digital", "internet", "broadband", "data", "privacy", "cyber",
+        "artificial intelligence", "startup", "innovation", "research", "telecom", "5g",
+    ],
+    "Environment": [
+        "environment", "climate", "pollution", "forest", "emission", "renewable",
+        "solar", "green", "wildlife", "conservation", "water", "river", "waste", "carbon",
+    ],
+    "Healthcare": [
+        "health", "hospital", "medic", "doctor", "nurse", "insurance", "disease",
+        "ayushman", "vaccin", "nutrition", "sanitation", "clinic",
+    ],
+    "Defense": [
+        "defen", "military", "army", "navy", "air force", "armed forces", "soldier",
+        "agnipath", "veteran", "border", "security", "terror", "national security",
+    ],
+    "Infrastructure": [
+        "infrastructur", "road", "highway", "railway", "rail", "airport", "port",
+        "housing", "electricity", "power", "urban", "smart cit", "transport", "metro",
+    ],
+    "Foreign Policy": [
+        "foreign", "diplomac", "international", "neighbour", "neighbor", "china",
+        "pakistan", "global", "united nations", "bilateral", "external affairs", "diaspora",
+    ],
+    "Social Justice": [
+        "social justice", "caste", "dalit", "tribal", "adivasi", "minorit", "women",
+        "gender", "reservation", "equality", "discriminat", "rights", "lgbt", "disab",
+        "marginali", "welfare", "pension",
+    ],
+    "Agriculture": [
+        "agricult", "farm", "crop", "msp", "kisan", "irrigation", "fertili", "rural",
+        "fisher", "dairy", "harvest", "land",
+    ],
+}
+
+_TAG_PATTERNS = {
+    tag: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")", re.IGNORECASE)
+    for tag, keywords in TAG_KEYWORDS.items()
+}
+
+
+def tag_pattern(tag: str):
+    """Compiled keyword regex for a tag (falls back to the tag name itself)."""
+    pattern = _TAG_PATTERNS.get(tag)
+    if pattern is None:
+        pattern = re.compile(r"\b" + re.escape(tag), re.IGNORECASE)
+    return pattern
+
+
+def split_paragraphs(text: str) -> list[str]:
+    return [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+
+
+def relevant_passages(text: str, tags: list = None, max_chars: int = 24_000) -> str:
+    """
+    The paragraphs of `text` that mention any of `tags`, in document order,
+    up to ~max_chars. Paragraphs with the most keyword hits are kept first
+    when the budget is tight. Falls back to the start of the text if
+    nothing matches.
+    """
+    tags = POLICY_TAGS if tags is None else tags
+    patterns = [tag_pattern(tag) for tag in tags]
+    paragraphs = split_paragraphs(text)
+
+    hits = []
+    for i, paragraph in enumerate(paragraphs):
+        count = sum(len(p.findall(paragraph)) for p in patterns)
+        if count:
+            hits.append((count, i))
+    if not hits:
+        return text[:max_chars]
+
+    selected, used = [], 0
+    for count, i in sorted(hits, key=lambda h: (-h[0], h[1])):
+        length = len(paragraphs[i]) + 2
+        if used + length > max_chars:
+            continue
+        selected.append(i)
+        used += length
+    if not selected:
+        # Every matching paragraph is over budget on its own: cut the best one
+        return paragraphs[min(hits, key=lambda h: (-h[0], h[1]))[1]][:max_chars]
+    return "\n\n".join(paragraphs[i] for i in sorted(selected))
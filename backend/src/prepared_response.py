@@ -0,0 +1,75 @@
+# backend/src/prepared_response.py
+
+import gzip
+import hashlib
+import importlib
+
+# --- Pre-serialized Responses ---
+# /api/quiz and /api/manifestos return the same body to every client until
+# the dataset changes. Instead of re-serializing on each request, the body
+# is serialized and compressed once per dataset version (see
+# DatasetSnapshot.derive) and served as bytes, with an ETag so repeat
+# visitors and CDN edges can revalidate with a 304 and no body.
+
+GZIP_LEVEL = 9      # Compressed once per dataset version, so use the best ratio
+BROTLI_QUALITY = 11
+MIN_COMPRESS_BYTES = 256  # Smaller bodies aren't worth compressing
+
+try:
+    _brotli = importlib.import_module("brotli")  # Optional: pip install brotli
+except ImportError:
+    _brotli = None
+
+
+class PreparedResponse:
+    """
+    A response body stored as identity, gzip and (if available) brotli bytes.
+
+    The ETag is the sha256 of the uncompressed body. Each encoding gets its
+    own strong ETag ('"<hash>"', '"<hash>-gzip"', '"<hash>-br"'), as the bytes
+    differ, but a validator for any encoding matches the content.
+    """
+
+    def __init__(self, body: bytes, mimetype: str = "application/json"):
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.bodies["gzip"] = gzip.compress(body, GZIP_LEVEL, mtime=0)
+            if _brotli is not None:
+                self.bodies["br"] = _brotli.compress(body, quality=BROTLI_QUALITY)
+
+    def etag(self, encoding: str = "identity") -> str:
+        """Unquoted strong ETag for one encoding."""
+        return self.digest if encoding == "identity" else f"{self.digest}-{encoding}"
+
+    def matches(self, etags) -> bool:
+        """True if any of the client's (unquoted) If-None-Match ETags is ours."""
+        return any(
+            tag == "*" or tag.split("-", 1)[0] == self.digest
+            for tag in etags
+        )
+
+    def choose_encoding(self, accept_encodings) -> str:
+        """
+        Best encoding the client accepts. accept_encodings is a Werkzeug
+        MIMEAccept-like object (request.accept_encodings) or a list of names.
+        """
+        for encoding in ("br", "gzip"):
+            if encoding not in self.bodies:
+                continue
+            quality = (
+                accept_encodings.quality(encoding)
+                if hasattr(accept_encodings, "quality")
+                else float(encoding in accept_encodings)
+            )
+            if quality > 0:
+                return encoding
+        return "identity"
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(body) for body in self.bodies.values())
+
+    def sizes(self) -> dict:
+        return {encoding: len(body) for encoding, body in self.bodies.items()}
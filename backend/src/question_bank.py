@@ -0,0 +1,90 @@
+# backend/src/question_bank.py
+
+from .manifesto_analyzer import POLICY_TAGS
+
+# --- Predefined question templates per policy tag ---
+# (This is from your qqgen.ipynb)
+# 2_generate_quiz.py picks one per tag for the fixed quiz (qq.json); quiz
+# sessions (see quiz_session.py) choose from all of them.
+QUESTION_TEMPLATES = {
+    "Economy": [
+        "Do you support government initiatives to boost economic growth?",
+        "Should taxes be reduced to encourage private sector development?",
+        "Do you agree with increased spending on job creation programs?"
+    ],
+    "Education": [
+        "Should education be more practical and skill-oriented?",
+        "Do you support free higher education for all students?",
+        "Should government increase funding for schools and universities?"
+    ],
+    "Technology": [
+        "Should artificial intelligence and automation be regulated to prevent misuse?",
+        "Do you support investment in digital infrastructure?",
+        "Should government promote research and innovation in technology?"
+    ],
+    "Environment": [
+        "Do you support increased funding for renewable energy?",
+        "Should stricter policies be enforced to reduce pollution?",
+        "Do you agree with conservation programs for forests and wildlife?"
+    ],
+    "Healthcare": [
+        "Should healthcare be completely free and government-funded?",
+        "Do you support government initiatives for mental health?",
+        "Should public hospitals receive increased funding?"
+    ],
+    "Defense": [
+        "Do you support increased government spending on national defense?",
+        "Should military modernization programs be prioritized?",
+        "Do you agree with the current defense policy approach?"
+    ],
+    "Infrastructure": [
+        "Should the government invest more in public transport and smart cities?",
+        "Do you support development of roads, bridges, and housing?",
+        "Should infrastructure projects prioritize sustainability?"
+    ],
+    "Foreign Policy": [
+        "Do you support strengthening diplomatic relations internationally?",
+        "Should government prioritize trade agreements with other countries?",
+        "Do you agree with the current foreign policy strategy?"
+    ],
+    "Social Justice": [
+        "Should laws be strengthened to ensure equality and social justice?",
+        "Do you support policies promoting gender equality?",
+        "Should the government take action against discrimination?"
+    ],
+    "Agriculture": [
+        "Should farmers receive a guaranteed minimum price for crops?",
+        "Do you support government subsidies for agriculture?",
+        "Should irrigation and soil improvement programs be prioritized?"
+    ],
+    "General": [ # Fallback, just in case
+        "Do you agree with the overall direction of government policies?",
+        "Should citizens be more involved in policy-making?"
+    ]
+}
+
+ANSWER_OPTIONS = {
+    1: "Strongly Disagree",
+    2: "Disagree",
+    3: "Neutral",
+    4: "Agree",
+    5: "Strongly Agree"
+}
+
+
+def build_question_bank(tags: list = None) -> list[dict]:
+    """
+    Every template question for `tags` (default: POLICY_TAGS) in the qq.json
+    question format. IDs are stable as long as the templates don't change.
+    """
+    tags = POLICY_TAGS if tags is None else tags
+    bank = []
+    for tag in tags:
+        for question_text in QUESTION_TEMPLATES.get(tag, []):
+            bank.append({
+                "id": len(bank) + 1,
+                "question": question_text,
+                "tag": tag,
+                "options": ANSWER_OPTIONS
+            })
+    return bank
@@ -1,49 +1,114 @@
 # backend/src/quiz_engine.py
 
-import json
+import os
+import threading
 from pathlib import Path
 
+from .alignment_kernel import AlignmentKernel, round_like_python
+from .dataset_registry import DatasetRegistry, DEFAULT_ELECTION, memory_budget_from_env
+from .compiled_snapshot import snapshot_path_for
+from .result_cache import LRUCache, approx_size
+
 # --- Path Configuration ---
 # We define the paths relative to this file's parent (backend/)
 BACKEND_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BACKEND_DIR / "data"
 QUIZ_PATH = DATA_DIR / "qq.json"
 MANIFESTOS_PATH = DATA_DIR / "manifestos.json"
+MANIFESTOS_SNAPSHOT_PATH = snapshot_path_for(MANIFESTOS_PATH)  # Written by 1_run_analysis.py
+# Further elections: data/elections/<election>/manifestos.json (+ optional qq.json)
+ELECTIONS_DIR = DATA_DIR / "elections"
+
+# --- Shared In-memory Datasets ---
+# Both files of an election are parsed once and kept in memory. They are
+# only re-read when they change on disk, so every API request is served
+# from memory. If manifestos.snapshot matches manifestos.json it is
+# memory-mapped and alignment never needs to parse the JSON.
+#
+# The files under data/ are the default election; every directory under
+# data/elections/ adds one more, selected with `election=`. Elections are
+# loaded on first use and the least recently used ones are unloaded when
+# they go over CIVICSENSE_DATASET_MEMORY_MB (default 512).
+
+def _forget_election(election_id: str, snapshot) -> None:
+    # Unloaded elections free their cached results as well
+    _alignment_cache.remove_if(lambda key: key[0] == snapshot.version)
+
+_registry = DatasetRegistry(
+    memory_budget_bytes=memory_budget_from_env(),
+    default=os.getenv("CIVICSENSE_DEFAULT_ELECTION", DEFAULT_ELECTION),
+    on_evict=_forget_election,
+)
+_registry.register(DEFAULT_ELECTION, QUIZ_PATH, MANIFESTOS_PATH, compiled_path=MANIFESTOS_SNAPSHOT_PATH)
+_registry.discover(ELECTIONS_DIR, fallback_quiz_path=QUIZ_PATH)
+
+def get_registry() -> DatasetRegistry:
+    return _registry
+
+def get_dataset(election: str = None):
+    """
+    Returns the current DatasetSnapshot (questions + manifestos + version)
+    of an election, or of the default one. Raises KeyError for an unknown
+    election. Use one snapshot per request so all lookups see the same data.
+    """
+    return _registry.snapshot(election)
+
+def use_data_files(quiz_path, manifestos_path, use_compiled: bool = True,
+                   election: str = DEFAULT_ELECTION) -> None:
+    """
+    Points an election (the default one unless given) at a different
+    qq.json / manifestos.json pair (e.g. synthetic data for benchmarks).
+    The next request loads them. A matching .snapshot next to the
+    manifestos file is used if present.
+    """
+    compiled_path = snapshot_path_for(manifestos_path) if use_compiled else None
+    _registry.register(election, Path(quiz_path), Path(manifestos_path), compiled_path=compiled_path)
+
+# --- Alignment Result Cache ---
+# Answers are integers 1-5 over a small, fixed question set, so the same
+# answer vectors come in over and over. Results are memoized per dataset
+# version, which is unique per election; when an election's qq.json or
+# manifestos.json change, that election's old entries are dropped.
+# Bounds can be tuned with ALIGN_CACHE_MAX_ENTRIES / ALIGN_CACHE_MAX_BYTES.
+_alignment_cache = LRUCache(
+    max_entries=int(os.getenv("ALIGN_CACHE_MAX_ENTRIES", "50000")),
+    max_bytes=int(os.getenv("ALIGN_CACHE_MAX_BYTES", str(128 * 1024 * 1024))),
+)
+_alignment_cache_versions = {}  # election -> dataset version its cached entries belong to
+_alignment_cache_lock = threading.Lock()
+
+def configure_alignment_cache(max_entries: int = None, max_bytes: int = None) -> None:
+    """Changes the alignment cache bounds (applies on the next insert)."""
+    if max_entries is not None:
+        _alignment_cache.max_entries = max_entries
+    if max_bytes is not None:
+        _alignment_cache.max_bytes = max_bytes
+
+def alignment_cache_stats() -> dict:
+    """Hit/miss counters and memory use of the alignment result cache."""
+    stats = _alignment_cache.stats()
+    stats["dataset_versions"] = dict(_alignment_cache_versions)
+    return stats
 
 # --- Data Loading Functions ---
 
-def load_quiz_questions():
-    """Loads the quiz questions from qq.json"""
-    try:
-        with open(QUIZ_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Quiz file not found at {QUIZ_PATH}")
-        return []
-    except json.JSONDecodeError:
-        print(f"Error: Could not decode quiz file at {QUIZ_PATH}")
-        return []
-
-def load_manifestos():
-    """Loads the analyzed manifestos from manifestos.json"""
-    try:
-        with open(MANIFESTOS_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Manifestos file not found at {MANIFESTOS_PATH}")
-        return []
-    except json.JSONDecodeError:
-        print(f"Error: Could not decode manifestos file at {MANIFESTOS_PATH}")
-        return []
+def load_quiz_questions(election: str = None):
+    """Returns the quiz questions from qq.json (cached in memory, treat as read-only)"""
+    return get_dataset(election).questions
+
+def load_manifestos(election: str = None):
+    """Returns the analyzed manifestos from manifestos.json (cached in memory, treat as read-only)"""
+    return get_dataset(election).manifestos
 
 # --- Core Quiz Logic (from your ql.py) ---
 
-def link_answers_to_tags(user_answers: list[int]) -> dict:
+def link_answers_to_tags(user_answers: list[int], quiz_questions: list = None) -> dict:
     """
     Maps a user's list of answers to their corresponding policy tags.
     e.g., [5, 4, 2] -> {"Economy": [5], "Education": [4, 2]}
     """
-    quiz_questions = load_quiz_questions()
+    if quiz_questions is None:
+        quiz_questions = load_quiz_questions()
     tag_answer_map = {}
 
     # user_answers and quiz_questions should be parallel lists
@@ -59,69 +124,149 @@ def link_answers_to_tags(user_answers: list[int]) -> dict:
     return tag_answer_map
 
 # --- Core Alignment Logic (from your qe.ipynb) ---
+# The per-manifesto / per-tag loops now run as array operations over a
+# score matrix compiled once per dataset version (see alignment_kernel.py).
 
-def compute_alignment(user_answers: list[int]) -> dict:
-    """
-    Computes alignment for all manifestos and summarizes user preferences.
-    """
-    tag_answer_map = link_answers_to_tags(user_answers)
-    manifestos = load_manifestos()
-    
-    if not manifestos:
-        return {"error": "No manifestos loaded."}
-    if not tag_answer_map:
-        return {"error": "No valid answers or quiz questions."}
-
-    alignment_results = []
-    total_answer_count = sum(len(v) for v in tag_answer_map.values())
-
-    for m in manifestos:
-        # Get the policy_scores from our new LLM-generated structure
-        manifesto_scores = m.get("analysis", {}).get("policy_scores", {})
-        if not manifesto_scores:
-            continue
+def get_alignment_kernel(dataset=None) -> AlignmentKernel:
+    """Returns the compiled AlignmentKernel for a dataset snapshot (built once per version)."""
+    if dataset is None:
+        dataset = get_dataset()
+    if dataset.compiled is not None:
+        return dataset.derive(
+            "alignment_kernel",
+            lambda d: AlignmentKernel.from_compiled(d.compiled, d.questions)
+        )
+    return dataset.derive(
+        "alignment_kernel",
+        lambda d: AlignmentKernel(d.manifestos, d.questions)
+    )
 
-        score_sum = 0
-        for tag, answers in tag_answer_map.items():
-            # Get the manifesto's score for this tag
-            manifesto_score_data = manifesto_scores.get(tag, {})
-            # Default to 3 (Neutral) if not found
-            manifesto_score = manifesto_score_data.get("score", 3) 
-            
-            for ans in answers:
-                # similarity = 1 - (normalized_distance)
-                # Max distance is 4 (e.g., 1 vs 5)
-                distance = abs(ans - manifesto_score)
-                similarity = 1 - (distance / 4)
-                score_sum += max(0, similarity)
-
-        # Calculate final percentage
-        if total_answer_count == 0:
-            alignment_percentage = 0
-        else:
-            alignment_percentage = (score_sum / total_answer_count) * 100
-            
-        alignment_results.append({
-            "manifesto_id": m["id"],
-            "name": m.get("name", f"Manifesto {m['id']}"),
-            "alignment": round(alignment_percentage, 1),
-            "summary": m.get("analysis", {}).get("summary", "No summary available.")
-        })
+def _check_answers(user_answers: list) -> None:
+    # The old pure-Python loop raised TypeError on non-numeric answers;
+    # keep that instead of letting NumPy coerce strings like "5".
+    for ans in user_answers:
+        if not isinstance(ans, (int, float)):
+            raise TypeError(f"Answers must be numbers, got {ans!r}")
 
-    # Sort descending by alignment
-    alignment_results.sort(key=lambda x: x['alignment'], reverse=True)
-
-    # --- Also calculate the user's preference summary ---
+def _summarize_preferences(tag_answer_map: dict) -> list:
+    """The user's average answer per tag, sorted descending."""
     avg_scores = {
-        tag: round(sum(vals) / len(vals), 2) 
+        tag: round(sum(vals) / len(vals), 2)
         for tag, vals in tag_answer_map.items() if vals
     }
-    
+
     # Sort policies by the user's score, descending
-    user_preferences = sorted(avg_scores.items(), key=lambda x: x[1], reverse=True)
+    return sorted(avg_scores.items(), key=lambda x: x[1], reverse=True)
+
+def _build_result(kernel: AlignmentKernel, alignment, tag_answer_map: dict, top_k: int = None) -> dict:
+    """
+    Turns one row of kernel scores into the /api/align response shape.
+    With top_k, only the k best manifestos get a result row (and summary).
+    """
+    rounded = round_like_python(alignment, 1)
+
+    # Sort descending by alignment (stable, like the old list.sort)
+    alignment_results = [
+        {
+            "manifesto_id": kernel.ids[i],
+            "name": kernel.names[i],
+            "alignment": float(rounded[i]),
+            "summary": kernel.summaries[i]
+        }
+        for i in kernel.rank(rounded, top_k)
+    ]
 
     # Return a single dictionary with all results
     return {
         "alignment_results": alignment_results,
-        "user_preferences": user_preferences
-    }
\ No newline at end of file
+        "user_preferences": _summarize_preferences(tag_answer_map)
+    }
+
+def _normalize_answers(user_answers: list, questions: list):
+    """
+    Cache key for an answer vector: answers past the last question are
+    dropped (zip ignores them), answers to untagged questions are blanked
+    and integral floats become ints, so equivalent inputs share one entry.
+    Returns None if the answers are not all numbers (never cached).
+    """
+    key = []
+    for q, ans in zip(questions, user_answers):
+        if isinstance(ans, bool) or not isinstance(ans, (int, float)):
+            return None
+        if not q.get('tag'):
+            key.append(None)
+        elif isinstance(ans, float) and ans.is_integer():
+            key.append(int(ans))
+        else:
+            key.append(ans)
+    return tuple(key)
+
+def compute_alignment(user_answers: list[int], top_k: int = None, election: str = None) -> dict:
+    """
+    Computes alignment for all manifestos of an election (the default one
+    if None) and summarizes user preferences.
+    If top_k is given, only the top_k best-aligned manifestos are returned
+    (same order as the full ranking).
+    Results are served from an LRU cache keyed on (dataset version, answers);
+    the returned dict may be shared between callers, so treat it as read-only.
+    """
+    dataset = get_dataset(election)
+    if election is None:
+        election = _registry.default
+    if _alignment_cache_versions.get(election) != dataset.version:
+        with _alignment_cache_lock:
+            old_version = _alignment_cache_versions.get(election)
+            if old_version != dataset.version:
+                if old_version is not None:
+                    _alignment_cache.remove_if(lambda key: key[0] == old_version)
+                _alignment_cache_versions[election] = dataset.version
+
+    answers_key = _normalize_answers(user_answers, dataset.questions)
+    if answers_key is None:
+        return compute_alignment_many([user_answers], top_k=top_k, dataset=dataset)[0]
+
+    cache_key = (dataset.version, answers_key, top_k)
+    result = _alignment_cache.get(cache_key)
+    if result is None:
+        result = compute_alignment_many([user_answers], top_k=top_k, dataset=dataset)[0]
+        if "error" not in result:
+            _alignment_cache.put(cache_key, result, approx_size(result))
+    return result
+
+def compute_alignment_many(answer_vectors: list[list[int]], top_k: int = None, dataset=None) -> list[dict]:
+    """
+    Scores many users' answers in one go. Answer vectors of the same length
+    are stacked and scored with a single kernel call. top_k works as in
+    compute_alignment.
+    Returns one compute_alignment-style result per input, in order.
+    """
+    # One snapshot for the whole computation, so questions and manifestos
+    # always come from the same version of the data files.
+    if dataset is None:
+        dataset = get_dataset()
+    if not dataset.has_manifestos:
+        return [{"error": "No manifestos loaded."} for _ in answer_vectors]
+
+    kernel = get_alignment_kernel(dataset)
+    results = [None] * len(answer_vectors)
+    tag_answer_maps = [None] * len(answer_vectors)
+    batches = {}  # effective answer count -> row indices
+
+    for row, user_answers in enumerate(answer_vectors):
+        _check_answers(user_answers)
+        tag_answer_maps[row] = link_answers_to_tags(user_answers, dataset.questions)
+        if not tag_answer_maps[row]:
+            results[row] = {"error": "No valid answers or quiz questions."}
+            continue
+        num_answers = min(len(user_answers), kernel.num_questions)
+        batches.setdefault(num_answers, []).append(row)
+
+    for num_answers, rows in batches.items():
+        answers = [answer_vectors[row][:num_answers] for row in rows]
+        alignment = kernel.score(answers)
+        for batch_row, row in enumerate(rows):
+            results[row] = _build_result(
+                kernel, alignment[batch_row], tag_answer_maps[row], top_k
+            )
+
+    return results
@@ -0,0 +1,335 @@
+# backend/src/quiz_session.py
+
+import random
+import secrets
+import threading
+import time
+
+import numpy as np
+
+from .alignment_kernel import AlignmentKernel, MAX_DISTANCE, round_like_python
+from .question_bank import build_question_bank, ANSWER_OPTIONS
+from .quiz_engine import get_dataset, get_alignment_kernel, _build_result
+from .result_cache import LRUCache
+
+# --- Adaptive Quiz Sessions ---
+# Instead of posting all answers at the end, a session sends one answer at
+# a time. The server keeps each manifesto's running similarity sum, so an
+# answer costs one O(manifestos) vector add. The next question is the tag
+# that best separates the current leaders, and the session ends as soon as
+# no remaining question could change the top of the ranking.
+#
+# Scores match /api/align for the same answers (same similarity formula,
+# summed in answer order instead of tag order).
+
+NUM_LEADERS = 3         # Manifestos the next question should tell apart
+STABLE_TOP_K = 1        # Stop once the order of the top K can no longer change
+MIN_QUESTIONS = 3       # ... but never before this many answers
+SESSION_TTL = 3600      # Seconds an idle session is kept
+MAX_SESSIONS = 100_000
+ANSWER_VALUES = tuple(sorted(ANSWER_OPTIONS))
+
+
+def rounded_top(kernel: AlignmentKernel, alignment: np.ndarray, k: int):
+    """
+    Same as kernel.rank(round_like_python(alignment, 1), k), plus the
+    rounded values, but only rounds the manifestos that can make the top k
+    (rounding moves a value by at most 0.05).
+    Returns (indices, rounded alignments).
+    """
+    candidates = np.arange(len(alignment))
+    if k < len(alignment):
+        kth_value = -np.partition(-alignment, k - 1)[k - 1]
+        candidates = np.flatnonzero(alignment >= kth_value - 0.1)
+    rounded = round_like_python(alignment[candidates], 1)
+    # Candidates are in manifesto order, so ties still break the same way
+    order = kernel.rank(rounded, k)
+    return candidates[order], rounded[order]
+
+
+class AdaptiveQuiz:
+    """
+    The question bank compiled against one AlignmentKernel (one dataset
+    version). similarity[a, t, m] is the similarity of answer value
+    ANSWER_VALUES[a] on tag t to manifesto m, so scoring an answer is a
+    table lookup plus a vector add.
+    """
+
+    def __init__(self, kernel: AlignmentKernel, questions: list):
+        self.kernel = kernel
+        self.questions = [q for q in questions if q.get("tag") in kernel.tag_index]
+        self.question_by_id = {q["id"]: q for q in self.questions}
+        self.tags = list(dict.fromkeys(q["tag"] for q in self.questions))
+        self.tag_row = {tag: i for i, tag in enumerate(self.tags)}
+        self.questions_by_tag = {}
+        for q in self.questions:
+            self.questions_by_tag.setdefault(q["tag"], []).append(q)
+
+        scores = np.asarray(kernel.scores_by_tag)[[kernel.tag_index[t] for t in self.tags]]
+        answers = np.array(ANSWER_VALUES, dtype=np.float64)[:, np.newaxis, np.newaxis]
+        # Same arithmetic as AlignmentKernel.score, so the sums agree
+        similarity = 1 - (np.abs(answers - scores) / MAX_DISTANCE)
+        self.similarity = np.maximum(similarity, 0)
+        # Tie-breaker for question choice: how much a tag varies overall
+        self.tag_spread = scores.std(axis=1) if scores.size else np.zeros(len(self.tags))
+
+    @property
+    def num_manifestos(self) -> int:
+        return self.kernel.num_manifestos
+
+    @property
+    def nbytes(self) -> int:
+        return self.similarity.nbytes + self.tag_spread.nbytes
+
+    def answer_row(self, answer: int) -> int:
+        return ANSWER_VALUES.index(answer)
+
+    def top_is_stable(self, sums: np.ndarray, num_answers: int, remaining_rows: list,
+                      top_k: int = STABLE_TOP_K) -> bool:
+        """
+        True if answering the remaining tags can't change the top_k of the
+        ranking, as /api/align would rank them (rounded to 0.1%, ties in
+        manifesto order), and the current ranking already shows that top_k.
+
+        For each manifesto ranked above another, the best case for the lower
+        one is the sum over remaining tags of its largest possible gain; the
+        pair is settled if even that leaves it behind after rounding.
+        """
+        if not remaining_rows:
+            return True
+        top = self.kernel.rank(sums, top_k + 1)
+        current = (sums / num_answers) * 100 if num_answers else sums
+        if not np.array_equal(rounded_top(self.kernel, current, top_k)[0], top[:top_k]):
+            return False
+
+        num_final = num_answers + len(remaining_rows)
+        # A sum gap this large is >= 0.1 alignment points after averaging
+        rounding_margin = (0.1 + 1e-6) * num_final / 100
+        sim = self.similarity[:, remaining_rows]          # answers x remaining tags x manifestos
+
+        def settled(leader, challengers):
+            gain = (sim[:, :, challengers] - sim[:, :, leader, np.newaxis]).max(axis=0).sum(axis=0)
+            margin = sums[leader] - sums[challengers] - gain
+            # Equal rounded values keep manifesto order, so a later challenger
+            # only has to be kept from getting ahead
+            return ((margin >= rounding_margin) | ((margin >= -1e-9) & (challengers > leader))).all()
+
+        # The runner-up is the likeliest to catch up: check it alone first
+        # (cheap), and only then every other manifesto
+        if len(top) > top_k and not settled(top[top_k - 1], top[top_k:]):
+            return False
+        below = np.ones(len(sums), dtype=bool)
+        for leader in top[:top_k]:
+            below[leader] = False
+            if below.any() and not settled(leader, np.flatnonzero(below)):
+                return False
+        return True
+
+    def pick_tag(self, sums: np.ndarray, remaining_rows: list) -> int:
+        """
+        The remaining tag row that best separates the current leaders: the
+        mean (over possible answers) similarity difference between every
+        pair of leaders, summed. Ties go to the tag with the most overall
+        spread, then to POLICY_TAGS order.
+        """
+        leaders = self.kernel.rank(sums, NUM_LEADERS)
+        sim = self.similarity[:, remaining_rows][:, :, leaders]   # answers x remaining x leaders
+        pair_diffs = np.abs(sim[:, :, :, np.newaxis] - sim[:, :, np.newaxis, :]).mean(axis=0)
+        separation = pair_diffs.sum(axis=(1, 2))
+        best = max(
+            range(len(remaining_rows)),
+            key=lambda i: (round(float(separation[i]), 9), float(self.tag_spread[remaining_rows[i]]), -i)
+        )
+        return remaining_rows[best]
+
+
+def get_adaptive_quiz(dataset=None) -> AdaptiveQuiz:
+    """The AdaptiveQuiz for a dataset snapshot (built once per version)."""
+    if dataset is None:
+        dataset = get_dataset()
+    kernel = get_alignment_kernel(dataset)
+    return dataset.derive("adaptive_quiz", lambda d: AdaptiveQuiz(kernel, build_question_bank()))
+
+
+class QuizSession:
+    """One user's progress: answers so far and the running similarity sums."""
+
+    def __init__(self, session_id: str, quiz: AdaptiveQuiz, version, election: str = None):
+        self.id = session_id
+        self.quiz = quiz
+        self.version = version
+        self.election = election
+        self.sums = np.zeros(quiz.num_manifestos, dtype=np.float64)
+        self.answers = []          # (question id, answer) in order
+        self.answered_tags = {}    # tag -> answer
+        self.next_question = None
+        self.done_reason = None
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+        self._rng = random.Random(session_id)
+
+    # --- State ---
+
+    def state(self) -> str:
+        """Compact replay token: 'qid:answer,qid:answer'. Lets any worker rebuild the session."""
+        return ",".join(f"{qid}:{answer}" for qid, answer in self.answers)
+
+    @staticmethod
+    def parse_state(state: str) -> list:
+        answers = []
+        for item in filter(None, (state or "").split(",")):
+            qid, _, answer = item.partition(":")
+            try:
+                answers.append((int(qid), int(answer)))
+            except ValueError:
+                raise ValueError(f"Invalid session state entry: {item!r}")
+        return answers
+
+    def nbytes(self) -> int:
+        return self.sums.nbytes + 64 * len(self.answers) + 512
+
+    # --- Quiz Flow ---
+
+    def apply(self, question_id: int, answer: int) -> None:
+        """Adds one answer: O(manifestos). Raises ValueError for invalid input."""
+        question = self.quiz.question_by_id.get(question_id)
+        if question is None:
+            raise ValueError(f"Unknown question id: {question_id!r}")
+        if isinstance(answer, bool) or not isinstance(answer, int) or answer not in ANSWER_VALUES:
+            raise ValueError(f"Answer must be one of {list(ANSWER_VALUES)}.")
+        tag = question["tag"]
+        if tag in self.answered_tags:
+            raise ValueError(f"A question about {tag} was already answered.")
+        self.sums += self.quiz.similarity[self.quiz.answer_row(answer), self.quiz.tag_row[tag]]
+        self.answers.append((question_id, answer))
+        self.answered_tags[tag] = answer
+        self.updated_at = time.monotonic()
+
+    def advance(self) -> None:
+        """Chooses the next question, or ends the session."""
+        remaining = [
+            self.quiz.tag_row[tag] for tag in self.quiz.tags if tag not in self.answered_tags
+        ]
+        if not remaining:
+            self.next_question, self.done_reason = None, "complete"
+        elif len(self.answers) >= MIN_QUESTIONS and self.quiz.top_is_stable(self.sums, len(self.answers), remaining):
+            self.next_question, self.done_reason = None, "stable"
+        else:
+            tag = self.quiz.tags[self.quiz.pick_tag(self.sums, remaining)]
+            self.next_question = self._rng.choice(self.quiz.questions_by_tag[tag])
+            self.done_reason = None
+
+    def alignment(self) -> np.ndarray:
+        if not self.answers:
+            return np.zeros_like(self.sums)
+        return (self.sums / len(self.answers)) * 100
+
+    def to_dict(self, top_k: int = None) -> dict:
+        kernel = self.quiz.kernel
+        alignment = self.alignment()
+        leaders = [
+            {"manifesto_id": kernel.ids[i], "name": kernel.names[i], "alignment": float(value)}
+            for i, value in zip(*rounded_top(kernel, alignment, NUM_LEADERS))
+        ]
+        response = {
+            "session_id": self.id,
+            "state": self.state(),
+            "answered": len(self.answers),
+            "max_questions": len(self.quiz.tags),
+            "done": self.done_reason is not None,
+            "reason": self.done_reason,
+            "question": self.next_question,
+            "leaders": leaders,
+        }
+        if self.done_reason is not None and self.answers:
+            tag_answer_map = {tag: [answer] for tag, answer in self.answered_tags.items()}
+            response["results"] = _build_result(kernel, alignment, tag_answer_map, top_k)
+        return response
+
+
+# --- Session Store ---
+# Sessions live in this process (LRU, idle ones expire after SESSION_TTL).
+# Every response carries the replay `state`; a worker that doesn't have the
+# session (another gunicorn worker, a restart, an eviction) rebuilds it from
+# that in O(answers x manifestos).
+_sessions = LRUCache(max_entries=MAX_SESSIONS, max_bytes=256 * 1024 * 1024)
+_completed_lock = threading.Lock()
+_completed = {"sessions": 0, "questions": 0, "stopped_early": 0}
+
+
+def _store(session: QuizSession) -> None:
+    _sessions.put(session.id, session, session.nbytes())
+
+
+def _rebuild(session_id: str, answers: list, election: str = None) -> QuizSession:
+    dataset = get_dataset(election)
+    if not dataset.has_manifestos:
+        raise LookupError("No manifestos loaded.")
+    session = QuizSession(session_id, get_adaptive_quiz(dataset), dataset.version, election)
+    for question_id, answer in answers:
+        session.apply(question_id, answer)
+    session.advance()
+    return session
+
+
+def start_session(election: str = None) -> dict:
+    """Starts a session on an election (the default one if None) and returns its first question."""
+    session = _rebuild(secrets.token_urlsafe(12), [], election)
+    _store(session)
+    return session.to_dict()
+
+
+def answer_session(session_id: str, question_id: int, answer: int,
+                   state: str = None, top_k: int = None, election: str = None) -> dict:
+    """
+    Records one answer and returns the next question (or the final results
+    once the session is done). `state` is the token from the previous
+    response. It wins over this process's copy of the session whenever the
+    two differ: with several gunicorn workers, the local copy may be
+    missing answers that another worker applied. A known session stays on the election it was started on; `election` is
+    used when it has to be rebuilt from `state`.
+    Raises LookupError for an unknown session, ValueError for bad input.
+    """
+    session = _sessions.get(session_id)
+    if session is not None and time.monotonic() - session.updated_at > SESSION_TTL:
+        session = None
+    if session is not None:
+        election = session.election
+    dataset_version = get_dataset(election).version
+    stale = session is not None and state is not None and state != session.state()
+    if session is None or stale or session.version != dataset_version:
+        if state is not None:
+            answers = QuizSession.parse_state(state)
+        elif session is not None:
+            answers = list(session.answers)
+        else:
+            raise LookupError("Session not found or expired.")
+        session = _rebuild(session_id, answers, election)
+        _store(session)
+
+    with session.lock:
+        if session.answers and session.answers[-1] == (question_id, answer):
+            return session.to_dict(top_k)  # Retried request: already applied
+        if session.done_reason is not None:
+            raise ValueError("This session is already complete.")
+        session.apply(question_id, answer)
+        session.advance()
+        _store(session)  # Refreshes LRU position and size
+        if session.done_reason is not None:
+            with _completed_lock:
+                _completed["sessions"] += 1
+                _completed["questions"] += len(session.answers)
+                _completed["stopped_early"] += session.done_reason == "stable"
+        return session.to_dict(top_k)
+
+
+def session_stats() -> dict:
+    """Store usage plus completed-session counters (questions per session)."""
+    stats = _sessions.stats()
+    with _completed_lock:
+        completed = dict(_completed)
+    stats.update({f"completed_{k}": v for k, v in completed.items()})
+    stats["avg_questions"] = (
+        round(completed["questions"] / completed["sessions"], 2) if completed["sessions"] else 0.0
+    )
+    return stats
@@ -0,0 +1,97 @@
+# backend/src/rate_limit.py
+
+import random
+import threading
+import time
+
+# --- Provider Rate Limits ---
+# Conservative requests-per-minute defaults per provider. Raise them if your
+# account tier allows more; the limiter only needs to stay under the quota.
+PROVIDER_RATE_LIMITS = {
+    "google": 60,
+    "openai": 500,
+    "anthropic": 50,
+}
+DEFAULT_RATE_LIMIT = 60
+
+# Exception class names (from the provider SDKs) that are worth retrying.
+# We match on names so this module never has to import the SDKs.
+RETRYABLE_ERROR_NAMES = {
+    "RateLimitError", "APIConnectionError", "APITimeoutError",
+    "InternalServerError", "ServiceUnavailable", "ResourceExhausted",
+    "DeadlineExceeded", "TooManyRequests",
+    "OverloadedError", "Timeout", "TimeoutError", "ConnectionError",
+}
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: allows `requests_per_minute` on average, with
+    bursts of up to `burst` requests. acquire() blocks until a token is free.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int = None):
+        self.rate = requests_per_minute / 60.0  # tokens per second
+        self.capacity = burst if burst is not None else max(1, int(requests_per_minute // 10))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_provider(cls, provider: str, requests_per_minute: float = None):
+        """Builds a limiter using the provider's default quota unless one is given."""
+        rpm = requests_per_minute or PROVIDER_RATE_LIMITS.get(provider.lower(), DEFAULT_RATE_LIMIT)
+        return cls(rpm)
+
+    def _reserve(self) -> float:
+        # Returns how long the caller has to wait for its token.
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Blocks until the next request is allowed."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate-limit, timeout, connection and 5xx errors."""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def call_with_retries(func, *args, limiter: RateLimiter = None, retries: int = 4,
+                      base_delay: float = 2.0, max_delay: float = 60.0, on_retry=None, **kwargs):
+    """
+    Calls func(*args, **kwargs), waiting on `limiter` before every attempt.
+    Retryable errors are retried up to `retries` times with exponential
+    backoff plus jitter (2s, 4s, 8s, ... capped at max_delay); anything else
+    is raised immediately. on_retry(attempt, error, delay) is called before
+    each retry, e.g. for logging.
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= retries or not is_retryable(e):
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            # Honour a server-provided Retry-After when the SDK exposes it
+            retry_after = getattr(e, "retry_after", None)
+            if isinstance(retry_after, (int, float)):
+                delay = max(delay, retry_after)
+            delay *= random.uniform(0.8, 1.2)
+            if on_retry is not None:
+                on_retry(attempt + 1, e, delay)
+            time.sleep(delay)
@@ -0,0 +1,105 @@
+# backend/src/result_cache.py
+
+import sys
+import threading
+from collections import OrderedDict
+
+# --- Bounded LRU Cache ---
+# A small thread-safe LRU used to memoize expensive results (alignment
+# responses, simplified passages, ...). It is bounded both by number of
+# entries and by an approximate memory budget, and counts hits/misses so
+# we can see whether it is pulling its weight.
+
+
+def approx_size(obj, _depth: int = 0) -> int:
+    """
+    Rough deep size of a JSON-like value (dicts, lists, tuples, scalars).
+    Strings deeper than the top level are not counted: in our results they
+    are references to data that already lives in the dataset snapshot.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += approx_size(v, _depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            size += approx_size(v, _depth + 1)
+    elif isinstance(obj, str) and _depth > 0:
+        return 0
+    return size
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by `max_entries` and `max_bytes`.
+    Sizes are supplied by the caller on put() (see approx_size).
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returns the cached value (marking it most recently used) or `default`."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size: int = 0) -> None:
+        """Stores a value, evicting least recently used entries to stay within bounds."""
+        if size > self.max_bytes or self.max_entries <= 0:
+            return  # Would never fit; don't flush the whole cache for it
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            while len(self._data) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def remove_if(self, predicate) -> int:
+        """Drops every entry whose key matches predicate(key). Returns how many were removed."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                _, size = self._data.pop(key)
+                self.current_bytes -= size
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drops every entry (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current usage, for logging or a metrics endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.current_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,278 @@
+# backend/src/simplify_service.py
+
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from .result_cache import LRUCache, approx_size
+from .text_simplifier import (
+    build_simplify_prompt,
+    build_batch_simplify_prompt,
+    parse_simplified_text,
+    parse_batch_output,
+    split_into_units,
+    join_units,
+)
+
+# --- On-demand Simplification ---
+# Simplifying a passage is an LLM call, so /api/simplify goes through three
+# layers before one is made:
+#   1. a cache of simplified units (paragraphs / sentence runs), so text
+#      that was simplified before - by anyone - is answered from memory;
+#   2. coalescing: a unit already waiting for the LLM is not sent twice,
+#      the second request waits on the same future;
+#   3. batching: units queued within BATCH_WINDOW of each other go to the
+#      LLM as one prompt and the answer is split back per unit.
+
+BATCH_WINDOW = 0.05          # Seconds to wait for more units after the first one arrives
+MAX_BATCH_UNITS = 16
+MAX_BATCH_CHARS = 12_000     # Keeps batch prompts (and answers) a reasonable size
+MAX_CONCURRENT_BATCHES = 4   # LLM calls in flight at once
+CACHE_MAX_ENTRIES = 20_000
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def unit_key(unit: str) -> str:
+    return hashlib.sha256(unit.encode("utf-8")).hexdigest()
+
+
+class SimplifyService:
+    """
+    Batches, caches and de-duplicates simplification requests.
+
+        service = SimplifyService(llm.generate)
+        result = service.simplify("Long policy text ...")  # blocks until done
+        result["simplified"]
+
+    `generate(prompt) -> str` is called from a small thread pool; wrap it
+    with retries / rate limiting as needed. The dispatcher thread is started
+    on first use, so the service can be created before a fork.
+    """
+
+    def __init__(self, generate, window: float = BATCH_WINDOW,
+                 max_batch_units: int = MAX_BATCH_UNITS,
+                 max_batch_chars: int = MAX_BATCH_CHARS,
+                 max_concurrent_batches: int = MAX_CONCURRENT_BATCHES,
+                 cache: LRUCache = None, on_batch=None):
+        """
+        on_batch: optional callback(units, seconds, ok) after every LLM call,
+                  e.g. to feed batch-size / latency histograms.
+        """
+        self.generate = generate
+        self.window = window
+        self.max_batch_units = max_batch_units
+        self.max_batch_chars = max_batch_chars
+        self.max_concurrent_batches = max_concurrent_batches
+        self.cache = cache if cache is not None else LRUCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+        self.on_batch = on_batch
+
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._queue = deque()   # (key, unit, arrival time), waiting for a batch
+        self._inflight = {}     # key -> Future, queued or being simplified
+        self._dispatcher = None
+        self._pool = None
+        # A batch is only formed once a call slot is free, so under load
+        # units pile up in the queue and the next batch is bigger
+        self._slots = threading.BoundedSemaphore(max_concurrent_batches)
+        self._counts = {
+            "requests": 0, "units": 0, "lookups": 0, "cache_hits": 0, "coalesced": 0,
+            "llm_units": 0, "batches": 0, "fallback_calls": 0, "errors": 0,
+        }
+
+    # --- Public API ---
+
+    def simplify(self, text: str, timeout: float = None) -> dict:
+        """
+        Simplifies text unit by unit. Returns {"simplified", "units",
+        "cached_units", "coalesced_units"}. Raises TimeoutError if the LLM
+        doesn't answer within `timeout`, or the LLM's error if it failed.
+        """
+        paragraphs = split_into_units(text)
+        units = [unit for units in paragraphs for unit in units]
+        distinct = list(dict.fromkeys(units))  # Repeats within one text are looked up once
+        results, futures = {}, {}
+        cached = coalesced = 0
+
+        for unit in distinct:
+            value, future, is_new = self._lookup(unit_key(unit), unit)
+            if future is None:
+                results[unit] = value
+                cached += 1
+            else:
+                futures[unit] = future
+                coalesced += not is_new
+
+        with self._lock:
+            self._counts["requests"] += 1
+            self._counts["units"] += len(units)
+            self._counts["lookups"] += len(distinct)
+            self._counts["cache_hits"] += cached
+            self._counts["coalesced"] += coalesced
+
+        if futures:
+            done, pending = wait(futures.values(), timeout=timeout)
+            if pending:
+                raise TimeoutError(f"{len(pending)} passage(s) not simplified within {timeout}s")
+            for unit, future in futures.items():
+                results[unit] = future.result()
+
+        return {
+            "simplified": join_units([[results[unit] for unit in units] for units in paragraphs]),
+            "units": len(units),
+            "cached_units": cached,
+            "coalesced_units": coalesced,
+        }
+
+    def stats(self) -> dict:
+        """Request / batching counters plus the unit cache statistics."""
+        with self._lock:
+            counts = dict(self._counts)
+            counts["queued"] = len(self._queue)
+            counts["inflight"] = len(self._inflight)
+        lookups = counts["lookups"]
+        counts["avg_batch_units"] = round(counts["llm_units"] / counts["batches"], 2) if counts["batches"] else 0.0
+        # Share of units answered without a new LLM call (cache or coalesced)
+        counts["hit_rate"] = round((counts["cache_hits"] + counts["coalesced"]) / lookups, 4) if lookups else 0.0
+        counts["cache"] = self.cache.stats()
+        return counts
+
+    # --- Queueing ---
+
+    def _lookup(self, key: str, unit: str):
+        """
+        Returns (cached value, None, False) on a cache hit, else (None,
+        future, is_new): the in-flight future for this unit if there is
+        one, or a newly queued one. Checking the cache under the same lock
+        as the in-flight table means a finishing unit (cached, then removed
+        from the table in _finish) is always found in one of them.
+        """
+        with self._lock:
+            value = self.cache.get(key)
+            if value is not None:
+                return value, None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                return None, future, False
+            future = self._inflight[key] = Future()
+            self._queue.append((key, unit, time.monotonic()))
+            self._ensure_started()
+            self._ready.notify()
+            return None, future, True
+
+    def _ensure_started(self):
+        # Called with the lock held
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_concurrent_batches, thread_name_prefix="simplify-batch"
+            )
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, name="simplify-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def _batch_is_full(self) -> bool:
+        chars = 0
+        for count, (_, unit, _) in enumerate(self._queue, start=1):
+            chars += len(unit)
+            if count >= self.max_batch_units or chars >= self.max_batch_chars:
+                return True
+        return False
+
+    def _dispatch_loop(self):
+        while True:
+            self._slots.acquire()
+            with self._ready:
+                while not self._queue:
+                    self._ready.wait()
+                # Give concurrent requests a short window to join this batch
+                deadline = self._queue[0][2] + self.window
+                while not self._batch_is_full():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+                batch, chars = [], 0
+                while self._queue and len(batch) < self.max_batch_units:
+                    unit_chars = len(self._queue[0][1])
+                    if batch and chars + unit_chars > self.max_batch_chars:
+                        break
+                    key, unit, _ = self._queue.popleft()
+                    batch.append((key, unit))
+                    chars += unit_chars
+            self._pool.submit(self._run_batch_in_slot, batch)
+
+    # --- LLM Calls ---
+
+    def _call(self, units: list[str]) -> dict:
+        """One LLM call for `units`; returns {index: simplified text} for the units it answered."""
+        start = time.perf_counter()
+        ok = False
+        try:
+            if len(units) == 1:
+                text = parse_simplified_text(self.generate(build_simplify_prompt(units[0])))
+                results = {0: text} if text else {}
+            else:
+                results = parse_batch_output(self.generate(build_batch_simplify_prompt(units)), len(units))
+            ok = True
+            return results
+        finally:
+            with self._lock:
+                self._counts["batches"] += 1
+                self._counts["llm_units"] += len(units)
+                if not ok:
+                    self._counts["errors"] += 1
+            if self.on_batch is not None:
+                self.on_batch(len(units), time.perf_counter() - start, ok)
+
+    def _run_batch_in_slot(self, batch: list):
+        try:
+            self._run_batch(batch)
+        finally:
+            self._slots.release()
+
+    def _run_batch(self, batch: list):
+        units = [unit for _, unit in batch]
+        try:
+            results = self._call(units)
+        except Exception as e:
+            self._finish(batch, error=e)
+            return
+
+        # Units the batch answer left out are retried one by one
+        errors = {}
+        if len(units) > 1:
+            for i, unit in enumerate(units):
+                if i in results:
+                    continue
+                with self._lock:
+                    self._counts["fallback_calls"] += 1
+                try:
+                    single = self._call([unit])
+                except Exception as e:
+                    errors[i] = e
+                    continue
+                if 0 in single:
+                    results[i] = single[0]
+
+        answered = sorted(results)
+        self._finish([batch[i] for i in answered], results=[results[i] for i in answered])
+        for i in range(len(units)):
+            if i not in results:
+                self._finish([batch[i]], error=errors.get(i) or ValueError("LLM returned no text for the passage."))
+
+    def _finish(self, batch: list, results: list = None, error: Exception = None):
+        if results is not None:
+            # Cache first, then leave the in-flight table, so a new request
+            # always finds the unit in one of the two
+            for (key, _), text in zip(batch, results):
+                self.cache.put(key, text, approx_size(text))
+        with self._lock:
+            futures = [self._inflight.pop(key) for key, _ in batch]
+        for i, future in enumerate(futures):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[i])
@@ -0,0 +1,50 @@
+# backend/src/storage.py
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+# --- File Helpers ---
+# Small helpers shared by the pipeline scripts and caches.
+
+
+def file_sha256(path, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 hex digest of a file, read in chunks (constant memory)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write_bytes(path, data: bytes) -> None:
+    """
+    Writes `data` to `path` atomically: the bytes go to a temp file in the
+    same directory which is then renamed over the target. Readers (like the
+    running Flask app) see either the old file or the new one, never half.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def json_bytes(data, indent: int = 4) -> bytes:
+    """Serializes like our data files: UTF-8, not ASCII-escaped, indented."""
+    return json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+
+
+def atomic_write_json(path, data, indent: int = 4) -> None:
+    """json.dump to `path` atomically (same formatting as our data files)."""
+    atomic_write_bytes(path, json_bytes(data, indent))
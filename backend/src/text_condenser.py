@@ -0,0 +1,251 @@
+# backend/src/text_condenser.py
+
+import re
+from collections import Counter
+
+from .chunked_analyzer import estimate_tokens
+from .policy_lexicon import tag_pattern
+from .manifesto_analyzer import POLICY_TAGS
+
+# --- Pre-LLM Text Condensation ---
+# Extracted manifesto text carries a lot of tokens the LLM doesn't need:
+# running headers/footers, page numbers, tables of contents, garbled glyph
+# runs and boilerplate repeated on many pages. condense_pages() strips them
+# deterministically (same input -> same output, so LLM caching keeps
+# working) and can optionally keep only the passages that talk about one
+# of the POLICY_TAGS.
+
+CONDENSE_MODES = ("off", "clean", "relevant")
+
+EDGE_LINES = 3                   # Lines at the top/bottom of a page checked for headers/footers
+FURNITURE_MIN_PAGES = 3          # A header/footer must repeat on at least this many pages...
+FURNITURE_MIN_FRACTION = 0.3     # ... and on this fraction of all pages
+DUPLICATE_RUN_LINES = 3          # Consecutive lines compared when looking for duplicated blocks
+DUPLICATE_RUN_MIN_CHARS = 60     # ... ignoring runs too short to be worth it (bullets, numbers)
+DUPLICATE_PARAGRAPH_MIN_CHARS = 40
+PASSAGE_CHARS = 600              # Passage size for relevance filtering
+
+# Arabic or well-formed roman numerals up to 399, all lower or all upper
+# case: "xiv" and "XIV" are page numbers, "Civil" and "CIVIL" are not
+_PAGE_LABEL = (
+    r"(\d{1,4}"
+    r"|(?=[ivxlc])c{0,3}(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})"
+    r"|(?=[IVXLC])C{0,3}(XC|XL|L?X{0,3})(IX|IV|V?I{0,3}))"
+)
+_PAGE_NUMBER = re.compile(
+    rf"^((?i:page)\s*)?[-–—(\[]?\s*{_PAGE_LABEL}\s*[-–—)\]]?(\s*((?i:of)|/)\s*\d{{1,4}})?$"
+)
+# A table of contents entry: a leader ending in a page number ("Economy ..... 12")
+_TOC_LEADER = re.compile(rf"((\.\s?){{4,}}|…{{2,}}|_{{4,}})\s*{_PAGE_LABEL}$")
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b-\x1f\x7f]")
+
+
+def _normalize_line(line: str) -> str:
+    """Key used to spot repeats: case-folded, digits masked, whitespace collapsed."""
+    return re.sub(r"\s+", " ", re.sub(r"\d+", "#", line.strip().lower()))
+
+
+def _dedupe_key(text: str) -> str:
+    """Key for duplicate content: like _normalize_line but numbers must match too."""
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def _is_garbled(line: str) -> bool:
+    # Glyph runs from fonts without a text mapping come out as control characters
+    return len(_CONTROL_CHARS.findall(line)) >= max(2, len(line) // 10)
+
+
+def _edge_indices(lines: list[str]) -> set[int]:
+    """Indices of the first/last EDGE_LINES non-empty lines of a page."""
+    content = [i for i, line in enumerate(lines) if line.strip()]
+    return set(content[:EDGE_LINES] + content[-EDGE_LINES:])
+
+
+def condense_pages(pages: list[str], mode: str = "clean", tags: list = None):
+    """
+    Condenses a document given as a list of page texts.
+
+    mode: "clean"    - remove page furniture and duplicates
+          "relevant" - clean, then keep only passages matching the keyword
+                       lexicons of `tags` (default: all POLICY_TAGS), plus
+                       the opening passage for the summary
+          "off"      - pages joined unchanged
+
+    Returns (text, stats) where stats has chars/tokens before and after and
+    the number of lines / paragraphs removed by each rule.
+    """
+    if mode not in CONDENSE_MODES:
+        raise ValueError(f"Unknown condense mode: {mode!r} (expected one of {CONDENSE_MODES})")
+    original = "".join(page + "\n" for page in pages).strip()
+    removed = Counter()
+
+    if mode == "off":
+        text = original
+    else:
+        text = _clean(pages, removed)
+        if mode == "relevant":
+            text = _keep_relevant(text, tags or POLICY_TAGS, removed)
+
+    stats = {
+        "mode": mode,
+        "chars_before": len(original),
+        "chars_after": len(text),
+        "tokens_before": estimate_tokens(original),
+        "tokens_after": estimate_tokens(text),
+        "removed": dict(removed),
+    }
+    return text, stats
+
+
+def condense_text(text: str, mode: str = "clean", tags: list = None):
+    """condense_pages for text without page breaks (form feeds are used if present)."""
+    return condense_pages(text.split("\f"), mode, tags)
+
+
+def _clean(pages: list[str], removed: Counter) -> str:
+    page_lines = [page.split("\n") for page in pages]
+
+    # --- Running headers / footers: edge lines repeated across many pages ---
+    edge_counts = Counter()
+    for lines in page_lines:
+        edge_counts.update({_normalize_line(lines[i]) for i in _edge_indices(lines)})
+    min_pages = max(FURNITURE_MIN_PAGES, int(len(pages) * FURNITURE_MIN_FRACTION))
+    furniture = {key for key, count in edge_counts.items() if key and count >= min_pages}
+
+    cleaned_pages = []
+    for lines in page_lines:
+        edges = _edge_indices(lines)
+        kept = []
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if not stripped:
+                kept.append("")
+            elif i in edges and _PAGE_NUMBER.match(stripped):
+                # Only at the page edges: numbers on their own line in the
+                # body are usually table figures or years
+                removed["page_numbers"] += 1
+            elif _TOC_LEADER.search(stripped):
+                removed["toc_lines"] += 1
+            elif _is_garbled(stripped):
+                removed["garbled_lines"] += 1
+            elif i in edges and _normalize_line(line) in furniture:
+                removed["headers_footers"] += 1
+            else:
+                kept.append(re.sub(r"[ \t]+", " ", stripped))
+        cleaned_pages.append(kept)
+
+    # --- Repeated runs of lines: keep the first occurrence ---
+    # Pages are mostly one line per row with no blank lines, so duplicated
+    # blocks (a pledge restated in a summary, boilerplate boxes) are found as
+    # runs of DUPLICATE_RUN_LINES consecutive lines seen before.
+    flat = [(p, i) for p, lines in enumerate(cleaned_pages) for i, line in enumerate(lines) if line]
+    keys = [_dedupe_key(cleaned_pages[p][i]) for p, i in flat]
+    drop = set()
+    seen_runs = set()
+    for start in range(len(flat) - DUPLICATE_RUN_LINES + 1):
+        run = tuple(keys[start:start + DUPLICATE_RUN_LINES])
+        if sum(map(len, run)) < DUPLICATE_RUN_MIN_CHARS:
+            continue
+        if run in seen_runs:
+            drop.update(range(start, start + DUPLICATE_RUN_LINES))
+        else:
+            seen_runs.add(run)
+    if drop:
+        removed["duplicate_lines"] += len(drop)
+    drop_lines = {flat[j] for j in drop}
+    lines_out = []
+    for p, lines in enumerate(cleaned_pages):
+        lines_out.extend(line for i, line in enumerate(lines) if (p, i) not in drop_lines)
+        lines_out.append("")  # Page break -> paragraph break
+
+    # --- Duplicate paragraphs: keep the first occurrence ---
+    paragraphs = re.split(r"\n\s*\n", "\n".join(lines_out))
+    seen_paragraphs = set()
+    paragraphs_out = []
+    for paragraph in paragraphs:
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        key = _dedupe_key(paragraph)
+        if len(paragraph) >= DUPLICATE_PARAGRAPH_MIN_CHARS:
+            if key in seen_paragraphs:
+                removed["duplicate_paragraphs"] += 1
+                continue
+            seen_paragraphs.add(key)
+        paragraphs_out.append(paragraph)
+    return "\n\n".join(paragraphs_out)
+
+
+def _passages(text: str) -> list[str]:
+    """Groups lines into passages of ~PASSAGE_CHARS, preferring sentence ends as breaks."""
+    passages, current, size = [], [], 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        for line in paragraph.split("\n"):
+            current.append(line)
+            size += len(line) + 1
+            if size >= PASSAGE_CHARS and line.rstrip().endswith((".", "!", "?", ":")):
+                passages.append("\n".join(current))
+                current, size = [], 0
+        if current and size >= PASSAGE_CHARS // 2:
+            passages.append("\n".join(current))
+            current, size = [], 0
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+def _keep_relevant(text: str, tags: list, removed: Counter) -> str:
+    patterns = [tag_pattern(tag) for tag in tags]
+    passages = _passages(text)
+    kept = []
+    for i, passage in enumerate(passages):
+        if i == 0 or any(p.search(passage) for p in patterns):
+            kept.append(passage)
+        else:
+            removed["irrelevant_passages"] += 1
+    return "\n\n".join(kept)
+
+
+def extract_condensed(pdf_path, cache_dir=None, workers: int = 1, mode: str = "clean"):
+    """
+    Extracts a PDF page by page (through the page cache when cache_dir is
+    given) and condenses it. Module-level so it can run in a process pool.
+
+    Returns (raw_text, condensed_text, stats); raw_text is exactly what
+    extract_text_cached returns.
+    """
+    if cache_dir is None:
+        from .pdf_extractor import iter_pdf_pages, iter_pdf_pages_parallel
+        if workers and workers > 1:
+            pages = iter_pdf_pages_parallel(pdf_path, workers)
+        else:
+            pages = iter_pdf_pages(pdf_path)
+    else:
+        from .extraction_cache import ExtractionCache
+        pages = ExtractionCache(cache_dir).get_or_extract(pdf_path, workers).iter_pages()
+    pages = [text for _, text in pages]
+    condensed, stats = condense_pages(pages, mode)
+    return "".join(page + "\n" for page in pages).strip(), condensed, stats
+
+
+def score_drift(analysis: dict, reference: dict) -> dict:
+    """
+    Compares the policy scores of two analyses of the same manifesto (e.g.
+    condensed vs. raw text). Returns per-tag differences (analysis minus
+    reference), the largest absolute difference and the tags that changed.
+    """
+    scores = analysis.get("policy_scores", {})
+    reference_scores = reference.get("policy_scores", {})
+    diffs = {}
+    for tag in POLICY_TAGS:
+        a = scores.get(tag, {}).get("score")
+        b = reference_scores.get(tag, {}).get("score")
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            diffs[tag] = a - b
+    changed = [tag for tag, diff in diffs.items() if diff]
+    return {
+        "diffs": diffs,
+        "max_abs": max((abs(d) for d in diffs.values()), default=0),
+        "mean_abs": sum(abs(d) for d in diffs.values()) / len(diffs) if diffs else 0,
+        "tags_changed": changed,
+    }
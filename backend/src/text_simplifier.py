@@ -1,5 +1,19 @@
 # backend/src/text_simplifier.py
 
+import re
+
+from .manifesto_analyzer import salvage_json
+
+# --- Simplification Units ---
+# Text is simplified paragraph by paragraph; paragraphs longer than
+# MAX_UNIT_CHARS are split on sentence boundaries. Units are what the
+# simplification cache stores and what gets batched into one LLM call.
+MAX_UNIT_CHARS = 1200
+SIMPLIFIED_TITLE = "Simplified Policy Text"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+
+
 def build_simplify_prompt(text: str) -> str:
     """Constructs the simplification prompt for the LLM."""
     return f"""
@@ -10,4 +24,96 @@ The simplified text must be presented as the content of a single, self-contained
 For every sentence or core idea, replace all political jargon, complex technical terms, and bureaucratic phrasing with simple, direct, everyday language. The simplified text must accurately convey the original meaning and intent without losing any critical details.
 
 Text to simplify: {text}
-"""
\ No newline at end of file
+"""
+
+
+def build_batch_simplify_prompt(passages: list[str]) -> str:
+    """
+    One prompt for several independent passages. The LLM answers with JSON
+    holding one simplified text per passage id (see parse_batch_output).
+    """
+    numbered = "\n\n".join(
+        f"[{i}]\n{passage}" for i, passage in enumerate(passages, start=1)
+    )
+    return f"""
+You are a specialized Jargon Removal and Simplification Engine. Your task is to receive complex political, legal, or policy text and rewrite it to be easily understandable by a general audience (a layman).
+
+Below are {len(passages)} independent passages, each starting with its id in square brackets. Simplify each passage on its own.
+
+For every sentence or core idea, replace all political jargon, complex technical terms, and bureaucratic phrasing with simple, direct, everyday language. The simplified text must accurately convey the original meaning and intent without losing any critical details.
+
+Respond ONLY with a valid JSON object in this exact format, with exactly one entry per passage, in the same order:
+{{
+  "simplified": [
+    {{"id": 1, "text": "<simplified passage 1>"}},
+    {{"id": 2, "text": "<simplified passage 2>"}}
+  ]
+}}
+
+Passages:
+{numbered}
+"""
+
+
+def parse_simplified_text(output_text: str) -> str:
+    """Strips the title and code fences around a build_simplify_prompt answer."""
+    text = output_text.strip()
+    text = re.sub(r"^```[\w-]*\s*|\s*```$", "", text).strip()
+    if text.lower().startswith(SIMPLIFIED_TITLE.lower()):
+        text = text[len(SIMPLIFIED_TITLE):].lstrip(" :\n#*")
+    return text.strip()
+
+
+def parse_batch_output(output_text: str, count: int) -> dict:
+    """
+    Reads a build_batch_simplify_prompt answer. Returns {index: text} for
+    every passage (0-based) the LLM answered; missing or empty entries are
+    left out so the caller can retry just those.
+    """
+    data = salvage_json(output_text)
+    entries = data.get("simplified") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        return {}
+    results = {}
+    for position, entry in enumerate(entries):
+        if isinstance(entry, dict):
+            index, text = entry.get("id", position + 1), entry.get("text")
+        else:
+            index, text = position + 1, entry
+        if isinstance(index, str) and index.strip().isdigit():
+            index = int(index)
+        if isinstance(index, int) and 1 <= index <= count and isinstance(text, str) and text.strip():
+            results.setdefault(index - 1, text.strip())
+    return results
+
+
+def split_into_units(text: str, max_chars: int = MAX_UNIT_CHARS) -> list[list[str]]:
+    """
+    Splits text into paragraphs, and long paragraphs into runs of whole
+    sentences of up to max_chars. Returns one list of units per paragraph.
+    """
+    paragraphs = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = re.sub(r"\s+", " ", paragraph).strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            paragraphs.append([paragraph])
+            continue
+        units, current = [], ""
+        for sentence in _SENTENCE_END.split(paragraph):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                units.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            units.append(current)
+        paragraphs.append(units)
+    return paragraphs
+
+
+def join_units(paragraphs: list[list[str]]) -> str:
+    """Inverse of split_into_units for the simplified units."""
+    return "\n\n".join(" ".join(units) for units in paragraphs)
+